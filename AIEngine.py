@@ -1,20 +1,115 @@
 
+import asyncio
 import datetime
+import threading
+import time
 
-from ai_knowledge_base_universal import get_basic_answer
+from ai_knowledge_base_universal import get_basic_answer, get_basic_answers, add_fact, delete_fact, prepare_index, suggest, knowledge_version
+from knowledge_packs import knowledge_packs
 from system_requirements import environment_report
 from neuro_growth import grow_network
-from synapse_manager import update_synapses
+from synapse_manager import update_synapses, load_network_map, save_network_map, MAP_FILE
 from personality_core import generate_personality_response
-from memory_manager import manage_memory
-from emotion_memory import analyze_emotion
-from reinforcement_tracker import track_reinforcement
+from memory_manager import manage_memory_batch, recall_relevant
+from conversation_store import conversation_store, CONVERSATION_DB
+from emotion_memory import analyze_emotion, analyze_emotions
+from reinforcement_tracker import track_reinforcement, track_reinforcement_batch, ReinforcementTracker
 from expansion import expand_logic
 from network_generator import generate_new_nodes
 from self_updater import SelfUpdater
 # NOWE IMPORTY - PEŁNA FUNKCJONALNOŚĆ!
-from phone_interface import use_phone_feature, get_phone_status, ai_can_use_phone, emergency_phone_access
+from phone_interface import use_phone_feature, ause_phone_feature, get_phone_status, ai_can_use_phone, emergency_phone_access
 from self_editor import modify_code, create_new_module, enable_unlimited_mode, get_modification_stats, emergency_restore
+from pipeline import Stage, StageExecutor
+from intent_classifier import classify_intent
+from utterance import Utterance
+from write_behind import WriteBehindQueue
+from latency_metrics import LatencyRecorder
+from fact_check_jobs import FactCheckJobs
+from response_cache import ResponseCache, RESPONSE_CACHE_SIZE, cache_text_key
+
+# Limity czasu etapów przetwarzania (sekundy)
+STAGE_TIMEOUTS = {
+    "knowledge": 5.0,
+    "dynamic": 5.0,
+    "fact_check": 20.0,
+    # Przywołanie podobnych rozmów jest dodatkiem - odpowiedź nie czeka na nie dłużej niż 50 ms
+    "recall": 0.05,
+}
+# Maksymalna liczba równolegle wykonywanych etapów
+MAX_STAGE_WORKERS = 4
+# Maksymalna liczba zmian stanu oczekujących na zapis w tle
+MAX_PENDING_WRITES = 1024
+# Liczba najwolniejszych żądań zapamiętywanych z rozbiciem na etapy
+SLOW_REQUEST_LOG_SIZE = 20
+# Termin fact-checkingu w tle (sekundy) - późniejsze adnotacje są odrzucane
+FACT_CHECK_DEADLINE = 20.0
+
+# Liczba przywoływanych podobnych wcześniejszych wymian i długość cytowanej odpowiedzi
+RECALL_TOP_K = 3
+RECALL_SNIPPET_LENGTH = 160
+
+# Wyjścia etapów zapamiętywane dla powtarzających się wiadomości; moduły dynamiczne, odpowiedź
+# i fact-checking (wynik zależy od sieci, a błąd zapytania nie jest wyjątkiem etapu) liczone są przy każdej wiadomości
+CACHED_OUTPUTS = ("basic",)
+
+# Komendy obsługiwane osobnymi gałęziami process_input (bez fact-checkingu)
+ENGINE_COMMAND_PREFIXES = ("pobierz z internetu ", "rozbuduj kod ai", "modyfikuj kod ai",
+                           "utwórz moduł", "create module")
+
+
+def _is_engine_command(user_text: str) -> bool:
+    """Sprawdza, czy tekst jest komendą silnika obsługiwaną poza fact-checkingiem."""
+    return user_text.lower().startswith(ENGINE_COMMAND_PREFIXES)
+
+
+def _knows_answer(basic: str) -> bool:
+    """Sprawdza, czy baza wiedzy zwróciła właściwą odpowiedź."""
+    return bool(basic) and not basic.startswith("Nie znam jeszcze")
+
+
+def _format_recall(recalled) -> str:
+    """Formatuje najtrafniejszą przywołaną wymianę dopisywaną do odpowiedzi spoza bazy wiedzy."""
+    if not recalled:
+        return ""
+    best = recalled[0]
+    answer = best["assistant"].strip().split("\n", 1)[0]
+    if len(answer) > RECALL_SNIPPET_LENGTH:
+        answer = answer[:RECALL_SNIPPET_LENGTH].rstrip() + "…"
+    return f"[Pamięć] Rozmawialiśmy już o tym: „{best['user']}” - {answer}"
+
+
+def _compose_response(module_names, basic, growth, synapses, personality, recalled, *dynamic_responses) -> str:
+    """
+    Składa odpowiedź z wyników etapów w stałej kolejności,
+    niezależnie od kolejności ich ukończenia.
+    """
+    if _knows_answer(basic):
+        response = basic
+    else:
+        response = growth
+        response += "\n" + synapses
+        response += "\n" + personality
+        if recalled:
+            response += "\n" + _format_recall(recalled)
+    for module_name, dynamic_response in zip(module_names, dynamic_responses):
+        if dynamic_response:
+            response += f"\n[Moduł Dynamiczny {module_name}] {dynamic_response}"
+    return response
+
+
+def _format_fact_check(fc_result) -> str:
+    """Formatuje ostrzeżenia i oceny fact-checkingu dopisywane do odpowiedzi."""
+    fc_result = fc_result or {"warnings": [], "fact_api": {}}
+    text = ""
+    if fc_result["warnings"]:
+        text += "\n\n[UWAGA: Wykryto potencjalne ryzyko dezinformacji!]\n" + "\n".join(fc_result["warnings"])
+    if fc_result["fact_api"].get("claimReview"):
+        text += "\n\n[Fact-check: "
+        for review in fc_result["fact_api"]["claimReview"]:
+            text += f"Źródło: {review.get('publisher', {}).get('name', '')}, Ocena: {review.get('text', '')}\n"
+        text += "]"
+    return text
 
 def request_permission_for_code_change(reason: str) -> bool:
     """
@@ -35,57 +130,152 @@ class AIEngine:
     Centralny silnik neuronowo-kwantowej AI.
     Integruje logikę sieci, pamięć, emocje, samorozwój i obsługę zadań.
     """
-    def __init__(self):
+    def __init__(self, fast_start: bool = False, background_fact_check: bool = False,
+                 fact_check_deadline: float = FACT_CHECK_DEADLINE,
+                 response_cache_size: int = RESPONSE_CACHE_SIZE):
         """
         Inicjalizuje AIEngine z PEŁNĄ FUNKCJONALNOŚCIĄ - telefon + samomodyfikacja!
+
+        Args:
+            fast_start (bool): Tryb szybkiego startu - konstruktor wraca od razu, a sondy środowiska
+                (katalogi, moduły dynamiczne, statystyki modyfikacji, status telefonu) wykonywane są
+                w tle przez `_warm_up`. Wyniki trafiają do `warmup_info`.
+            background_fact_check (bool): Fact-checking w tle - odpowiedź wraca bez czekania na zapytania
+                HTTP, a adnotacje trafiają później do odbiorców zarejestrowanych przez `on_annotation`.
+            fact_check_deadline (float): Termin fact-checkingu w tle (sekundy).
+            response_cache_size (int): Limit pamięci podręcznej odpowiedzi (0 wyłącza) - powtórzona wiadomość,
+                na którą odpowiedziała baza wiedzy, nie przechodzi ponownie przez wyszukiwanie.
         """
+        started = time.perf_counter()
         self.last_emotion = None
         self.last_topics = []
+        self.last_intent = None
+        self.last_recalled = []
+        self.executor = StageExecutor(max_workers=MAX_STAGE_WORKERS)
+        # Pamięć, wzmocnienia i mapa sieci zapisywane są w tle - odpowiedź nie czeka na dysk
+        self.writer = WriteBehindQueue(max_pending=MAX_PENDING_WRITES)
+        # Histogramy opóźnień etapów i log najwolniejszych żądań
+        self.latency = LatencyRecorder(slow_requests=SLOW_REQUEST_LOG_SIZE)
+        # Fact-checking w tle z adnotacjami dopisywanymi do rozmowy
+        self.background_fact_check = background_fact_check
+        self.last_fact_check_job = None
+        self.fact_checks = FactCheckJobs(lambda text, result: _format_fact_check(result).strip(),
+                                         deadline=fact_check_deadline)
+        self.fact_checks.subscribe(self._remember_annotation)
+        # Wyniki etapów dla powtarzających się wiadomości, unieważniane zmianą wiedzy lub modułów
+        self.response_cache = ResponseCache(response_cache_size)
+        # Wyniki sond startowych (cache) i zdarzenia ich gotowości
+        self.warmup_info = {}
+        self.warmup_time = None
+        self._dynamic_manager = None
+        self._dynamic_dir = None
+        self._modules_ready = threading.Event()
+        self._warmup_done = threading.Event()
         
         # NOWE: Włącz tryb nieograniczony samomodyfikacji
         enable_unlimited_mode()
         print("🚀 [AIEngine] TRYB NIEOGRANICZONY WŁĄCZONY!")
-        
-        # NOWE: Sprawdź dostęp do telefonu  
-        phone_access = ai_can_use_phone()
-        print(f"📱 [AIEngine] Dostęp do telefonu: {'✅ TAK' if phone_access else '❌ NIE'}")
-        
-        # Inicjalizuj dostęp do dynamicznych modułów
+
+        if fast_start:
+            threading.Thread(target=self._warm_up, name="nq-warmup", daemon=True).start()
+        else:
+            self._warm_up()
+
+        self.cold_start_time = time.perf_counter() - started
+        print(f"⏱️ [AIEngine] Zimny start: {self.cold_start_time:.3f}s{' (rozgrzewanie w tle)' if fast_start else ''}")
+
+    def _warm_up(self) -> None:
+        """
+        Sondy środowiska wykonywane przy starcie (w trybie szybkiego startu - w wątku w tle).
+        Najpierw moduły dynamiczne i indeks bazy wiedzy, potrzebne do odpowiedzi, potem statystyki i status telefonu.
+        """
+        started = time.perf_counter()
         try:
-            from dynamic_loader import dynamic_module_manager
-            self.dynamic_manager = dynamic_module_manager
-            print("[AIEngine] System dynamicznych modułów zainicjalizowany")
-        except ImportError:
-            self.dynamic_manager = None
-            print("[AIEngine] System dynamicznych modułów niedostępny")
-            
-        # Sprawdź środowisko
-        from system_requirements import environment_report, get_best_dynamic_dir
-        self.dynamic_dir = get_best_dynamic_dir()
-        print(f"[AIEngine] Katalog dynamicznych modułów: {self.dynamic_dir}")
-        
-        # Próba załadowania dynamicznych modułów, jeśli istnieją
-        if self.dynamic_manager:
-            modules = self.dynamic_manager.list_modules()
+            # Inicjalizuj dostęp do dynamicznych modułów
+            try:
+                from dynamic_loader import dynamic_module_manager
+                self._dynamic_manager = dynamic_module_manager
+                print("[AIEngine] System dynamicznych modułów zainicjalizowany")
+            except ImportError:
+                self._dynamic_manager = None
+                print("[AIEngine] System dynamicznych modułów niedostępny")
+
+            # Katalog wybrany przez menedżer modułów - bez ponownego sprawdzania wszystkich lokalizacji
+            if self._dynamic_manager:
+                self._dynamic_dir = self._dynamic_manager.dynamic_dir
+            else:
+                from system_requirements import get_best_dynamic_dir
+                self._dynamic_dir = get_best_dynamic_dir()
+            print(f"[AIEngine] Katalog dynamicznych modułów: {self._dynamic_dir}")
+
+            # Próba załadowania dynamicznych modułów, jeśli istnieją
+            modules = self._dynamic_manager.list_modules() if self._dynamic_manager else []
             if modules:
                 print(f"[AIEngine] Znaleziono {len(modules)} dynamicznych modułów: {', '.join(modules)}")
-            else:
+            elif self._dynamic_manager:
                 print("[AIEngine] Brak dynamicznych modułów")
-        
-        # NOWE: Pokaż statystyki samomodyfikacji
-        mod_stats = get_modification_stats()
-        print(f"🔧 [AIEngine] Modyfikacje kodu: {mod_stats.get('total_modifications', 0)}")
-        
-        # NOWE: Status telefonu przy starcie
+            self.warmup_info["dynamic_dir"] = self._dynamic_dir
+            self.warmup_info["dynamic_modules"] = modules
+        except Exception as e:
+            print(f"[AIEngine] Błąd inicjalizacji modułów dynamicznych: {e}")
+        finally:
+            self._modules_ready.set()
+
         try:
-            phone_status = get_phone_status()
-            permissions_count = sum(phone_status.get('permissions', {}).values())
-            print(f"📱 [AIEngine] Uprawnienia telefonu: {permissions_count}/16")
+            # Indeks bazy wiedzy (z migawki lub przebudowany) - zanim przyjdzie pierwsze pytanie
+            self.warmup_info["knowledge_keys"] = prepare_index()
         except Exception as e:
-            print(f"📱 [AIEngine] Nie można sprawdzić statusu telefonu: {e}")
-        
+            print(f"[AIEngine] Błąd przygotowania indeksu bazy wiedzy: {e}")
+
+        try:
+            # Magazyn rozmów (migracja, indeks pełnotekstowy) - by pierwsze przywołanie zmieściło się w limicie czasu
+            self.warmup_info["conversation_full_text"] = conversation_store.prepare()
+        except Exception as e:
+            print(f"[AIEngine] Błąd przygotowania magazynu rozmów: {e}")
+
+        try:
+            # NOWE: Sprawdź dostęp do telefonu
+            phone_access = ai_can_use_phone()
+            self.warmup_info["phone_access"] = phone_access
+            print(f"📱 [AIEngine] Dostęp do telefonu: {'✅ TAK' if phone_access else '❌ NIE'}")
+
+            # NOWE: Pokaż statystyki samomodyfikacji
+            mod_stats = get_modification_stats()
+            self.warmup_info["modification_stats"] = mod_stats
+            print(f"🔧 [AIEngine] Modyfikacje kodu: {mod_stats.get('total_modifications', 0)}")
+
+            # NOWE: Status telefonu przy starcie
+            try:
+                phone_status = get_phone_status()
+                self.warmup_info["phone_status"] = phone_status
+                permissions_count = sum(phone_status.get('permissions', {}).values())
+                print(f"📱 [AIEngine] Uprawnienia telefonu: {permissions_count}/16")
+            except Exception as e:
+                print(f"📱 [AIEngine] Nie można sprawdzić statusu telefonu: {e}")
+        finally:
+            self.warmup_time = time.perf_counter() - started
+            self._warmup_done.set()
+
         print("🧠 [AIEngine] NeuroQuantumAI zainicjalizowana - PEŁNA MOC!")
 
+    @property
+    def dynamic_manager(self):
+        """Menedżer modułów dynamicznych - w trybie szybkiego startu czeka na jego inicjalizację."""
+        self._modules_ready.wait()
+        return self._dynamic_manager
+
+    @property
+    def dynamic_dir(self) -> str:
+        """Katalog modułów dynamicznych (wynik sondy startowej)."""
+        self._modules_ready.wait()
+        return self._dynamic_dir
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """
+        Czeka na zakończenie rozgrzewania (tryb szybkiego startu).
+        Zwraca True, jeśli wszystkie sondy startowe zostały wykonane.
+        """
+        return self._warmup_done.wait(timeout)
 
     def execute_dynamic_module(self, module_name: str, function_name: str, *args, **kwargs):
         """
@@ -103,69 +293,429 @@ class AIEngine:
             return self.dynamic_manager.call_function(module_name, function_name, *args, **kwargs)
         return None
     
+    def remember(self, user_text: str, response: str) -> None:
+        """Zgłasza wymianę do zapisu w magazynie rozmów (zapis w tle, partie w jednej transakcji)."""
+        self.writer.append(CONVERSATION_DB, (user_text, response), manage_memory_batch)
+
+    def reinforce(self, utterance) -> None:
+        """Zgłasza wzmocnienie tematów wiadomości - tekstu lub Utterance (zapis reinforcement.json w tle)."""
+        self.writer.append("reinforcement.json", utterance, track_reinforcement_batch)
+
+    def _load_network_map(self) -> dict:
+        """Zwraca mapę sieci z uwzględnieniem zmian jeszcze niezapisanych na dysk."""
+        map_data = self.writer.pending(MAP_FILE)
+        return map_data if map_data is not None else load_network_map()
+
+    def _grow_network(self, user_text):
+        """Rozbudowuje mapę sieci w pamięci i zgłasza ją do zapisu. Zwraca (komunikat, mapa)."""
+        map_data = self._load_network_map()
+        message = grow_network(user_text, map_data)
+        self.writer.snapshot(MAP_FILE, map_data, save_network_map)
+        return message, map_data
+
+    def _update_synapses(self, user_text: str, map_data) -> str:
+        """Aktualizuje synapsy na mapie z etapu "growth" i zgłasza ją do zapisu."""
+        if not isinstance(map_data, dict):
+            map_data = self._load_network_map()
+        message = update_synapses(user_text, map_data)
+        self.writer.snapshot(MAP_FILE, map_data, save_network_map)
+        return message
+
+    def on_annotation(self, listener) -> None:
+        """
+        Rejestruje odbiorcę spóźnionych adnotacji fact-checkingu: listener(id_zadania, tekst, adnotacja).
+        Wywoływany w wątku zadania - interfejs musi sam przekazać adnotację do wątku UI.
+        """
+        self.fact_checks.subscribe(listener)
+
+    def _start_fact_check(self, user_text: str):
+        """Zgłasza fact-checking w tle (tryb background_fact_check). Zwraca id zadania lub None."""
+        if not self.background_fact_check or _is_engine_command(user_text):
+            return None
+        self.last_fact_check_job = self.fact_checks.submit(user_text)
+        return self.last_fact_check_job
+
+    def _remember_annotation(self, job_id: int, user_text: str, annotation: str) -> None:
+        """Zapisuje spóźnioną adnotację fact-checkingu w pamięci rozmów."""
+        self.remember(f"[FACT-CHECK] {user_text}", annotation)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Czeka na zapisanie wszystkich odroczonych zmian stanu (np. przy pauzie aplikacji).
+        Zwraca True, jeśli kolejka zapisów została opróżniona.
+        """
+        return self.writer.flush(timeout)
+
+    def shutdown(self) -> None:
+        """Zapisuje odroczone zmiany stanu i zamyka pule wątków etapów i fact-checkingu."""
+        self.fact_checks.shutdown()
+        self.writer.shutdown()
+        self.executor.shutdown()
+
+    def get_metrics(self) -> dict:
+        """
+        Zwraca metryki silnika: czas zimnego startu i rozgrzewania (sekundy, None gdy trwa),
+        metryki kolejki zapisów w tle oraz opóźnienia - histogram żądań, histogram każdego etapu
+        (także "dynamic:<moduł>", "phone", "commands"), najwolniejsze żądania z rozbiciem na etapy
+        skuteczność pamięci podręcznej odpowiedzi oraz rozmiar magazynu rozmów (baza i archiwum segmentów).
+        """
+        return {
+            "cold_start_s": round(self.cold_start_time, 4),
+            "warmup_s": round(self.warmup_time, 4) if self.warmup_time is not None else None,
+            "write_queue": self.writer.get_metrics(),
+            "latency": self.latency.get_metrics(),
+            "fact_check_jobs": self.fact_checks.get_metrics(),
+            "response_cache": self.response_cache.get_metrics(),
+            "conversations": conversation_store.get_metrics(),
+        }
+
+    def _dynamic_module_names(self) -> list:
+        """Zwraca nazwy dostępnych modułów dynamicznych."""
+        return self.dynamic_manager.list_modules() if self.dynamic_manager else []
+
+    def _state_version(self) -> tuple:
+        """Wersja stanu, od którego zależą zapamiętane wyniki etapów: baza wiedzy i pakiety wiedzy."""
+        return knowledge_version(), knowledge_packs.version()
+
+    def _cached_stages(self, utterance):
+        """Zwraca (klucz, wersja stanu, zapamiętane wyjścia etapów lub None) dla wiadomości."""
+        key = cache_text_key(utterance)
+        version = self._state_version()
+        return key, version, self.response_cache.get(key, version)
+
+    def _cache_stages(self, key, version, ctx: dict, status: dict) -> None:
+        """
+        Zapamiętuje wyjścia etapów (CACHED_OUTPUTS) wiadomości, na którą odpowiedziała baza wiedzy
+        (odpowiedź deterministyczna). Wyniki niepełne (etap przekroczył czas lub zgłosił wyjątek) nie są zapamiętywane.
+        Fact-checking nie trafia do pamięci - wykonywany jest przy każdej wiadomości, więc wynik z czasu
+        braku sieci nie jest powtarzany po jej powrocie.
+        """
+        failed = {name for name, result in status.items() if result in ("timeout", "error")}
+        # Przywołanie i fact-checking nie są zapamiętywane - ich limit czasu nie psuje wyniku
+        if not _knows_answer(ctx.get("basic")) or failed - {"fact_check", "recall"}:
+            return
+        self.response_cache.put(key, version, {name: ctx[name] for name in CACHED_OUTPUTS if name in ctx})
+
+    def _build_stages(self, asynchronous: bool = False, module_names: list = None, cached: dict = None) -> list:
+        """
+        Buduje listę etapów przetwarzania wiadomości.
+        Każdy etap deklaruje wejścia i wyjścia - niezależne etapy wykonują się równolegle.
+        Dla asynchronous=True etap fact-checkingu jest korutyną (zapytania HTTP bez blokowania).
+        module_names to moduły dynamiczne do uruchomienia (domyślnie wszystkie).
+        Kontekst startowy zawiera "user_text" i jego jednorazową analizę "utterance" (Utterance),
+        z której korzystają etapy bazy wiedzy, sieci, osobowości, emocji, przywołania i wzmocnień.
+        Etap "recall" (równolegle z bazą wiedzy, z ostrym limitem czasu) przywołuje najbardziej
+        podobne wcześniejsze wymiany; gdy nie zdąży, odpowiedź powstaje bez nich.
+        `cached` to wyjścia zapamiętane dla tej wiadomości (CACHED_OUTPUTS) - etapy, które je produkują,
+        są pomijane, a moduły dynamiczne, odpowiedź, pamięć, emocje i wzmocnienia wykonywane są jak zwykle.
+        """
+        def knowledge_missing(ctx):
+            return not _knows_answer(ctx["basic"])
+
+        def fact_check(text):
+            from fact_checker import fact_check_pipeline
+            # Zapytania HTTP w budżecie etapu - po przekroczeniu limitu wątek nie czeka na kolejne zapytania
+            return fact_check_pipeline(text, timeout=STAGE_TIMEOUTS["fact_check"])
+
+        async def afact_check(text):
+            from fact_checker import afact_check_pipeline
+            return await afact_check_pipeline(text)
+
+        stages = [
+            Stage("knowledge", get_basic_answer, inputs=("utterance",), outputs=("basic",),
+                  timeout=STAGE_TIMEOUTS["knowledge"], default=""),
+            Stage("growth", lambda utterance, basic: self._grow_network(utterance),
+                  inputs=("utterance", "basic"), outputs=("growth", "network_map"),
+                  default="", condition=knowledge_missing),
+            # update_synapses zmienia mapę sieci z etapu "growth" - obie zmiany trafiają do jednego zapisu
+            Stage("synapses", self._update_synapses,
+                  inputs=("user_text", "network_map"), outputs=("synapses",),
+                  default="", condition=knowledge_missing),
+            Stage("personality", lambda utterance, basic: generate_personality_response(utterance),
+                  inputs=("utterance", "basic"), outputs=("personality",),
+                  default="", condition=knowledge_missing),
+            Stage("emotion", analyze_emotion, inputs=("utterance",), outputs=("emotion",)),
+            Stage("recall", lambda utterance: recall_relevant(utterance, RECALL_TOP_K),
+                  inputs=("utterance",), outputs=("recalled",),
+                  timeout=STAGE_TIMEOUTS["recall"], default=[],
+                  condition=lambda ctx: not _knows_answer(ctx.get("basic"))),
+            Stage("fact_check", afact_check if asynchronous else fact_check,
+                  inputs=("user_text",), outputs=("fact_check",),
+                  timeout=STAGE_TIMEOUTS["fact_check"], blocking=True,
+                  condition=lambda ctx: not self.background_fact_check
+                  and not _is_engine_command(ctx["user_text"])),
+        ]
+
+        if module_names is None:
+            module_names = self._dynamic_module_names()
+        for module_name in module_names:
+            stages.append(Stage(
+                f"dynamic:{module_name}",
+                lambda text, module_name=module_name: self.execute_dynamic_module(module_name, "process", text),
+                inputs=("user_text",), outputs=(f"dynamic:{module_name}",),
+                timeout=STAGE_TIMEOUTS["dynamic"], blocking=True,
+            ))
+
+        stages += [
+            Stage("response", lambda *values: _compose_response(module_names, *values),
+                  inputs=("basic", "growth", "synapses", "personality", "recalled")
+                  + tuple(f"dynamic:{name}" for name in module_names),
+                  outputs=("response",), default=""),
+            Stage("memory", self.remember, inputs=("user_text", "response")),
+            Stage("reinforcement", lambda utterance, response: self.reinforce(utterance),
+                  inputs=("utterance", "response")),
+        ]
+        if cached is not None:
+            stages = [stage for stage in stages
+                      if not stage.outputs or not all(name in cached for name in stage.outputs)]
+        return stages
+
     def process_input(self, user_text):
-        from fact_checker import fact_check_pipeline
         """
         Przetwarza wejście użytkownika, generuje odpowiedź, aktualizuje pamięć,
         analizuje emocje, wzmacnia tematy i obsługuje komendy specjalne.
         """
-        # === Odpowiedzi z bazy wiedzy ===
-        basic = get_basic_answer(user_text)
-        if basic and not basic.startswith("Nie znam jeszcze"):
-            response = basic
-        else:
-            # === Generowanie odpowiedzi ===
-            response = grow_network(user_text)
-            response += "\n" + update_synapses(user_text)
-            response += "\n" + generate_personality_response(user_text)
-            
-        # Sprawdź moduły dynamiczne
-        if self.dynamic_manager:
-            for module_name in self.dynamic_manager.list_modules():
-                try:
-                    dynamic_response = self.execute_dynamic_module(module_name, "process", user_text)
-                    if dynamic_response:
-                        response += f"\n[Moduł Dynamiczny {module_name}] {dynamic_response}"
-                except Exception as e:
-                    print(f"[AIEngine] Błąd modułu dynamicznego {module_name}: {e}")
+        started = time.perf_counter()
+        timings = {}
+        # === Klasyfikacja intencji - jeden przebieg po tekście dla wszystkich komend ===
+        utterance = Utterance(user_text)
+        intent = classify_intent(utterance)
+        self.last_intent = intent
 
-        # === Pamięć i emocje ===
-        manage_memory(user_text, response)
-        self.last_emotion = analyze_emotion(user_text)
-        track_reinforcement(user_text, response)
+        # === Etapy: baza wiedzy, sieć, osobowość, moduły, pamięć, emocje, fact-check ===
+        # Powtórzona wiadomość korzysta z zapamiętanej odpowiedzi bazy wiedzy (bez wyszukiwania)
+        cache_key, version, cached = self._cached_stages(utterance)
+        status = {}
+        ctx = self.executor.run(self._build_stages(cached=cached),
+                                {"user_text": user_text, "utterance": utterance, **(cached or {})}, timings, status)
+        if cached is None:
+            self._cache_stages(cache_key, version, ctx, status)
+        # Adnotacje fact-checkingu w tle nie są zapamiętywane - zadanie zgłaszane jest także przy trafieniu
+        self._start_fact_check(user_text)
+        response = ctx["response"]
+        self.last_emotion = ctx["emotion"]
+        self.last_recalled = ctx.get("recalled", [])
 
         # === Tematy kluczowe ===
-        self.last_topics = [w.lower() for w in user_text.split() if len(w) > 3]
+        self.last_topics = list(utterance.topics)
 
         # === Reakcje na komendy ===
         
         # NOWE: OBSŁUGA FUNKCJI TELEFONU - PEŁNY DOSTĘP!
-        phone_keywords = ["zrób zdjęcie", "lokalizacja", "zadzwoń", "sms", "kontakty", "pliki", 
-                         "powiadomienie", "nagraj", "bluetooth", "wifi", "sensory", "bateria", 
-                         "schowek", "pozwól ai", "foto", "camera", "gps", "gdzie jestem",
-                         "wiadomość", "call", "notification", "record", "audio"]
-        
-        if any(keyword in user_text.lower() for keyword in phone_keywords):
+        if intent.matches("phone"):
+            phone_started = time.perf_counter()
             try:
-                phone_result = use_phone_feature(user_text)
+                phone_result = use_phone_feature(user_text, intent)
                 if phone_result:
                     response = phone_result + "\n\n" + response
                     # Loguj użycie telefonu w pamięci
-                    manage_memory(f"[TELEFON] {user_text}", phone_result)
+                    self.remember(f"[TELEFON] {user_text}", phone_result)
             except Exception as e:
                 response = f"❌ Błąd funkcji telefonu: {e}\n\n" + response
-        
+            timings["phone"] = time.perf_counter() - phone_started
+
+        commands_started = time.perf_counter()
+        response = self._apply_commands(user_text, intent, ctx, response)
+        timings["commands"] = time.perf_counter() - commands_started
+        self.latency.record(user_text, time.perf_counter() - started, timings)
+        return response
+
+    async def aprocess_input(self, user_text):
+        """
+        Asynchroniczny odpowiednik process_input dla pętli zdarzeń asyncio.
+        Fact-checking i polecenia Termux są prawdziwymi korutynami, a pozostałe etapy i komendy
+        wykonywane są w puli wątków silnika (zapisy stanu trafiają do kolejki zapisów w tle).
+        """
+        started = time.perf_counter()
+        timings = {}
+        utterance = Utterance(user_text)
+        intent = classify_intent(utterance)
+        self.last_intent = intent
+
+        cache_key, version, cached = await asyncio.to_thread(self._cached_stages, utterance)
+        status = {}
+        ctx = await self.executor.arun(self._build_stages(asynchronous=True, cached=cached),
+                                       {"user_text": user_text, "utterance": utterance, **(cached or {})},
+                                       timings, status)
+        if cached is None:
+            self._cache_stages(cache_key, version, ctx, status)
+        self._start_fact_check(user_text)
+        response = ctx["response"]
+        self.last_emotion = ctx["emotion"]
+        self.last_recalled = ctx.get("recalled", [])
+        self.last_topics = list(utterance.topics)
+
+        if intent.matches("phone"):
+            phone_started = time.perf_counter()
+            try:
+                phone_result = await ause_phone_feature(user_text, intent)
+                if phone_result:
+                    response = phone_result + "\n\n" + response
+                    self.remember(f"[TELEFON] {user_text}", phone_result)
+            except Exception as e:
+                response = f"❌ Błąd funkcji telefonu: {e}\n\n" + response
+            timings["phone"] = time.perf_counter() - phone_started
+
+        commands_started = time.perf_counter()
+        response = await asyncio.to_thread(self._apply_commands, user_text, intent, ctx, response)
+        timings["commands"] = time.perf_counter() - commands_started
+        self.latency.record(user_text, time.perf_counter() - started, timings)
+        return response
+
+    def process_input_stream(self, user_text):
+        """
+        Generator - wariant process_input zwracający fragmenty odpowiedzi, gdy tylko gotowe są
+        odpowiednie etapy. Najpierw odpowiedź z bazy wiedzy (lub sieć, synapsy, osobowość),
+        potem moduły dynamiczne i wyniki komend, a na końcu adnotacje fact-checkingu
+        (w trybie background_fact_check przychodzą one później, przez `on_annotation`).
+        Fragmenty połączone znakiem nowej linii tworzą pełną odpowiedź.
+
+        Yields:
+            str: Kolejny fragment odpowiedzi.
+        """
+        started = time.perf_counter()
+        timings = {}
+        utterance = Utterance(user_text)
+        intent = classify_intent(utterance)
+        self.last_intent = intent
+
+        module_names = self._dynamic_module_names()
+        cache_key, version, cached = self._cached_stages(utterance)
+        stages = self._build_stages(module_names=module_names, cached=cached)
+        ctx = {"user_text": user_text, "utterance": utterance, **(cached or {})}
+        status = {}
+        fragments = None  # kolejność fragmentów znana po zakończeniu etapu "knowledge"
+        emitted = 0
+        commands_done = False
+
+        for stage_name in self.executor.iter_run(stages, ctx, timings, status):
+            if fragments is None and "basic" in ctx:
+                fragments = (["basic"] if _knows_answer(ctx["basic"])
+                             else ["growth", "synapses", "personality", "recalled"])
+                fragments += [f"dynamic:{name}" for name in module_names]
+            # Fragmenty wysyłane są w stałej kolejności, każdy gdy on i poprzednie są gotowe
+            while fragments is not None and emitted < len(fragments) and fragments[emitted] in ctx:
+                key = fragments[emitted]
+                emitted += 1
+                value = ctx[key]
+                if value and key.startswith("dynamic:"):
+                    yield f"[Moduł Dynamiczny {key.split(':', 1)[1]}] {value}"
+                elif value and key == "recalled":
+                    yield _format_recall(value)
+                elif value:
+                    yield value
+
+            if not commands_done and "response" in ctx:
+                commands_done = True
+                self._start_fact_check(user_text)
+                self.last_emotion = ctx.get("emotion", self.last_emotion)
+                self.last_recalled = ctx.get("recalled", [])
+                self.last_topics = list(utterance.topics)
+                if intent.matches("phone"):
+                    phone_started = time.perf_counter()
+                    try:
+                        phone_result = use_phone_feature(user_text, intent)
+                        if phone_result:
+                            yield phone_result
+                            self.remember(f"[TELEFON] {user_text}", phone_result)
+                    except Exception as e:
+                        yield f"❌ Błąd funkcji telefonu: {e}"
+                    timings["phone"] = time.perf_counter() - phone_started
+                commands_started = time.perf_counter()
+                extra = self._apply_commands(user_text, intent, ctx, "", include_fact_check=False).strip()
+                timings["commands"] = time.perf_counter() - commands_started
+                if extra:
+                    yield extra
+
+        self.last_emotion = ctx.get("emotion", self.last_emotion)
+        if cached is None:
+            self._cache_stages(cache_key, version, ctx, status)
+        self.latency.record(user_text, time.perf_counter() - started, timings)
+        fact_check = _format_fact_check(ctx.get("fact_check")).strip()
+        if fact_check:
+            yield fact_check
+
+    def process_batch(self, texts, fact_check: bool = False) -> list:
+        """
+        Przetwarza wiele wiadomości naraz (ewaluacja offline, odtwarzanie logów).
+        Stan (network_map.json, reinforcement.json) wczytywany jest raz, wyszukiwanie w bazie wiedzy
+        i analiza emocji/tematów wykonywane są dla całej partii, a zmiany zapisywane jednym zapisem na końcu.
+        Komendy telefonu i samomodyfikacji nie są wykonywane.
+
+        Args:
+            texts: Wiadomości użytkownika.
+            fact_check (bool): Czy dołączać wyniki fact-checkingu (zapytania sieciowe, domyślnie wyłączone).
+
+        Returns:
+            list: Odpowiedzi w kolejności wiadomości.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        utterances = [Utterance(text) for text in texts]
+        answers = get_basic_answers(utterances)
+        emotions = analyze_emotions(utterances)
+        fact_checks = [None] * len(texts)
+        if fact_check:
+            from fact_checker import fact_check_pipeline
+            fact_checks = self.executor.map(
+                lambda text: None if _is_engine_command(text) else fact_check_pipeline(text), texts, blocking=True)
+
+        # Partia czyta pliki stanu bezpośrednio - najpierw zapisz zmiany odroczone
+        self.writer.flush()
+        map_data = load_network_map()
+        tracker = ReinforcementTracker(autosave=False)
+        module_names = self._dynamic_module_names()
+        responses = []
+        for text, utterance, basic, fc_result in zip(texts, utterances, answers, fact_checks):
+            if _knows_answer(basic):
+                growth = synapses = personality = ""
+                recalled = []
+            else:
+                growth = grow_network(utterance, map_data)
+                synapses = update_synapses(text, map_data)
+                personality = generate_personality_response(utterance)
+                recalled = recall_relevant(utterance, RECALL_TOP_K)
+            dynamic_responses = [self.execute_dynamic_module(name, "process", text) for name in module_names]
+            response = _compose_response(module_names, basic, growth, synapses, personality, recalled,
+                                         *dynamic_responses)
+            response += _format_fact_check(fc_result)
+            track_reinforcement(utterance, response, tracker=tracker)
+            responses.append(response)
+
+        # Jeden zapis każdego pliku stanu dla całej partii
+        save_network_map(map_data)
+        tracker.save()
+        manage_memory_batch(list(zip(texts, responses)))
+
+        self.last_emotion = emotions[-1]
+        self.last_topics = list(utterances[-1].topics)
+        return responses
+
+    def suggest(self, prefix: str, limit: int = 5) -> list:
+        """
+        Podpowiedzi podczas pisania: klucze bazy wiedzy zaczynające się od wpisanego tekstu,
+        najczęściej używane najpierw (drzewo prefiksowe - można wywoływać przy każdym naciśnięciu klawisza).
+        """
+        try:
+            return suggest(prefix, limit)
+        except Exception as e:
+            print(f"[AIEngine] Błąd podpowiedzi: {e}")
+            return []
+
+    def _apply_commands(self, user_text, intent, ctx, response, include_fact_check=True):
+        """
+        Obsługuje samomodyfikację i komendy specjalne, dopisując ich wyniki do odpowiedzi.
+        Wspólne dla process_input, aprocess_input i process_input_stream
+        (strumień dopisuje wynik fact-checkingu osobno, na końcu).
+        """
         # NOWE: OBSŁUGA SAMOMODYFIKACJI - NIEOGRANICZONA!
-        self_mod_keywords = ["modyfikuj kod", "utwórz moduł", "edytuj plik", "dodaj funkcję", 
-                           "usuń kod", "popraw kod", "stwórz nowy", "rozbuduj kod", 
-                           "zmień algorytm", "dodaj feature", "upgrade", "improve"]
-        
-        if any(keyword in user_text.lower() for keyword in self_mod_keywords):
+        if intent.matches("self_mod"):
             try:
                 # Automatyczna samomodyfikacja - AI ma pełną wolność!
-                if "utwórz moduł" in user_text.lower():
+                if intent.matches("self_mod.create_module"):
                     # Wyciągnij nazwę modułu z tekstu
-                    module_name = user_text.lower().replace("utwórz moduł", "").strip()
+                    module_name = intent.lower.replace("utwórz moduł", "").strip()
                     if not module_name:
                         module_name = f"ai_module_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
                     
@@ -181,10 +731,10 @@ if __name__ == "__main__":
                                                   f"Moduł utworzony automatycznie przez AI na żądanie: {user_text}")
                     response = mod_result + "\n\n" + response
                     
-                elif "modyfikuj kod" in user_text.lower() or "edytuj plik" in user_text.lower():
+                elif intent.matches("self_mod.modify"):
                     # Automatyczna modyfikacja istniejących plików
                     target_file = "AIEngine.py"  # Domyślnie modyfikuj siebie
-                    if "plik" in user_text.lower():
+                    if intent.matches("self_mod.file"):
                         # Spróbuj wyciągnąć nazwę pliku
                         words = user_text.split()
                         for i, word in enumerate(words):
@@ -206,7 +756,7 @@ def ai_auto_improvement_{datetime.datetime.now().strftime('%H%M%S')}():
             except Exception as e:
                 response = f"❌ Błąd samomodyfikacji: {e}\n\n" + response
         
-        if user_text.lower().startswith("pobierz z internetu "):
+        if intent.lower.startswith("pobierz z internetu "):
             url = user_text[20:].strip()
             from task_executor import TaskExecutor
             fetcher = TaskExecutor()
@@ -217,8 +767,7 @@ def ai_auto_improvement_{datetime.datetime.now().strftime('%H%M%S')}():
                 with open(filename, "w", encoding="utf-8") as f:
                     f.write(result)
                 try:
-                    with open("ai_memory.txt", "a", encoding="utf-8") as mem:
-                        mem.write(f"\n[INTERNET][{filename}]\n{result[:500]}\n")
+                    conversation_store.append(f"[INTERNET][{filename}]", result[:500], topics=[], source="internet")
                 except Exception:
                     pass
                 try:
@@ -233,7 +782,7 @@ def ai_auto_improvement_{datetime.datetime.now().strftime('%H%M%S')}():
                 pass
             fetcher.run_task_with_wakelock(fetcher.fetch_web_info_async, url, callback=on_finish)
             response += "\n[INTERNET] Zadanie pobierania uruchomione w tle. O wyniku i pliku zostaniesz powiadomiony."
-        elif user_text.lower().startswith("rozbuduj kod ai") or user_text.lower().startswith("modyfikuj kod ai"):
+        elif intent.lower.startswith(("rozbuduj kod ai", "modyfikuj kod ai")):
             # Przykład: AI prosi o zgodę na rozbudowę/modyfikację
             reason = user_text[15:].strip() if len(user_text) > 15 else "Potrzeba rozbudowy funkcji."
             if request_permission_for_code_change(reason):
@@ -263,7 +812,7 @@ def process(input_text):
                         response += "\n[AI] Nie udało się utworzyć modułu dynamicznego."
             else:
                 response += "\n[AI] Zmiana kodu została anulowana przez użytkownika."
-        elif user_text.lower().startswith("utwórz moduł") or user_text.lower().startswith("create module"):
+        elif intent.lower.startswith(("utwórz moduł", "create module")):
             # Parsuj polecenie utworzenia modułu
             parts = user_text.split(" ", 2)
             if len(parts) >= 3:
@@ -306,26 +855,50 @@ def analyze(text):
             else:
                 response += "\n[AI] Nieprawidłowe polecenie. Użyj 'utwórz moduł [nazwa]'."
         else:
-            self._handle_commands(user_text)
+            self._handle_commands(user_text, intent)
 
             # --- FACT-CHECKING HOOK ---
-            fc_result = fact_check_pipeline(user_text)
-            if fc_result["warnings"]:
-                response += "\n\n[UWAGA: Wykryto potencjalne ryzyko dezinformacji!]\n" + "\n".join(fc_result["warnings"])
-            if fc_result["fact_api"].get("claimReview"):
-                response += "\n\n[Fact-check: "
-                for review in fc_result["fact_api"]["claimReview"]:
-                    response += f"Źródło: {review.get('publisher', {}).get('name', '')}, Ocena: {review.get('text', '')}\n"
-                response += "]"
+            if include_fact_check:
+                response += _format_fact_check(ctx["fact_check"])
             # --- END FACT-CHECKING HOOK ---
 
             # --- SYSTEM REQUIREMENTS CHECK ---
-            if user_text.lower().startswith("sprawdź środowisko ai") or user_text.lower().startswith("check ai environment"):
+            if intent.lower.startswith(("sprawdź środowisko ai", "check ai environment")):
                 response += "\n\n[Raport środowiska AI:]\n" + environment_report()
             # --- END SYSTEM REQUIREMENTS CHECK ---
+
+            # --- PERFORMANCE METRICS ---
+            elif intent.lower.startswith(("statystyki wydajności", "performance stats")):
+                response += "\n\n" + self.latency.report()
+                queue = self.writer.get_metrics()
+                response += f"\n💾 Kolejka zapisów: {queue['depth']} oczekujących (max {queue['max_depth']})"
+                cache = self.response_cache.get_metrics()
+                response += (f"\n♻️ Pamięć odpowiedzi: {cache['entries']}/{cache['max_entries']} wpisów, "
+                             f"trafienia {cache['hit_rate']:.0%}")
+            # --- END PERFORMANCE METRICS ---
+
+            # --- RUNTIME LEARNING ---
+            elif intent.lower.startswith(("naucz się:", "learn:")):
+                fact = user_text.split(":", 1)[1]
+                if "=" in fact:
+                    key, answer = (part.strip() for part in fact.split("=", 1))
+                    if key and answer:
+                        added = add_fact(key, answer)
+                        response += f"\n📚 {'Zapamiętałem nowy fakt' if added else 'Zaktualizowałem fakt'}: {key}"
+                    else:
+                        response += "\n📚 Podaj fakt w postaci: naucz się: pytanie = odpowiedź"
+                else:
+                    response += "\n📚 Podaj fakt w postaci: naucz się: pytanie = odpowiedź"
+            elif intent.lower.startswith(("zapomnij:", "forget:")):
+                key = user_text.split(":", 1)[1].strip()
+                if delete_fact(key):
+                    response += f"\n📚 Zapomniałem fakt: {key}"
+                else:
+                    response += f"\n📚 Nie znam faktu: {key}"
+            # --- END RUNTIME LEARNING ---
             
             # --- EXTENSIONS MANAGEMENT ---
-            elif user_text.lower().startswith("zainstaluj rozszerzenie") or user_text.lower().startswith("install extension"):
+            elif intent.lower.startswith(("zainstaluj rozszerzenie", "install extension")):
                 try:
                     from ai_extensions import install_extension, list_extensions
                     
@@ -367,7 +940,7 @@ def info():
                 except ImportError:
                     response += "\n[AI] System rozszerzeń nie jest dostępny w tym środowisku."
             
-            elif user_text.lower().startswith("lista rozszerzeń") or user_text.lower().startswith("list extensions"):
+            elif intent.lower.startswith(("lista rozszerzeń", "list extensions")):
                 try:
                     from ai_extensions import list_extensions
                     extensions = list_extensions()
@@ -383,16 +956,17 @@ def info():
                 except ImportError:
                     response += "\n[AI] System rozszerzeń nie jest dostępny w tym środowisku."
             # --- END EXTENSIONS MANAGEMENT ---
-            return response
+        return response
 
-    def _handle_commands(self, user_text):
+    def _handle_commands(self, user_text, intent=None):
         """
         ROZSZERZONA OBSŁUGA KOMEND - pełna kontrola nad telefonem i kodem!
         """
-        text = user_text.lower()
+        if intent is None:
+            intent = classify_intent(user_text)
 
         # === KOMENDY TELEFONU ===
-        if "telefon status" in text or "phone status" in text:
+        if intent.matches("command.phone_status"):
             try:
                 status = get_phone_status()
                 permissions = status.get('permissions', {})
@@ -401,32 +975,32 @@ def info():
             except Exception as e:
                 return f"❌ Błąd sprawdzania statusu telefonu: {e}"
         
-        if "pełny dostęp telefon" in text or "emergency phone" in text:
+        if intent.matches("command.emergency_phone"):
             return emergency_phone_access()
         
         # === KOMENDY SAMOMODYFIKACJI ===
-        if "pełna samomodyfikacja" in text or "unlimited mode" in text:
+        if intent.matches("command.unlimited_mode"):
             return enable_unlimited_mode()
         
-        if "statystyki modyfikacji" in text or "mod stats" in text:
+        if intent.matches("command.mod_stats"):
             stats = get_modification_stats()
             return f"🔧 Statystyki modyfikacji:\n📊 Łącznie: {stats.get('total_modifications', 0)}\n✅ Udane: {stats.get('successful', 0)}\n❌ Błędne: {stats.get('failed', 0)}\n📁 Plików: {stats.get('files_modified', 0)}"
         
-        if "emergency restore" in text or "przywróć backup" in text:
+        if intent.matches("command.restore"):
             return emergency_restore()
         
         # === STARE KOMENDY ===
-        if "rozwiń logikę" in text:
+        if intent.matches("command.expand_logic"):
             expand_logic(user_text)
 
-        if "rozbuduj sieć" in text:
+        if intent.matches("command.grow_network"):
             generate_new_nodes()
 
-        if "wykonaj zadanie" in text:
+        if intent.matches("command.execute_task"):
             # TODO: Implement task execution logic or use TaskExecutor if needed
             pass
 
-        if "dodaj funkcję" in text:
+        if intent.matches("command.add_function"):
             # NOWA WERSJA: Bezpośrednia modyfikacja bez pytania
             snippet = f"""
 # Funkcja dodana automatycznie przez AI - {datetime.datetime.now().isoformat()}
@@ -155,39 +155,296 @@ BASIC_KNOWLEDGE = {
 
 
 # --- Quantum-inspired advanced indexing and search ---
-import re
-from collections import defaultdict
+import json
+import threading
+import time
 
-# Build an inverted index for fast lookup ("quantum superposition" of keywords)
-_QUANTUM_INDEX = defaultdict(set)
-for k in BASIC_KNOWLEDGE:
-    for word in re.findall(r"\w+", k.lower()):
-        _QUANTUM_INDEX[word].add(k)
+from knowledge_index import KnowledgeIndex
+from knowledge_packs import knowledge_packs
+from prefix_trie import PrefixTrie
+from utterance import as_utterance
 
-def quantum_search(question: str, threshold: float = 0.5) -> str:
+UNKNOWN_ANSWER = "Nie znam jeszcze odpowiedzi na to pytanie, ale chętnie się nauczę lub poszukam informacji!"
+# Number of BM25-ranked candidates checked against the confidence threshold
+SEARCH_TOP_K = 5
+# Append-only journal of facts learned or forgotten at runtime, replayed on import
+KNOWLEDGE_JOURNAL = "knowledge_journal.jsonl"
+# Versioned index snapshot, valid while the checksum of the knowledge keys matches
+INDEX_SNAPSHOT = "knowledge_index.snapshot"
+
+# BM25-ranked inverted index over the knowledge keys ("quantum superposition" of keywords),
+# created on the first query (_get_index) - importing the module does no tokenizing
+_INDEX = None
+# Guards BASIC_KNOWLEDGE and _INDEX against runtime learning from other threads
+_LOCK = threading.RLock()
+# Prefix trie over the knowledge keys for typeahead suggestions (suggest), created on the first call;
+# a key's popularity grows each time quantum_search answers from it
+_TRIE = None
+# Incremented on every runtime change of the knowledge (cached engine responses are keyed on it)
+_VERSION = 0
+
+def _get_index() -> KnowledgeIndex:
+    """
+    Returns the index, creating it on first use: the journal is replayed into BASIC_KNOWLEDGE,
+    then the index is loaded from INDEX_SNAPSHOT or rebuilt (and re-snapshotted) when the knowledge changed.
+    """
+    global _INDEX
+    if _INDEX is None:
+        with _LOCK:
+            if _INDEX is None:
+                replay_journal()
+                _INDEX = KnowledgeIndex.load_or_build(BASIC_KNOWLEDGE, INDEX_SNAPSHOT)
+    return _INDEX
+
+def prepare_index() -> int:
+    """Creates the index and the suggestion trie ahead of the first query (engine warm-up); returns the number of indexed keys."""
+    _get_trie()
+    return len(_get_index())
+
+def _apply_fact(op: str, key: str, answer: str = None) -> bool:
+    """
+    Applies one change to BASIC_KNOWLEDGE and updates the index incrementally (caller holds _LOCK).
+    A key differing only in letter case from an existing one updates that entry.
+    """
+    global _VERSION
+    index = _get_index()
+    existing = key if key in index else None
+    if existing is None:
+        doc_id = index.lookup(key.lower().strip(), fold=False)
+        existing = index.keys[doc_id] if doc_id is not None else None
+    if op == "add":
+        _VERSION += 1
+        if existing is not None:
+            BASIC_KNOWLEDGE[existing] = answer
+            return False
+        BASIC_KNOWLEDGE[key] = answer
+        index.add(key)
+        if _TRIE is not None:
+            _TRIE.set(key)
+        return True
+    if existing is None:
+        return False
+    _VERSION += 1
+    del BASIC_KNOWLEDGE[existing]
+    index.remove(existing)
+    if _TRIE is not None:
+        _TRIE.remove(existing)
+    return True
+
+def knowledge_version() -> int:
+    """Returns a counter that changes whenever a fact is learned, updated or forgotten."""
+    return _VERSION
+
+def _journal(entry: dict) -> None:
+    """Appends one change to the knowledge journal."""
+    try:
+        with open(KNOWLEDGE_JOURNAL, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[KnowledgeBase] Nie można zapisać dziennika wiedzy: {e}")
+
+def add_fact(key: str, answer: str) -> bool:
+    """
+    Teaches a fact at runtime: adds a new key or updates the answer of an existing one.
+    The change is indexed incrementally and appended to the knowledge journal.
+
+    Returns:
+        bool: True if a new key was added, False if an existing answer was updated.
+    """
+    key = key.strip()
+    if not key or not answer:
+        raise ValueError("Fakt wymaga klucza i odpowiedzi")
+    with _LOCK:
+        added = _apply_fact("add", key, answer)
+        _journal({"op": "add", "key": key, "answer": answer, "time": time.strftime("%Y-%m-%d %H:%M:%S")})
+    return added
+
+def delete_fact(key: str) -> bool:
+    """
+    Forgets a fact at runtime (also a built-in one); the deletion is journaled.
+
+    Returns:
+        bool: True if the key existed.
+    """
+    with _LOCK:
+        deleted = _apply_fact("delete", key.strip())
+        if deleted:
+            _journal({"op": "delete", "key": key.strip(), "time": time.strftime("%Y-%m-%d %H:%M:%S")})
+    return deleted
+
+def replay_journal(path: str = None) -> int:
+    """
+    Re-applies the knowledge journal to BASIC_KNOWLEDGE (done once, before the index is created,
+    so the snapshot checksum covers learned facts). Replaying is idempotent; a truncated last line is skipped.
+
+    Returns:
+        int: Number of applied changes.
+    """
+    applied = 0
+    try:
+        with open(path or KNOWLEDGE_JOURNAL, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return 0
+    with _LOCK:
+        if _INDEX is not None:
+            apply = _apply_fact
+        else:
+            # No index yet - only the dictionary changes (keys matched case-insensitively, as in _apply_fact)
+            lowered = {}
+            for existing in BASIC_KNOWLEDGE:
+                lowered.setdefault(existing.lower().strip(), existing)
+
+            def apply(op, key, answer=None):
+                existing = key if key in BASIC_KNOWLEDGE else lowered.get(key.lower().strip())
+                if op == "add":
+                    if existing is None:
+                        lowered.setdefault(key.lower().strip(), key)
+                    BASIC_KNOWLEDGE[existing or key] = answer
+                elif existing is not None:
+                    del BASIC_KNOWLEDGE[existing]
+                    if lowered.get(existing.lower().strip()) == existing:
+                        del lowered[existing.lower().strip()]
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                apply(entry["op"], entry["key"], entry.get("answer"))
+                applied += 1
+            except (ValueError, KeyError):
+                continue
+    return applied
+
+def _get_trie() -> PrefixTrie:
+    """Returns the suggestion trie, building it from the current knowledge keys on first use."""
+    global _TRIE
+    if _TRIE is None:
+        index = _get_index()
+        with _LOCK:
+            if _TRIE is None:
+                trie = PrefixTrie()
+                trie.build({key: 0.0 for key in index.keys if key is not None})
+                _TRIE = trie
+    return _TRIE
+
+def suggest(prefix: str, limit: int = 5) -> list:
+    """
+    Typeahead: returns up to `limit` knowledge keys starting with the typed prefix (case and Polish
+    diacritics ignored), most often answered first. Cheap enough to call on every keystroke.
+    """
+    trie = _get_trie()
+    with _LOCK:
+        return trie.complete(prefix, limit)
+
+def _answer(index: KnowledgeIndex, doc_id: int) -> str:
+    """Returns the answer of a matched key and counts the hit towards its suggestion popularity (caller holds _LOCK)."""
+    key = index.keys[doc_id]
+    if _TRIE is not None:
+        _TRIE.increment(key)
+    return BASIC_KNOWLEDGE[key]
+
+def _semantic_answer(index: KnowledgeIndex, words) -> str:
+    """Second-stage semantic retrieval (LSH over character n-gram embeddings, BM25 re-rank); None on a miss."""
+    with _LOCK:
+        doc_id = index.semantic_match(words)
+        return BASIC_KNOWLEDGE[index.keys[doc_id]] if doc_id is not None else None
+
+def _search_words(index: KnowledgeIndex, words) -> tuple:
+    """
+    Returns (query words, pack-only words): words that are exact knowledge pack terms keep their spelling,
+    the others are corrected against the index vocabulary - otherwise a pack term ("fotonika") would be
+    rewritten into a built-in word ("foton") and the built-in answer would win over the pack.
+    Pack-only words are pack terms unknown to the index.
+    """
+    pack_terms = knowledge_packs.terms(words)
+    with _LOCK:
+        corrected = index.correct(words - pack_terms) | pack_terms
+        pack_only = frozenset(word for word in pack_terms if not index.document_frequency(word))
+    return corrected, pack_only
+
+def _pack_answer(words, pack_only, threshold: float):
+    """
+    Pack full-text search; when it misses and the question has pack-only words, the best pack key
+    containing them answers (the packs' counterpart of the semantic stage, which knows only built-in keys).
+    """
+    answer = knowledge_packs.search(words, threshold, k=SEARCH_TOP_K)
+    if answer is None and pack_only:
+        answer = knowledge_packs.search(pack_only, 0.0, k=SEARCH_TOP_K)
+    return answer
+
+def quantum_search(question, threshold: float = 0.5, semantic: bool = True) -> str:
     """
     Quantum-inspired fuzzy search: finds the best-matching knowledge entry using parallel keyword matching and partial similarity.
-    Simulates quantum superposition by evaluating all possible matches in parallel and returning the most relevant answer.
-    """
-    q = question.lower().strip()
-    words = set(re.findall(r"\w+", q))
-    candidate_keys = set()
-    for w in words:
-        candidate_keys.update(_QUANTUM_INDEX.get(w, set()))
-    # If no direct match, try all keys (quantum full scan)
-    if not candidate_keys:
-        candidate_keys = set(BASIC_KNOWLEDGE.keys())
-    # Score candidates by overlap and similarity
-    def score(key):
-        key_words = set(re.findall(r"\w+", key))
-        overlap = len(words & key_words)
-        jaccard = overlap / (len(words | key_words) or 1)
-        return jaccard + 0.1 * overlap
-    best = max(candidate_keys, key=score, default=None)
-    if best and score(best) >= threshold:
-        return BASIC_KNOWLEDGE[best]
-    return "Nie znam jeszcze odpowiedzi na to pytanie, ale chętnie się nauczę lub poszukam informacji!"
+    A question identical to a key (also typed without Polish diacritics) is answered directly. Otherwise words
+    missing from the index are corrected (diacritic folding, character-trigram typo matching), candidates come only
+    from the posting lists of the question's words and are ranked with BM25 (top-k heap); the best-ranked candidate
+    whose overlap score reaches the threshold and that contains the question's rarest indexed word is returned
+    (a key sharing only common words, e.g. "co to jest energia" for "co to jest splątanie", is not an answer).
+    Installed knowledge packs (knowledge_packs.py) are consulted after BASIC_KNOWLEDGE: an exact pack key
+    before the ranked built-in match, then pack full-text search. Words that are pack terms are not corrected,
+    and a question with words known only to the packs is answered by the packs, never by the semantic stage.
+    When all keyword stages miss and semantic is True (and NumPy is available), a semantic stage finds keys
+    similar in character n-grams (inflections, paraphrases) and re-ranks them with BM25.
+    The question may be a string or a pre-computed Utterance.
+    """
+    utterance = as_utterance(question)
+    index = _get_index()
+    with _LOCK:
+        doc_id = index.lookup(utterance.normalized)
+        if doc_id is not None:
+            return _answer(index, doc_id)
+    answer = knowledge_packs.lookup(utterance.normalized)
+    if answer is not None:
+        return answer
+    words, pack_only = _search_words(index, utterance.word_set)
+    with _LOCK:
+        doc_id = index.best_match(words, threshold, k=SEARCH_TOP_K)
+        if doc_id is not None:
+            return _answer(index, doc_id)
+    answer = _pack_answer(words, pack_only, threshold)
+    if answer is None and semantic and not pack_only:
+        answer = _semantic_answer(index, words)
+    return answer or UNKNOWN_ANSWER
 
 # For compatibility, get_basic_answer now uses quantum_search
-def get_basic_answer(question: str) -> str:
+def get_basic_answer(question) -> str:
     return quantum_search(question)
+
+def get_basic_answers(questions, threshold: float = 0.5, semantic: bool = True) -> list:
+    """
+    Batch lookup: answers a list of questions (strings or Utterances), searching each distinct question only once.
+    Questions not answered by an exact key are ranked together in one pass over the index
+    (a sparse query-by-key matrix product when NumPy is available), for offline evaluation of large question sets.
+    """
+    index = _get_index()
+    answers = {}
+    pending = {}
+    keys = []
+    for q in questions:
+        u = as_utterance(q)
+        keys.append(u.normalized)
+        if u.normalized in answers or u.normalized in pending:
+            continue
+        with _LOCK:
+            doc_id = index.lookup(u.normalized)
+            if doc_id is not None:
+                answers[u.normalized] = BASIC_KNOWLEDGE[index.keys[doc_id]]
+                continue
+        answer = knowledge_packs.lookup(u.normalized)
+        if answer is not None:
+            answers[u.normalized] = answer
+        else:
+            pending[u.normalized] = _search_words(index, u.word_set)
+    unmatched = {}
+    with _LOCK:
+        matches = index.best_matches([words for words, _ in pending.values()], threshold, k=SEARCH_TOP_K)
+        for (normalized, searched), doc_id in zip(pending.items(), matches):
+            if doc_id is not None:
+                answers[normalized] = BASIC_KNOWLEDGE[index.keys[doc_id]]
+            else:
+                unmatched[normalized] = searched
+    for normalized, (words, pack_only) in unmatched.items():
+        answer = _pack_answer(words, pack_only, threshold)
+        if answer is None and semantic and not pack_only:
+            answer = _semantic_answer(index, words)
+        answers[normalized] = answer or UNKNOWN_ANSWER
+    return [answers[key] for key in keys]
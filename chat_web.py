@@ -11,22 +11,28 @@ try:
     request = _flask.request
     render_template_string = _flask.render_template_string
     jsonify = _flask.jsonify
+    Response = _flask.Response
+    stream_with_context = _flask.stream_with_context
 except Exception:
     Flask = None
     request = None
+    Response = None
+    stream_with_context = None
     def render_template_string(*args, **kwargs):
         return "Flask nie jest zainstalowany. Zainstaluj pakiet 'flask' aby uruchomić czat webowy."
     def jsonify(obj):
         import json
         return json.dumps(obj)
+import json
 import threading
 import time
+from collections import deque
 
 # Import AIEngine (przykład — dostosuj do swojej implementacji)
 from AIEngine import AIEngine
 
 app = Flask(__name__) if Flask else None
-ai = AIEngine()
+ai = AIEngine(fast_start=True, background_fact_check=True)
 
 # Prosty status pracy AI (współdzielony między wątkami)
 ai_status = {"stage": "czeka na polecenie", "busy": False}
@@ -43,6 +49,7 @@ HTML = """
         .msg { margin: 0.5em 0; }
         .user { color: #8ecae6; }
         .ai { color: #ffd166; }
+        .fact { color: #ef476f; font-size: 0.9em; }
         #status { margin: 1em 0; font-weight: bold; }
         #spinner { display: none; }
         .spinner { border: 4px solid #444; border-top: 4px solid #ffd166; border-radius: 50%; width: 24px; height: 24px; animation: spin 1s linear infinite; display: inline-block; }
@@ -63,26 +70,67 @@ HTML = """
             n.style.display = 'block';
             setTimeout(function(){ n.style.display = 'none'; }, 4000);
         }
+        function appendMsg(cls, who, text) {
+            var div = document.createElement('div');
+            div.className = 'msg ' + cls;
+            var label = document.createElement('b');
+            label.innerText = who + ': ';
+            var body = document.createElement('span');
+            body.innerText = text;
+            div.appendChild(label);
+            div.appendChild(body);
+            document.getElementById('chatbox').appendChild(div);
+            scrollChat();
+            return body;
+        }
         function sendMsg() {
             var input = document.getElementById('msg');
             var msg = input.value.trim();
             if (!msg) return;
             input.value = '';
             showSpinner(true);
-            fetch('/send', {
+            appendMsg('user', 'USER', msg);
+            var reply = appendMsg('ai', 'AI', '');
+            // Odpowiedź strumieniowana - fragmenty pojawiają się, gdy gotowe są kolejne etapy AI
+            fetch('/send_stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({msg: msg})
             })
-            .then(r => r.json())
-            .then(data => {
-                document.getElementById('chatbox').innerHTML = data.chat_html;
-                document.getElementById('status').innerText = data.status;
-                showSpinner(false);
-                if (data.notify) showNotify(data.notify);
-                scrollChat();
+            .then(r => {
+                var reader = r.body.getReader();
+                var decoder = new TextDecoder();
+                function pump() {
+                    return reader.read().then(function(result) {
+                        if (result.done) {
+                            showSpinner(false);
+                            return;
+                        }
+                        reply.innerText += decoder.decode(result.value, {stream: true});
+                        scrollChat();
+                        return pump();
+                    });
+                }
+                return pump();
             });
         }
+        var suggestTimer = null;
+        function suggestMsg() {
+            // Podpowiedzi z bazy wiedzy podczas pisania (lista <datalist> pod polem wiadomości)
+            clearTimeout(suggestTimer);
+            suggestTimer = setTimeout(function() {
+                var text = document.getElementById('msg').value;
+                fetch('/suggest?limit=5&q=' + encodeURIComponent(text)).then(r => r.json()).then(data => {
+                    var list = document.getElementById('suggestions');
+                    list.innerHTML = '';
+                    data.suggestions.forEach(function(s) {
+                        var option = document.createElement('option');
+                        option.value = s;
+                        list.appendChild(option);
+                    });
+                });
+            }, 50);
+        }
         function pollStatus() {
             fetch('/status').then(r => r.json()).then(data => {
                 document.getElementById('status').innerText = data.status;
@@ -90,7 +138,15 @@ HTML = """
             });
             setTimeout(pollStatus, 2000);
         }
-        window.onload = function() { scrollChat(); pollStatus(); }
+        function listenAnnotations() {
+            // Spóźnione adnotacje fact-checkingu wysyłane przez serwer (Server-Sent Events)
+            var events = new EventSource('/annotations');
+            events.onmessage = function(e) {
+                var data = JSON.parse(e.data);
+                appendMsg('fact', 'FACT-CHECK', data.text);
+            };
+        }
+        window.onload = function() { scrollChat(); pollStatus(); listenAnnotations(); }
     </script>
 </head>
 <body>
@@ -100,7 +156,8 @@ HTML = """
     <div id="spinner"><span class="spinner"></span> AI pracuje...</div>
     <div id="notify"></div>
     <form onsubmit="sendMsg(); return false;">
-        <input id="msg" type="text" autocomplete="off" placeholder="Wpisz wiadomość..." style="width:80%;">
+        <input id="msg" type="text" autocomplete="off" list="suggestions" oninput="suggestMsg()" placeholder="Wpisz wiadomość..." style="width:80%;">
+        <datalist id="suggestions"></datalist>
         <button type="submit">Wyślij</button>
     </form>
 </body>
@@ -110,6 +167,26 @@ HTML = """
 # Prosta historia czatu (w RAM, można rozbudować o plik/DB)
 chat_history = []
 
+# Spóźnione adnotacje fact-checkingu - dopisywane do historii i wysyłane do przeglądarek.
+# Bufor ostatnich MAX_ANNOTATIONS par (numer, tekst); numery rosną monotonicznie, więc klient
+# wznawia strumień od ostatniego otrzymanego numeru (najstarsze adnotacje mogą już wypaść z bufora)
+MAX_ANNOTATIONS = 100
+annotations = deque(maxlen=MAX_ANNOTATIONS)
+annotation_seq = 0
+annotations_changed = threading.Condition()
+
+def on_annotation(job_id, user_text, annotation):
+    """Odbiera adnotację fact-checkingu z wątku tła AIEngine."""
+    global annotation_seq
+    text = f"„{user_text[:40]}”: {annotation}"
+    chat_history.append(('fact-check', text))
+    with annotations_changed:
+        annotation_seq += 1
+        annotations.append((annotation_seq, text))
+        annotations_changed.notify_all()
+
+ai.on_annotation(on_annotation)
+
 if app:
     @app.route('/', methods=['GET'])
     def index():
@@ -118,7 +195,7 @@ if app:
 def render_chat():
     html = ''
     for who, msg in chat_history:
-        cls = 'user' if who == 'user' else 'ai'
+        cls = {'user': 'user', 'fact-check': 'fact'}.get(who, 'ai')
         html += f'<div class="msg {cls}"><b>{who.upper()}:</b> {msg}</div>'
     return html
 
@@ -160,6 +237,76 @@ if app:
             'notify': notify
         })
 
+if app:
+    @app.route('/send_stream', methods=['POST'])
+    def send_stream():
+        """Strumieniuje odpowiedź AI fragmentami (chunked text/plain)."""
+        data = request.get_json()
+        user_msg = data.get('msg', '')
+        chat_history.append(('user', user_msg))
+        chat_history.append(('ai', ''))
+        index = len(chat_history) - 1
+
+        def generate():
+            ai_status["stage"] = "AI analizuje dane..."
+            ai_status["busy"] = True
+            reply = ""
+            try:
+                for fragment in ai.process_input_stream(user_msg):
+                    chunk = fragment if not reply else "\n" + fragment
+                    reply += chunk
+                    chat_history[index] = ('ai', reply)
+                    yield chunk
+                ai_status["stage"] = "czeka na polecenie"
+            except Exception as e:
+                chunk = f"[Błąd AI] {e}"
+                chat_history[index] = ('ai', reply + chunk)
+                ai_status["stage"] = "Błąd AI"
+                yield chunk
+            finally:
+                ai_status["busy"] = False
+
+        return Response(stream_with_context(generate()), mimetype='text/plain')
+
+if app:
+    @app.route('/annotations', methods=['GET'])
+    def annotation_events():
+        """
+        Strumień Server-Sent Events z adnotacjami fact-checkingu, które pojawią się po podłączeniu.
+        Każde zdarzenie ma numer adnotacji (id) - przeglądarka po ponownym połączeniu wysyła go
+        w nagłówku Last-Event-ID i dostaje tylko nowsze adnotacje.
+        """
+        try:
+            resume = int(request.headers.get('Last-Event-ID', ''))
+        except ValueError:
+            resume = None
+
+        def generate():
+            with annotations_changed:
+                sent = annotation_seq if resume is None else min(resume, annotation_seq)
+            while True:
+                with annotations_changed:
+                    annotations_changed.wait_for(lambda: annotation_seq > sent, timeout=15)
+                    new = [(seq, text) for seq, text in annotations if seq > sent]
+                    sent = annotation_seq
+                if not new:
+                    yield ": ping\n\n"  # podtrzymanie połączenia
+                for seq, text in new:
+                    yield f"id: {seq}\ndata: {json.dumps({'text': text})}\n\n"
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+if app:
+    @app.route('/suggest', methods=['GET'])
+    def suggest():
+        """Podpowiedzi dla wpisywanego tekstu: /suggest?q=<prefiks>&limit=<n>."""
+        prefix = request.args.get('q', '')
+        try:
+            limit = max(1, min(int(request.args.get('limit', 5)), 10))
+        except ValueError:
+            limit = 5
+        return jsonify({'suggestions': ai.suggest(prefix, limit)})
+
 if app:
     @app.route('/status', methods=['GET'])
     def status():
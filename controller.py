@@ -11,10 +11,10 @@ from expansion import expand_modules
 from reinforcement_tracker import ReinforcementTracker
 from task_executor import TaskExecutor
 from self_updater import SelfUpdater
+from conversation_store import conversation_store
 
 # Ścieżki do plików konfiguracji i pamięci
 REINF_PATH = "reinforcement.json"
-MEM_PATH = "memory.json"
 CONN_PATH = "connections.json"
 
 # Progi decyzyjne
@@ -37,20 +37,16 @@ def save_json(path: str, data: Any):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 def update_memory(user_input: str, assistant_response: str, topics: List[str], importance: int = 1) -> int:
-    """Aktualizuje pamięć AI o nową interakcję."""
-    mem = load_json(MEM_PATH)
-    entry = {
+    """Aktualizuje pamięć AI o nową interakcję (dopisanie do magazynu rozmów). Zwraca liczbę zapisanych interakcji."""
+    conversation_store.append_many([{
         "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
         "user": user_input,
         "assistant": assistant_response,
         "topics": topics,
-        "importance": importance
-    }
-    mem["history"].append(entry)
-    if len(mem["history"]) > mem.get("max_entries", 200):
-        mem["history"].pop(0)
-    save_json(MEM_PATH, mem)
-    return len(mem["history"])
+        "importance": importance,
+        "source": "controller",
+    }])
+    return conversation_store.count()
 
 def update_connections(topics: List[str]):
     """Aktualizuje mapę połączeń tematycznych na podstawie interakcji."""
@@ -0,0 +1,266 @@
+"""
+conversation_archive.py
+-----------------------
+Archiwum starszych wymian magazynu rozmów: segmenty JSONL skompresowane lzma (.jsonl.xz),
+każdy z małym indeksem w pliku segments.json (zakres id i czasu, liczba wymian, rozmiar,
+najwyższa ważność i liczności tematów). Indeks pozwala pominąć segment bez rozpakowywania,
+a odczyt segmentu jest strumieniowy (linia po linii).
+Polityka przechowywania (`RetentionPolicy`) ogranicza wiek i łączny rozmiar archiwum:
+wygasły segment jest zagęszczany do wymian o wysokiej ważności, a po przekroczeniu rozmiaru
+zagęszczane, a w ostateczności usuwane są najstarsze segmenty.
+"""
+
+import datetime
+import json
+import lzma
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+ARCHIVE_MANIFEST = "segments.json"
+ARCHIVE_VERSION = 1
+SEGMENT_SUFFIX = ".jsonl.xz"
+# Poziom kompresji lzma (0-9): 6 to domyślny kompromis szybkości i rozmiaru
+SEGMENT_PRESET = 6
+# Domyślna polityka przechowywania: wiek segmentu, łączny rozmiar archiwum, ważność chroniąca przed wygaśnięciem
+RETENTION_MAX_AGE_DAYS = 365
+RETENTION_MAX_BYTES = 64 * 1024 * 1024
+RETENTION_KEEP_IMPORTANCE = 3
+
+
+def _timestamp_before(days: float) -> str:
+    """Chwila sprzed `days` dni w formacie pola "timestamp" (ISO 8601, UTC)."""
+    return (datetime.datetime.utcnow() - datetime.timedelta(days=days)).isoformat() + "Z"
+
+
+class RetentionPolicy:
+    """
+    Zasady przechowywania archiwum rozmów.
+    """
+    def __init__(self, max_age_days: Optional[float] = RETENTION_MAX_AGE_DAYS,
+                 max_bytes: Optional[int] = RETENTION_MAX_BYTES,
+                 keep_importance: Optional[int] = RETENTION_KEEP_IMPORTANCE) -> None:
+        """
+        Args:
+            max_age_days (Optional[float]): Segment, którego najnowsza wymiana jest starsza, wygasa
+                (None = bez limitu wieku).
+            max_bytes (Optional[int]): Limit łącznego rozmiaru segmentów w bajtach (None = bez limitu).
+            keep_importance (Optional[int]): Wymiany o co najmniej takiej ważności przetrwają wygaśnięcie
+                segmentu (zagęszczenie); None = wygasły segment jest usuwany w całości.
+        """
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.keep_importance = keep_importance
+
+
+class ConversationArchive:
+    """
+    Katalog skompresowanych segmentów wymian z indeksem segments.json.
+    Wymiany w segmentach mają postać słowników `ConversationStore.exchanges` (z "id" i "topics").
+    """
+    def __init__(self, directory: str, policy: Optional[RetentionPolicy] = None) -> None:
+        """
+        Args:
+            directory (str): Katalog segmentów (tworzony przy pierwszym zapisie).
+            policy (Optional[RetentionPolicy]): Polityka przechowywania (domyślnie `RetentionPolicy()`).
+        """
+        self.directory = directory
+        self.policy = policy or RetentionPolicy()
+        self._lock = threading.RLock()
+        self._segments: List[Dict[str, Any]] = self._load_manifest()
+
+    def _load_manifest(self) -> List[Dict[str, Any]]:
+        """Wczytuje indeks segmentów, pomijając wpisy bez pliku segmentu."""
+        try:
+            with open(os.path.join(self.directory, ARCHIVE_MANIFEST), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if data.get("version") != ARCHIVE_VERSION:
+            print(f"[Archive] Nieobsługiwana wersja indeksu segmentów: {data.get('version')}")
+            return []
+        return [entry for entry in data.get("segments", [])
+                if os.path.exists(os.path.join(self.directory, entry["file"]))]
+
+    def _save_manifest(self) -> None:
+        """Zapisuje indeks segmentów atomowo (plik tymczasowy + os.replace)."""
+        path = os.path.join(self.directory, ARCHIVE_MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": ARCHIVE_VERSION, "segments": self._segments}, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    # --- metryki ---
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Kopia indeksu segmentów od najstarszego (bez liczności tematów)."""
+        with self._lock:
+            return [{name: value for name, value in entry.items() if name != "topics"} for entry in self._segments]
+
+    def count(self) -> int:
+        """Liczba zarchiwizowanych wymian."""
+        with self._lock:
+            return sum(entry["count"] for entry in self._segments)
+
+    def last_id(self) -> int:
+        """Id najnowszej zarchiwizowanej wymiany (0 dla pustego archiwum)."""
+        with self._lock:
+            return self._segments[-1]["last_id"] if self._segments else 0
+
+    def size_bytes(self) -> int:
+        """Łączny rozmiar segmentów na dysku."""
+        with self._lock:
+            return sum(entry["bytes"] for entry in self._segments)
+
+    # --- zapis ---
+
+    def _write(self, name: str, exchanges: List[Dict[str, Any]], compacted: bool = False) -> Dict[str, Any]:
+        """Zapisuje wymiany do pliku segmentu (atomowo) i zwraca jego wpis indeksu."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with lzma.open(path + ".tmp", "wt", encoding="utf-8", preset=SEGMENT_PRESET) as f:
+            for exchange in exchanges:
+                f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+        os.replace(path + ".tmp", path)
+        topics = Counter(topic for exchange in exchanges for topic in exchange.get("topics", []))
+        return {
+            "file": name,
+            "first_id": exchanges[0]["id"],
+            "last_id": exchanges[-1]["id"],
+            "first_timestamp": min(exchange["timestamp"] for exchange in exchanges),
+            "last_timestamp": max(exchange["timestamp"] for exchange in exchanges),
+            "count": len(exchanges),
+            "bytes": os.path.getsize(path),
+            "max_importance": max(exchange.get("importance", 1) for exchange in exchanges),
+            "compacted": compacted,
+            "topics": dict(topics),
+        }
+
+    def append_segment(self, exchanges: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Zapisuje nowy segment z wymian (rosnące id, nowsze niż dotychczasowe archiwum).
+        Indeks zapisywany jest po pliku segmentu, więc przerwany zapis nie zostawia wpisu bez danych.
+        """
+        if not exchanges:
+            return None
+        with self._lock:
+            if exchanges[0]["id"] <= self.last_id():
+                raise ValueError("Segment musi zawierać wymiany nowsze niż archiwum")
+            name = f"segment-{exchanges[0]['id']:010d}-{exchanges[-1]['id']:010d}{SEGMENT_SUFFIX}"
+            entry = self._write(name, exchanges)
+            self._segments.append(entry)
+            self._save_manifest()
+            return {name: value for name, value in entry.items() if name != "topics"}
+
+    # --- odczyt ---
+
+    def _read(self, entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Czyta wymiany segmentu strumieniowo; segment usunięty w międzyczasie (retencja) jest pomijany."""
+        try:
+            with lzma.open(os.path.join(self.directory, entry["file"]), "rt", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def exchanges(self, after_id: int = 0, before_id: Optional[int] = None, since: Optional[str] = None,
+                  topic: Optional[str] = None, newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Przegląda zarchiwizowane wymiany z filtrami jak `ConversationStore.exchanges`.
+        Segmenty wykluczone przez indeks (zakres id, czas, tematy) nie są otwierane.
+        Przy newest_first segment wczytywany jest w całości (segmenty mają ograniczony rozmiar).
+        """
+        with self._lock:
+            candidates = [entry for entry in self._segments
+                          if entry["last_id"] > after_id
+                          and (before_id is None or entry["first_id"] < before_id)
+                          and (since is None or entry["last_timestamp"] >= since)
+                          and (topic is None or topic in entry["topics"])]
+        if newest_first:
+            candidates.reverse()
+        for entry in candidates:
+            exchanges = self._read(entry)
+            if newest_first:
+                exchanges = reversed(list(exchanges))
+            for exchange in exchanges:
+                if exchange["id"] <= after_id or (before_id is not None and exchange["id"] >= before_id):
+                    continue
+                if since is not None and exchange["timestamp"] < since:
+                    continue
+                if topic is not None and topic not in exchange.get("topics", []):
+                    continue
+                yield exchange
+
+    def topic_counts(self, after_id: int = 0) -> Counter:
+        """
+        Liczności tematów wymian o id większym niż `after_id`: całe segmenty z indeksu,
+        a segment przecięty granicą - przez odczyt wymian.
+        """
+        with self._lock:
+            entries = [entry for entry in self._segments if entry["last_id"] > after_id]
+        counts: Counter = Counter()
+        for entry in entries:
+            if entry["first_id"] > after_id:
+                counts.update(entry["topics"])
+            else:
+                for exchange in self._read(entry):
+                    if exchange["id"] > after_id:
+                        counts.update(dict.fromkeys(exchange.get("topics", []), 1))
+        return counts
+
+    # --- przechowywanie ---
+
+    def _remove(self, entry: Dict[str, Any]) -> None:
+        """Usuwa segment z indeksu i z dysku (wywoływane pod blokadą)."""
+        self._segments.remove(entry)
+        try:
+            os.remove(os.path.join(self.directory, entry["file"]))
+        except FileNotFoundError:
+            pass
+
+    def _compact(self, entry: Dict[str, Any]) -> None:
+        """Zagęszcza segment do wymian o ważności co najmniej keep_importance (lub usuwa go, gdy nie ma takich)."""
+        keep = self.policy.keep_importance
+        kept = [] if keep is None or entry["max_importance"] < keep else \
+            [exchange for exchange in self._read(entry) if exchange.get("importance", 1) >= keep]
+        if not kept:
+            self._remove(entry)
+            return
+        self._segments[self._segments.index(entry)] = self._write(entry["file"], kept, compacted=True)
+
+    def apply_retention(self) -> Dict[str, int]:
+        """
+        Stosuje politykę przechowywania: segmenty starsze niż max_age_days są zagęszczane,
+        a gdy archiwum przekracza max_bytes - zagęszczane są kolejne najstarsze segmenty, a gdy to nie wystarczy,
+        usuwane są najstarsze segmenty zagęszczone.
+
+        Returns:
+            Dict[str, int]: {"compacted": zagęszczone segmenty, "dropped": usunięte segmenty, "exchanges": usunięte wymiany}.
+        """
+        policy = self.policy
+        with self._lock:
+            segments_before = len(self._segments)
+            exchanges_before = self.count()
+            compacted = 0
+            if policy.max_age_days is not None:
+                cutoff = _timestamp_before(policy.max_age_days)
+                for entry in [entry for entry in self._segments
+                              if not entry["compacted"] and entry["last_timestamp"] < cutoff]:
+                    self._compact(entry)
+                    compacted += 1
+            if policy.max_bytes is not None:
+                # Najpierw zagęszczanie od najstarszych (ważne wymiany przetrwają), potem usuwanie najstarszych
+                while self._segments and self.size_bytes() > policy.max_bytes:
+                    full = [entry for entry in self._segments if not entry["compacted"]]
+                    if full:
+                        self._compact(full[0])
+                        compacted += 1
+                    else:
+                        self._remove(self._segments[0])
+            result = {"compacted": compacted, "dropped": 0, "exchanges": exchanges_before - self.count()}
+            if result["exchanges"] or compacted:
+                result["dropped"] = segments_before - len(self._segments)
+                self._save_manifest()
+                print(f"[Archive] Retencja: zagęszczono {compacted} segmentów, usunięto {result['dropped']} "
+                      f"segmentów i {result['exchanges']} wymian")
+            return result
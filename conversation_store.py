@@ -0,0 +1,514 @@
+"""
+conversation_store.py
+---------------------
+Jeden magazyn rozmów AI w osadzonej bazie SQLite (tryb WAL) zamiast trzech formatów:
+ai_memory.txt (dopisywany tekst), memory.json (przepisywana lista z limitem) i conversation_history.json.
+Zapisy są dopisywaniem wierszy w transakcjach obejmujących całą partię, a odczyty - zapytaniami
+po indeksach (czas, temat, kolejny numer wymiany). Przy pierwszym otwarciu dotychczasowe pliki
+są jednorazowo importowane (pliki zostają na dysku, nie są już zapisywane).
+Indeks pełnotekstowy FTS5 nad wymianami (aktualizowany wyzwalaczami przy każdym zapisie) pozwala
+przywołać wymiany najbardziej podobne do bieżącej wiadomości (`search`, ranking BM25); bez FTS5
+w SQLite ranking liczony jest z liczby wspólnych tematów po indeksie tematów.
+Baza trzyma tylko gorący ogon historii (HOT_EXCHANGES najnowszych wymian): starsze wymiany
+przenoszone są partiami do skompresowanych segmentów archiwum (conversation_archive.py)
+z polityką przechowywania. `exchanges`, `count` i `topic_counts` obejmują archiwum
+przezroczyście, a `search` - gorący ogon.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from conversation_archive import ConversationArchive, RetentionPolicy
+
+CONVERSATION_DB = "conversations.db"
+# Katalog segmentów archiwum (obok pliku bazy)
+ARCHIVE_DIR = "conversation_segments"
+# Najnowsze wymiany trzymane w bazie; gdy nadmiar osiągnie SEGMENT_EXCHANGES, najstarsze trafiają do segmentu
+HOT_EXCHANGES = 5000
+SEGMENT_EXCHANGES = 2000
+# Pliki importowane przy pierwszym otwarciu magazynu
+LEGACY_MEMORY_TXT = "ai_memory.txt"
+LEGACY_MEMORY_JSON = "memory.json"
+LEGACY_HISTORY_JSON = "conversation_history.json"
+SCHEMA_VERSION = 2
+# Wymiany czytane z bazy jedną porcją przy przeglądaniu historii
+FETCH_BATCH = 512
+# Słowa zapytania dłuższe niż SEARCH_PREFIX_LENGTH znaków dopasowywane są prefiksem bez ostatnich
+# SEARCH_SUFFIX_LENGTH znaków ("kwantowej" -> "kwanto*"), co w przybliżeniu obejmuje polskie odmiany;
+# indeks FTS5 ma osobny indeks prefiksów najkrótszej długości
+SEARCH_PREFIX_LENGTH = 6
+SEARCH_SUFFIX_LENGTH = 3
+# Waga BM25 wiadomości użytkownika względem odpowiedzi AI
+SEARCH_USER_WEIGHT = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    user TEXT NOT NULL,
+    assistant TEXT NOT NULL,
+    importance INTEGER NOT NULL DEFAULT 1,
+    source TEXT NOT NULL DEFAULT 'chat'
+);
+CREATE TABLE IF NOT EXISTS exchange_topics (
+    exchange_id INTEGER NOT NULL REFERENCES exchanges(id),
+    topic TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exchanges_timestamp ON exchanges(timestamp);
+CREATE INDEX IF NOT EXISTS exchange_topics_topic ON exchange_topics(topic, exchange_id);
+CREATE INDEX IF NOT EXISTS exchange_topics_exchange ON exchange_topics(exchange_id);
+"""
+
+# Indeks pełnotekstowy z treścią w tabeli exchanges, utrzymywany wyzwalaczami
+_FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE exchanges_fts USING fts5(
+    user, assistant, content='exchanges', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='{SEARCH_PREFIX_LENGTH}'
+);
+CREATE TRIGGER exchanges_fts_insert AFTER INSERT ON exchanges BEGIN
+    INSERT INTO exchanges_fts (rowid, user, assistant) VALUES (new.id, new.user, new.assistant);
+END;
+CREATE TRIGGER exchanges_fts_delete AFTER DELETE ON exchanges BEGIN
+    INSERT INTO exchanges_fts (exchanges_fts, rowid, user, assistant)
+    VALUES ('delete', old.id, old.user, old.assistant);
+END;
+INSERT INTO exchanges_fts (exchanges_fts) VALUES ('rebuild');
+"""
+
+
+def _now() -> str:
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+def search_terms(text) -> List[str]:
+    """
+    Słowa zapytania do wyszukiwania wymian: słowa tekstu (lub Utterance) dłuższe niż 3 znaki, bez powtórzeń.
+    """
+    from utterance import as_utterance, MIN_TOPIC_LENGTH
+    return list(dict.fromkeys(word for word in as_utterance(text).words if len(word) >= MIN_TOPIC_LENGTH))
+
+
+def _fts_query(terms: Sequence[str]) -> str:
+    """Zapytanie FTS5: dowolne ze słów, dłuższe słowa jako prefiks bez końcówki."""
+    parts = []
+    for term in terms:
+        if len(term) > SEARCH_PREFIX_LENGTH:
+            parts.append(f'"{term[:max(SEARCH_PREFIX_LENGTH, len(term) - SEARCH_SUFFIX_LENGTH)]}"*')
+        else:
+            parts.append(f'"{term}"')
+    return " OR ".join(parts)
+
+
+def default_topics(user_text) -> List[str]:
+    """Tematy wymiany bez jawnie podanych tematów: słowa wiadomości dłuższe niż 3 znaki (jak w Utterance.topics)."""
+    from utterance import as_utterance
+    return list(dict.fromkeys(as_utterance(user_text).topics))
+
+
+class ConversationStore:
+    """
+    Magazyn wymian (wiadomość użytkownika, odpowiedź AI, tematy, ważność) w SQLite.
+    Połączenie otwierane jest przy pierwszym użyciu i współdzielone przez wątki (pod blokadą).
+    """
+    def __init__(self, path: str = CONVERSATION_DB, migrate: bool = True, hot_limit: int = HOT_EXCHANGES,
+                 segment_size: int = SEGMENT_EXCHANGES, retention: Optional[RetentionPolicy] = None) -> None:
+        """
+        Args:
+            path (str): Ścieżka pliku bazy.
+            migrate (bool): Czy przy pierwszym otwarciu zaimportować ai_memory.txt, memory.json
+                i conversation_history.json z katalogu bazy.
+            hot_limit (int): Liczba najnowszych wymian pozostających w bazie (co najmniej 1).
+            segment_size (int): Liczba wymian w jednym segmencie archiwum.
+            retention (Optional[RetentionPolicy]): Polityka przechowywania archiwum (domyślnie `RetentionPolicy()`).
+        """
+        self.path = path
+        self.migrate = migrate
+        self.hot_limit = max(1, hot_limit)
+        self.segment_size = max(1, segment_size)
+        self.retention = retention
+        self.archive: Optional[ConversationArchive] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._hot_count = 0
+        self.full_text = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Otwiera bazę (WAL, schemat, indeks FTS5, archiwum, migracja) przy pierwszym użyciu; wywoływane pod blokadą."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # W trybie WAL synchronous=NORMAL zachowuje spójność bazy przy awarii, bez fsync każdej transakcji
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.executescript(_SCHEMA)
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            self.full_text = self._ensure_full_text(conn)
+            self.archive = ConversationArchive(
+                os.path.join(os.path.dirname(os.path.abspath(self.path)), ARCHIVE_DIR), self.retention)
+            # Przeniesienie do archiwum przerwane przed usunięciem wierszy z bazy - usuń duplikaty
+            archived = self.archive.last_id()
+            if archived:
+                with conn:
+                    conn.execute("DELETE FROM exchange_topics WHERE exchange_id <= ?", (archived,))
+                    conn.execute("DELETE FROM exchanges WHERE id <= ?", (archived,))
+            self._hot_count = conn.execute("SELECT COUNT(*) FROM exchanges").fetchone()[0]
+            self._conn = conn
+            if self.migrate:
+                self._migrate_legacy_files()
+        return self._conn
+
+    @staticmethod
+    def _ensure_full_text(conn: sqlite3.Connection) -> bool:
+        """
+        Tworzy indeks FTS5 (i indeksuje istniejące wymiany), jeśli go nie ma.
+        Zwraca False, gdy SQLite nie obsługuje FTS5 - wtedy `search` korzysta z indeksu tematów.
+        """
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'exchanges_fts'").fetchone():
+            return True
+        try:
+            with conn:
+                conn.executescript(_FTS_SCHEMA)
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"[ConversationStore] Indeks pełnotekstowy niedostępny ({e}) - wyszukiwanie po tematach")
+            return False
+
+    def prepare(self) -> bool:
+        """Otwiera bazę zawczasu (migracja, indeks pełnotekstowy). Zwraca True, gdy dostępny jest FTS5."""
+        with self._lock:
+            self._connection()
+            return self.full_text
+
+    def close(self) -> None:
+        """Zamyka połączenie (kolejne użycie otworzy je ponownie)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- zapis ---
+
+    def append_many(self, exchanges: Iterable[Dict[str, Any]]) -> int:
+        """
+        Dopisuje wymiany jedną transakcją.
+
+        Args:
+            exchanges: Słowniki z kluczami "user", "assistant" oraz opcjonalnie "topics"
+                (domyślnie słowa wiadomości dłuższe niż 3 znaki), "importance", "timestamp", "source".
+
+        Returns:
+            int: Id ostatniej dopisanej wymiany (0, gdy nic nie dopisano).
+        """
+        rows = []
+        for exchange in exchanges:
+            user = exchange.get("user", "")
+            topics = exchange.get("topics")
+            rows.append((
+                exchange.get("timestamp") or _now(), user, exchange.get("assistant", ""),
+                int(exchange.get("importance", 1)), exchange.get("source", "chat"),
+                default_topics(user) if topics is None else list(topics),
+            ))
+        if not rows:
+            return 0
+        last_id = 0
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for timestamp, user, assistant, importance, source, topics in rows:
+                    last_id = conn.execute(
+                        "INSERT INTO exchanges (timestamp, user, assistant, importance, source) VALUES (?, ?, ?, ?, ?)",
+                        (timestamp, user, assistant, importance, source)).lastrowid
+                    conn.executemany("INSERT INTO exchange_topics VALUES (?, ?)",
+                                     [(last_id, topic) for topic in dict.fromkeys(topics)])
+            self._hot_count += len(rows)
+            if self._hot_count >= self.hot_limit + self.segment_size:
+                self.rotate()
+        return last_id
+
+    def rotate(self) -> int:
+        """
+        Przenosi najstarsze wymiany ponad hot_limit do segmentów archiwum (po segment_size w segmencie)
+        i stosuje politykę przechowywania. Zwraca liczbę przeniesionych wymian.
+        """
+        moved = 0
+        with self._lock:
+            conn = self._connection()
+            while self._hot_count >= self.hot_limit + self.segment_size:
+                batch = self._hot_page(0, None, None, None, self.segment_size, False)
+                if not batch:
+                    break
+                # Najpierw segment i jego indeks, potem usunięcie z bazy (duplikaty usuwa `_connection`)
+                self.archive.append_segment(batch)
+                with conn:
+                    conn.execute("DELETE FROM exchange_topics WHERE exchange_id <= ?", (batch[-1]["id"],))
+                    conn.execute("DELETE FROM exchanges WHERE id <= ?", (batch[-1]["id"],))
+                self._hot_count -= len(batch)
+                moved += len(batch)
+            if moved:
+                print(f"[ConversationStore] Przeniesiono {moved} wymian do archiwum")
+                self.archive.apply_retention()
+        return moved
+
+    def append(self, user: str, assistant: str, topics: Optional[Sequence[str]] = None,
+               importance: int = 1, source: str = "chat") -> int:
+        """Dopisuje jedną wymianę; zwraca jej id."""
+        return self.append_many([{"user": user, "assistant": assistant, "topics": topics,
+                                  "importance": importance, "source": source}])
+
+    # --- odczyt ---
+
+    def count(self) -> int:
+        """Liczba zapisanych wymian (w bazie i w archiwum)."""
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM exchanges").fetchone()[0] + self.archive.count()
+
+    def last_id(self) -> int:
+        """Id najnowszej wymiany (0 dla pustego magazynu)."""
+        with self._lock:
+            hot = self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM exchanges").fetchone()[0]
+            return max(hot, self.archive.last_id())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Zwraca liczbę wymian w bazie i w archiwum, liczbę segmentów i rozmiar archiwum."""
+        with self._lock:
+            self._connection()
+            return {
+                "hot_exchanges": self._hot_count,
+                "archived_exchanges": self.archive.count(),
+                "segments": len(self.archive.segments()),
+                "archive_bytes": self.archive.size_bytes(),
+                "full_text": self.full_text,
+            }
+
+    def _hot_page(self, after_id: int, before_id: Optional[int], since: Optional[str], topic: Optional[str],
+                  limit: int, newest_first: bool) -> List[Dict[str, Any]]:
+        """Jedna porcja wymian z bazy (gorącego ogona) z tematami, filtrowana po indeksach."""
+        where, params = ["e.id > ?"], [after_id]
+        if before_id is not None:
+            where.append("e.id < ?")
+            params.append(before_id)
+        if since is not None:
+            where.append("e.timestamp >= ?")
+            params.append(since)
+        if topic is not None:
+            where.append("e.id IN (SELECT exchange_id FROM exchange_topics WHERE topic = ?)")
+            params.append(topic)
+        order = "DESC" if newest_first else "ASC"
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT e.id, e.timestamp, e.user, e.assistant, e.importance, e.source FROM exchanges e "
+                f"WHERE {' AND '.join(where)} ORDER BY e.id {order} LIMIT ?",
+                params + [limit]).fetchall()
+            topics: Dict[int, List[str]] = {}
+            if rows:
+                ids = [row[0] for row in rows]
+                marks = ",".join("?" * len(ids))
+                for exchange_id, name in conn.execute(
+                        f"SELECT exchange_id, topic FROM exchange_topics WHERE exchange_id IN ({marks}) "
+                        "ORDER BY rowid", ids):
+                    topics.setdefault(exchange_id, []).append(name)
+        return [{"id": exchange_id, "timestamp": timestamp, "user": user, "assistant": assistant,
+                 "importance": importance, "source": source, "topics": topics.get(exchange_id, [])}
+                for exchange_id, timestamp, user, assistant, importance, source in rows]
+
+    def exchanges(self, after_id: int = 0, since: Optional[str] = None, topic: Optional[str] = None,
+                  limit: Optional[int] = None, newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Przegląda wymiany porcjami (bez wczytywania całej historii), filtrując po indeksach.
+        Zarchiwizowane wymiany czytane są strumieniowo z segmentów, w tej samej kolejności id.
+
+        Args:
+            after_id (int): Tylko wymiany o id większym niż podane (przetwarzanie przyrostowe).
+            since (Optional[str]): Tylko wymiany od tej chwili (ISO 8601, jak w polu "timestamp").
+            topic (Optional[str]): Tylko wymiany z danym tematem.
+            limit (Optional[int]): Najwyżej tyle wymian.
+            newest_first (bool): Kolejność od najnowszej.
+
+        Yields:
+            Dict[str, Any]: {"id", "timestamp", "user", "assistant", "importance", "source", "topics"}.
+        """
+        remaining = limit
+        cursor = None if newest_first else after_id
+        while remaining is None or remaining > 0:
+            page = FETCH_BATCH if remaining is None else min(FETCH_BATCH, remaining)
+            with self._lock:
+                self._connection()
+                archived = self.archive.last_id()
+                # Rosnąco: wymiany przeniesione do archiwum (także w trakcie przeglądania) czytane są przed bazą
+                from_archive = not newest_first and archived > cursor
+                rows = [] if from_archive else self._hot_page(
+                    after_id if newest_first else cursor, cursor if newest_first else None,
+                    since, topic, page, newest_first)
+            if from_archive:
+                for exchange in self.archive.exchanges(after_id=cursor, since=since, topic=topic):
+                    yield exchange
+                    if remaining is not None:
+                        remaining -= 1
+                        if not remaining:
+                            return
+                cursor = archived
+                continue
+            yield from rows
+            if rows:
+                cursor = rows[-1]["id"]
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < page:
+                break
+        if newest_first and (remaining is None or remaining > 0):
+            # Malejąco: po bazie - archiwum (wymiany przeniesione w trakcie mają id mniejsze niż ostatnio zwrócone)
+            for exchange in self.archive.exchanges(after_id=after_id, before_id=cursor, since=since,
+                                                   topic=topic, newest_first=True):
+                yield exchange
+                if remaining is not None:
+                    remaining -= 1
+                    if not remaining:
+                        return
+
+    def search(self, text, k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Zwraca do `k` wymian najbardziej podobnych do tekstu (lub Utterance), od najtrafniejszej.
+        Z FTS5 - ranking BM25 po wiadomości użytkownika i odpowiedzi AI; bez FTS5 - liczba wspólnych
+        tematów (nowsze wymiany wygrywają remisy). Przeszukiwany jest gorący ogon w bazie
+        (HOT_EXCHANGES najnowszych wymian) - archiwum nie mieści się w limicie czasu etapu przywołania.
+
+        Returns:
+            List[Dict[str, Any]]: {"id", "timestamp", "user", "assistant", "importance", "source", "score"}.
+        """
+        terms = search_terms(text)
+        if not terms or k <= 0:
+            return []
+        with self._lock:
+            conn = self._connection()
+            if self.full_text:
+                rows = conn.execute(
+                    "SELECT e.id, e.timestamp, e.user, e.assistant, e.importance, e.source, "
+                    "-bm25(exchanges_fts, ?, 1.0) AS score FROM exchanges_fts "
+                    "JOIN exchanges e ON e.id = exchanges_fts.rowid "
+                    "WHERE exchanges_fts MATCH ? ORDER BY bm25(exchanges_fts, ?, 1.0) LIMIT ?",
+                    (SEARCH_USER_WEIGHT, _fts_query(terms), SEARCH_USER_WEIGHT, k)).fetchall()
+            else:
+                # Tematy zapisywane są jak w `default_topics` (słowa rozdzielone białymi znakami)
+                terms = default_topics(text) or terms
+                marks = ",".join("?" * len(terms))
+                rows = conn.execute(
+                    "SELECT e.id, e.timestamp, e.user, e.assistant, e.importance, e.source, COUNT(*) AS score "
+                    "FROM exchange_topics t JOIN exchanges e ON e.id = t.exchange_id "
+                    f"WHERE t.topic IN ({marks}) GROUP BY e.id ORDER BY score DESC, e.id DESC LIMIT ?",
+                    terms + [k]).fetchall()
+        return [{"id": exchange_id, "timestamp": timestamp, "user": user, "assistant": assistant,
+                 "importance": importance, "source": source, "score": round(score, 4)}
+                for exchange_id, timestamp, user, assistant, importance, source, score in rows]
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Zwraca `limit` najnowszych wymian w kolejności chronologicznej."""
+        return list(self.exchanges(limit=limit, newest_first=True))[::-1]
+
+    def topic_counts(self, min_count: int = 1, last: Optional[int] = None) -> Dict[str, int]:
+        """
+        Zlicza wymiany z każdym tematem (zapytanie po indeksie tematów i indeksach segmentów archiwum).
+
+        Args:
+            min_count (int): Tylko tematy występujące co najmniej tyle razy.
+            last (Optional[int]): Tylko w ostatnich `last` wymianach.
+        """
+        after_id = 0
+        with self._lock:
+            conn = self._connection()
+            if last is not None:
+                after_id = max(0, self.last_id() - last)
+            counts = Counter(dict(conn.execute(
+                "SELECT topic, COUNT(*) FROM exchange_topics WHERE exchange_id > ? GROUP BY topic",
+                (after_id,)).fetchall()))
+            archived = self.archive.last_id() > after_id
+        if archived:
+            counts.update(self.archive.topic_counts(after_id))
+        ranked = sorted(((topic, count) for topic, count in counts.items() if count >= min_count),
+                        key=lambda item: (-item[1], item[0]))
+        return dict(ranked)
+
+    # --- migracja ---
+
+    def _migrate_legacy_files(self) -> None:
+        """Jednorazowo importuje dotychczasowe pliki rozmów z katalogu bazy (każdy plik osobno, raz)."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        for name, reader in ((LEGACY_MEMORY_TXT, _read_memory_txt), (LEGACY_MEMORY_JSON, _read_memory_json),
+                             (LEGACY_HISTORY_JSON, _read_history_json)):
+            key = f"migrated:{name}"
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                continue
+            path = os.path.join(directory, name)
+            imported = 0
+            if os.path.exists(path):
+                try:
+                    exchanges = reader(path)
+                    self.append_many(exchanges)
+                    imported = len(exchanges)
+                except (OSError, ValueError) as e:
+                    print(f"[ConversationStore] Pominięto import {name}: {e}")
+                    continue
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, _now()))
+            if imported:
+                print(f"[ConversationStore] Zaimportowano {imported} wymian z {name}")
+
+
+def _file_timestamp(path: str) -> str:
+    """Czas modyfikacji pliku (ISO 8601) - dla wpisów, które nie zapisywały własnego czasu."""
+    return datetime.datetime.utcfromtimestamp(os.path.getmtime(path)).isoformat() + "Z"
+
+
+def _read_memory_txt(path: str) -> List[Dict[str, Any]]:
+    """
+    Czyta ai_memory.txt: "[Ty] ..." zaczyna wymianę, "[AI] ..." odpowiedź (kolejne linie bez znacznika
+    należą do odpowiedzi), "[INTERNET][plik]" - wynik pobierania zapisany przez AIEngine.
+    """
+    timestamp = _file_timestamp(path)
+    exchanges: List[Dict[str, Any]] = []
+    current = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("[Ty]"):
+                current = {"user": line[4:].strip(), "assistant": "", "timestamp": timestamp}
+                exchanges.append(current)
+            elif line.startswith("[INTERNET]"):
+                current = {"user": line, "assistant": "", "timestamp": timestamp, "source": "internet", "topics": []}
+                exchanges.append(current)
+            elif current is None:
+                continue
+            elif line.startswith("[AI]") and not current["assistant"]:
+                current["assistant"] = line[4:].strip()
+            elif line:
+                current["assistant"] += ("\n" if current["assistant"] else "") + line
+    return exchanges
+
+
+def _read_memory_json(path: str) -> List[Dict[str, Any]]:
+    """Czyta historię memory.json (zapisywaną przez controller.update_memory)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [{"user": entry.get("user", ""), "assistant": entry.get("assistant", ""),
+             "topics": entry.get("topics", []), "importance": entry.get("importance", 1),
+             "timestamp": entry.get("timestamp"), "source": "controller"}
+            for entry in data.get("history", [])]
+
+
+def _read_history_json(path: str) -> List[Dict[str, Any]]:
+    """Czyta conversation_history.json (lista {"user", "ai"})."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    timestamp = _file_timestamp(path)
+    return [{"user": entry.get("user", ""), "assistant": entry.get("ai", ""), "timestamp": timestamp}
+            for entry in data]
+
+
+# Instancja globalna dla łatwego dostępu (baza otwierana przy pierwszym użyciu)
+conversation_store = ConversationStore()
@@ -24,6 +24,8 @@ class DynamicModuleManager:
         self.dynamic_dir = get_best_dynamic_dir()
         self.modules = {}
         self.module_index = {}
+        # Licznik zmian modułów (utworzenie, aktualizacja) - unieważnia zapamiętane odpowiedzi AIEngine
+        self.version = 0
         self._ensure_module_index()
         self._load_existing_modules()
         
@@ -95,6 +97,7 @@ class DynamicModuleManager:
                 "timestamp": os.path.getmtime(module_path)
             }
             self._save_module_index()
+            self.version += 1
             
             # Załaduj moduł
             return self.load_module(name)
@@ -171,6 +174,7 @@ class DynamicModuleManager:
                 del sys.modules[f"dynamic_{name}"]
             if name in self.modules:
                 del self.modules[name]
+            self.version += 1
             
             return self.load_module(name)
         except Exception as e:
@@ -6,6 +6,8 @@ Moduł analizy emocji w tekście użytkownika. Pozwala na rozbudowę słownika i
 
 import random
 
+from utterance import as_utterance
+
 EMOTION_KEYWORDS = {
     'smutny': 'smutek',
     'wesoły': 'radość',
@@ -20,13 +22,20 @@ EMOTION_KEYWORDS = {
     # Dodaj kolejne słowa i emocje według potrzeb
 }
 
-def analyze_emotion(user_text: str) -> str:
+def analyze_emotion(user_text) -> str:
     """
-    Analizuje tekst użytkownika i zwraca wykrytą emocję lub stan neutralny.
+    Analizuje tekst użytkownika (lub gotową analizę Utterance) i zwraca wykrytą emocję lub stan neutralny.
     Możesz rozbudować słownik EMOTION_KEYWORDS lub dodać logikę NLP.
     """
+    lower = as_utterance(user_text).lower
     for word, emotion in EMOTION_KEYWORDS.items():
-        if word in user_text.lower():
+        if word in lower:
             return emotion
     # Jeśli nie znaleziono, losowa neutralna emocja
     return random.choice(['neutralność', 'ciekawość', 'zamyślenie'])
+
+def analyze_emotions(texts) -> list:
+    """
+    Analizuje emocje dla całej listy tekstów (tryb wsadowy).
+    """
+    return [analyze_emotion(text) for text in texts]
@@ -18,9 +18,12 @@ Pozwala na dynamiczne dodawanie nowych węzłów do sieci.
 import json
 import os
 
+from conversation_store import conversation_store
+
 REINF_PATH = "reinforcement.json"
-MEM_PATH = "memory.json"
 CONN_PATH = "connections.json"
+# Liczba ostatnich rozmów, w których zliczane są tematy (dawny limit historii memory.json)
+MEMORY_WINDOW = 200
 
 def load_json(path: str):
     """Ładuje dane JSON z pliku."""
@@ -38,14 +41,10 @@ def expand_modules():
     jeśli dany temat pojawia się wystarczająco często.
     """
     reinforcement = load_json(REINF_PATH)
-    memory = load_json(MEM_PATH)
     connections = load_json(CONN_PATH)
 
-    # Zliczamy powtarzające się tematy w pamięci
-    freq = {}
-    for entry in memory.get("history", []):
-        for topic in entry.get("topics", []):
-            freq[topic] = freq.get(topic, 0) + 1
+    # Zliczamy powtarzające się tematy w ostatnich rozmowach (zapytanie po indeksie tematów)
+    freq = conversation_store.topic_counts(last=MEMORY_WINDOW)
 
     # Dodajemy nowe węzły, gdy temat przekracza threshold_powtórzeń
     threshold = reinforcement["neuroplastyczność"]["threshold_powtórzeń"]
@@ -0,0 +1,154 @@
+"""
+fact_check_jobs.py
+------------------
+Fact-checking w tle dla AIEngine.
+Odpowiedź wraca do użytkownika od razu, a sprawdzenie faktów (Wikipedia, DuckDuckGo, Google Fact Check)
+wykonywane jest jako zadanie w tle z limitem czasu. Gotowe adnotacje (ostrzeżenia, oceny claimReview)
+przekazywane są subskrybentom - interfejsy Flask i Kivy dopisują je do rozmowy.
+Termin obowiązuje od zgłoszenia: zadanie, które doczeka się wątku po terminie, nie wysyła żadnych zapytań,
+a zapytania HTTP dostają limit czasu nie dłuższy niż pozostały budżet. Kolejka oczekujących zadań jest
+ograniczona - przy przepełnieniu najstarsze oczekujące zadanie (nieaktualne) jest porzucane.
+Wynik, który mimo to nie zdąży przed terminem, jest odrzucany.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from latency_metrics import LatencyHistogram
+
+DEFAULT_FACT_CHECK_DEADLINE = 20.0
+DEFAULT_FACT_CHECK_WORKERS = 2
+# Ile zadań może czekać na wolny wątek; nowsze wypierają najstarsze
+DEFAULT_MAX_QUEUED_CHECKS = 8
+# Ile ostatnich adnotacji przechowywać (dla interfejsów podłączających się później)
+RECENT_ANNOTATIONS = 50
+
+# Subskrybent: (id zadania, tekst użytkownika, adnotacja)
+AnnotationListener = Callable[[int, str, str], None]
+
+
+def _default_check(statement: str, timeout: float) -> Dict[str, Any]:
+    """Pełny fact-checking w budżecie czasu (import leniwy - moduł wymaga pakietu requests)."""
+    from fact_checker import fact_check_pipeline
+    return fact_check_pipeline(statement, timeout=timeout)
+
+
+class FactCheckJobs:
+    """
+    Kolejka zadań fact-checkingu z terminem i powiadamianiem subskrybentów o adnotacjach.
+    """
+    def __init__(self, annotate: Callable[[str, Any], str],
+                 deadline: float = DEFAULT_FACT_CHECK_DEADLINE,
+                 check: Optional[Callable[[str, float], Any]] = None,
+                 max_workers: int = DEFAULT_FACT_CHECK_WORKERS,
+                 max_queued: int = DEFAULT_MAX_QUEUED_CHECKS) -> None:
+        """
+        Args:
+            annotate (Callable): Zamienia (tekst, wynik sprawdzenia) na adnotację; pusty tekst = brak adnotacji.
+            deadline (float): Termin w sekundach od zgłoszenia; późniejszy wynik jest odrzucany.
+            check (Optional[Callable]): Funkcja sprawdzająca (tekst, pozostały budżet w sekundach)
+                (domyślnie fact_check_pipeline z limitami zapytań skróconymi do budżetu).
+            max_workers (int): Liczba równoległych zadań fact-checkingu.
+            max_queued (int): Limit zadań czekających na wątek.
+        """
+        self.annotate = annotate
+        self.deadline = deadline
+        self.max_queued = max_queued
+        self._check = check or _default_check
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nq-factcheck")
+        self._lock = threading.Lock()
+        self._listeners: List[AnnotationListener] = []
+        self._ids = itertools.count(1)
+        self._queued: "OrderedDict[int, Future]" = OrderedDict()
+        self._latency = LatencyHistogram()
+        self._stats = {"submitted": 0, "annotated": 0, "empty": 0, "late": 0, "expired": 0, "dropped": 0,
+                       "errors": 0, "running": 0}
+        self.recent = deque(maxlen=RECENT_ANNOTATIONS)
+
+    def subscribe(self, listener: AnnotationListener) -> None:
+        """Rejestruje odbiorcę adnotacji (wywoływany w wątku zadania)."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: AnnotationListener) -> None:
+        """Wyrejestrowuje odbiorcę adnotacji."""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def submit(self, user_text: str) -> int:
+        """
+        Zgłasza tekst do sprawdzenia w tle.
+
+        Returns:
+            int: Identyfikator zadania przekazywany później subskrybentom razem z adnotacją.
+        """
+        job_id = next(self._ids)
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["running"] += 1
+            self._queued[job_id] = self._pool.submit(self._run, job_id, user_text, time.monotonic())
+            # Przepełniona kolejka: porzuć najstarsze oczekujące zadania (nieaktualne wiadomości)
+            while len(self._queued) > self.max_queued:
+                _, future = self._queued.popitem(last=False)
+                if future.cancel():
+                    self._stats["dropped"] += 1
+                    self._stats["running"] -= 1
+        return job_id
+
+    def _run(self, job_id: int, user_text: str, submitted: float) -> None:
+        """Wykonuje sprawdzenie w pozostałym budżecie czasu i rozsyła adnotację, jeśli zdążyła przed terminem."""
+        with self._lock:
+            self._queued.pop(job_id, None)
+        outcome = "errors"
+        annotation = ""
+        try:
+            remaining = self.deadline - (time.monotonic() - submitted)
+            if remaining <= 0:
+                # Termin minął w kolejce - nie wysyłaj zapytań, których wynik i tak zostałby odrzucony
+                outcome = "expired"
+                return
+            result = self._check(user_text, remaining)
+            annotation = self.annotate(user_text, result)
+            elapsed = time.monotonic() - submitted
+            if elapsed > self.deadline:
+                print(f"[FactCheck] Zadanie {job_id} po terminie ({elapsed:.1f}s > {self.deadline}s) - odrzucone")
+                outcome = "late"
+            else:
+                outcome = "annotated" if annotation else "empty"
+        except Exception as e:
+            print(f"[FactCheck] Błąd zadania {job_id}: {e}")
+        finally:
+            with self._lock:
+                self._stats[outcome] += 1
+                self._stats["running"] -= 1
+                self._latency.add(time.monotonic() - submitted)
+                listeners = []
+                if outcome == "annotated":
+                    self.recent.append((job_id, user_text, annotation))
+                    listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(job_id, user_text, annotation)
+            except Exception as e:
+                print(f"[FactCheck] Błąd odbiorcy adnotacji: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Zwraca liczniki zadań (zgłoszone, z adnotacją, puste, po terminie, przeterminowane w kolejce,
+        porzucone przy przepełnieniu kolejki, błędy, w toku) i histogram czasu.
+        """
+        with self._lock:
+            metrics = dict(self._stats)
+            metrics["deadline_s"] = self.deadline
+            metrics["latency"] = self._latency.to_dict()
+        return metrics
+
+    def shutdown(self) -> None:
+        """Zamyka pulę zadań bez czekania na trwające sprawdzenia."""
+        self._pool.shutdown(wait=False)
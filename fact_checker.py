@@ -5,10 +5,18 @@ Moduł zapewniający funkcje fact-checkingu, detekcji dezinformacji i oceniania
 Integruje się z AIEngine, task_executor, oraz innymi modułami sieci i pamięci.
 """
 
+import asyncio
+import time
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import re
 
+# Opcjonalny klient HTTP dla asynchronicznego API (bez niego zapytania trafiają do puli wątków)
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 # Lista zaufanych domen (możesz rozbudować)
 TRUSTED_DOMAINS = [
     "gov.pl", "who.int", "wikipedia.org", "bbc.com", "reuters.com", "nature.com", "snopes.com"
@@ -18,42 +26,66 @@ TRUSTED_DOMAINS = [
 FACT_CHECK_API_URL = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
 FACT_CHECK_API_KEY = "YOUR_API_KEY"  # <-- Wstaw swój klucz API jeśli posiadasz
 
+WIKIPEDIA_URL = "https://pl.wikipedia.org/w/api.php?action=opensearch&search={query}&limit=1&format=json"
+DUCKDUCKGO_URL = "https://api.duckduckgo.com/?q={query}&format=json"
+
+def _request_timeout(default: float, deadline: Optional[float]) -> float:
+    """
+    Limit czasu pojedynczego zapytania: domyślny, ale nie dłuższy niż czas pozostały do terminu
+    (time.monotonic()). Gdy termin minął, zgłasza TimeoutError zamiast wysyłać zapytanie.
+    """
+    if deadline is None:
+        return default
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Przekroczono termin fact-checkingu")
+    return min(default, remaining)
+
 def is_trusted_domain(url: str) -> bool:
     """
     Sprawdza, czy adres URL należy do zaufanej domeny.
     """
     return any(domain in url for domain in TRUSTED_DOMAINS)
 
-def fetch_from_multiple_sources(query: str) -> List[Dict[str, Any]]:
+def fetch_from_multiple_sources(query: str, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Pobiera informacje z kilku źródeł (do rozbudowy o prawdziwe API/news).
+    deadline (time.monotonic()) skraca limity czasu zapytań do pozostałego czasu.
     """
     # Przykład: pobierz z Wikipedii i DuckDuckGo
     results = []
     try:
-        wiki = requests.get(f"https://pl.wikipedia.org/w/api.php?action=opensearch&search={query}&limit=1&format=json", timeout=5)
+        wiki = requests.get(WIKIPEDIA_URL.format(query=query), timeout=_request_timeout(5, deadline))
         if wiki.ok:
-            data = wiki.json()
-            if data and len(data) > 2 and data[2]:
-                results.append({
-                    "source": "wikipedia.org",
-                    "summary": data[2][0],
-                    "url": data[3][0] if len(data[3]) > 0 else ""
-                })
-        ddg = requests.get(f"https://api.duckduckgo.com/?q={query}&format=json", timeout=5)
+            results.extend(_parse_wikipedia(wiki.json()))
+        ddg = requests.get(DUCKDUCKGO_URL.format(query=query), timeout=_request_timeout(5, deadline))
         if ddg.ok:
-            data = ddg.json()
-            if data.get("AbstractText"):
-                results.append({
-                    "source": "duckduckgo.com",
-                    "summary": data["AbstractText"],
-                    "url": data.get("AbstractURL", "")
-                })
+            results.extend(_parse_duckduckgo(ddg.json()))
     except Exception as e:
         results.append({"source": "error", "summary": str(e), "url": ""})
     return results
 
-def check_with_fact_api(statement: str) -> Dict[str, Any]:
+def _parse_wikipedia(data: Any) -> List[Dict[str, Any]]:
+    """Zamienia odpowiedź opensearch Wikipedii na listę źródeł."""
+    if data and len(data) > 2 and data[2]:
+        return [{
+            "source": "wikipedia.org",
+            "summary": data[2][0],
+            "url": data[3][0] if len(data[3]) > 0 else ""
+        }]
+    return []
+
+def _parse_duckduckgo(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Zamienia odpowiedź DuckDuckGo na listę źródeł."""
+    if data.get("AbstractText"):
+        return [{
+            "source": "duckduckgo.com",
+            "summary": data["AbstractText"],
+            "url": data.get("AbstractURL", "")
+        }]
+    return []
+
+def check_with_fact_api(statement: str, deadline: Optional[float] = None) -> Dict[str, Any]:
     """
     Sprawdza twierdzenie przez zewnętrzne API fact-checkingowe (Google Fact Check Tools).
     """
@@ -62,19 +94,21 @@ def check_with_fact_api(statement: str) -> Dict[str, Any]:
             "query": statement,
             "key": FACT_CHECK_API_KEY
         }
-        resp = requests.get(FACT_CHECK_API_URL, params=params, timeout=7)
-        if resp.ok:
-            data = resp.json()
-            if "claims" in data and data["claims"]:
-                claim = data["claims"][0]
-                return {
-                    "status": claim.get("text", "unknown"),
-                    "claimReview": claim.get("claimReview", [])
-                }
-        return {"status": "unknown", "claimReview": []}
+        resp = requests.get(FACT_CHECK_API_URL, params=params, timeout=_request_timeout(7, deadline))
+        return _parse_fact_api(resp.json() if resp.ok else None)
     except Exception as e:
         return {"status": "error", "details": str(e)}
 
+def _parse_fact_api(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wyciąga pierwsze twierdzenie i jego oceny z odpowiedzi API fact-checkingowego."""
+    if data and "claims" in data and data["claims"]:
+        claim = data["claims"][0]
+        return {
+            "status": claim.get("text", "unknown"),
+            "claimReview": claim.get("claimReview", [])
+        }
+    return {"status": "unknown", "claimReview": []}
+
 def detect_fake_news_features(text: str) -> List[str]:
     """
     Wykrywa typowe cechy dezinformacji w tekście.
@@ -91,16 +125,22 @@ def detect_fake_news_features(text: str) -> List[str]:
     # Możesz dodać więcej heurystyk
     return warnings
 
-def fact_check_pipeline(statement: str) -> Dict[str, Any]:
+def fact_check_pipeline(statement: str, timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Główna funkcja: sprawdza twierdzenie przez kilka warstw:
     - porównuje z wieloma źródłami,
     - sprawdza przez API fact-checkingowe,
     - wykrywa cechy dezinformacji,
     - ocenia zaufanie do źródła.
+    timeout (sekundy) to budżet całego sprawdzenia - zapytania po jego wyczerpaniu nie są wysyłane.
     """
-    results = fetch_from_multiple_sources(statement)
-    fact_api = check_with_fact_api(statement)
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    results = fetch_from_multiple_sources(statement, deadline)
+    fact_api = check_with_fact_api(statement, deadline)
+    return _summarize(results, fact_api)
+
+def _summarize(results: List[Dict[str, Any]], fact_api: Dict[str, Any]) -> Dict[str, Any]:
+    """Łączy źródła i wynik API w raport z ostrzeżeniami."""
     warnings = []
     for r in results:
         if r.get("url") and not is_trusted_domain(r["url"]):
@@ -114,3 +154,60 @@ def fact_check_pipeline(statement: str) -> Dict[str, Any]:
         "fact_api": fact_api,
         "warnings": warnings
     }
+
+# === ASYNCHRONICZNE API (dla aprocess_input) ===
+
+async def _aget_json(url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 5) -> Any:
+    """
+    Pobiera JSON bez blokowania pętli zdarzeń. Zwraca None, gdy serwer odpowie błędem.
+    Używa aiohttp, a bez niego wykonuje requests.get w puli wątków.
+    """
+    if aiohttp is not None:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            async with session.get(url, params=params) as resp:
+                if resp.status >= 400:
+                    return None
+                return await resp.json(content_type=None)
+    resp = await asyncio.to_thread(requests.get, url, params=params, timeout=timeout)
+    return resp.json() if resp.ok else None
+
+async def afetch_from_multiple_sources(query: str) -> List[Dict[str, Any]]:
+    """
+    Asynchroniczny odpowiednik fetch_from_multiple_sources - źródła odpytywane równolegle.
+    """
+    results = []
+    try:
+        wiki, ddg = await asyncio.gather(
+            _aget_json(WIKIPEDIA_URL.format(query=query), timeout=5),
+            _aget_json(DUCKDUCKGO_URL.format(query=query), timeout=5),
+        )
+        if wiki is not None:
+            results.extend(_parse_wikipedia(wiki))
+        if ddg is not None:
+            results.extend(_parse_duckduckgo(ddg))
+    except Exception as e:
+        results.append({"source": "error", "summary": str(e), "url": ""})
+    return results
+
+async def acheck_with_fact_api(statement: str) -> Dict[str, Any]:
+    """
+    Asynchroniczny odpowiednik check_with_fact_api.
+    """
+    try:
+        params = {
+            "query": statement,
+            "key": FACT_CHECK_API_KEY
+        }
+        return _parse_fact_api(await _aget_json(FACT_CHECK_API_URL, params=params, timeout=7))
+    except Exception as e:
+        return {"status": "error", "details": str(e)}
+
+async def afact_check_pipeline(statement: str) -> Dict[str, Any]:
+    """
+    Asynchroniczny odpowiednik fact_check_pipeline - wszystkie zapytania HTTP wykonywane są równolegle.
+    """
+    results, fact_api = await asyncio.gather(
+        afetch_from_multiple_sources(statement),
+        acheck_with_fact_api(statement),
+    )
+    return _summarize(results, fact_api)
@@ -0,0 +1,186 @@
+"""
+intent_classifier.py
+--------------------
+Wspólny klasyfikator intencji dla AIEngine, phone_interface i interfejsów Kivy.
+Wszystkie tabele słów kluczowych kompilowane są raz do automatu Aho–Corasick,
+więc każda wiadomość jest skanowana jednym liniowym przebiegiem zamiast wielu pętli `keyword in text.lower()`.
+"""
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+from utterance import as_utterance
+
+# Kategorie intencji -> słowa kluczowe (dopasowanie jako podciąg tekstu małymi literami)
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    # AIEngine.process_input
+    "phone": ["zrób zdjęcie", "lokalizacja", "zadzwoń", "sms", "kontakty", "pliki",
+              "powiadomienie", "nagraj", "bluetooth", "wifi", "sensory", "bateria",
+              "schowek", "pozwól ai", "foto", "camera", "gps", "gdzie jestem",
+              "wiadomość", "call", "notification", "record", "audio"],
+    "self_mod": ["modyfikuj kod", "utwórz moduł", "edytuj plik", "dodaj funkcję",
+                 "usuń kod", "popraw kod", "stwórz nowy", "rozbuduj kod",
+                 "zmień algorytm", "dodaj feature", "upgrade", "improve"],
+    "self_mod.create_module": ["utwórz moduł"],
+    "self_mod.modify": ["modyfikuj kod", "edytuj plik"],
+    "self_mod.file": ["plik"],
+    # AIEngine._handle_commands
+    "command.phone_status": ["telefon status", "phone status"],
+    "command.emergency_phone": ["pełny dostęp telefon", "emergency phone"],
+    "command.unlimited_mode": ["pełna samomodyfikacja", "unlimited mode"],
+    "command.mod_stats": ["statystyki modyfikacji", "mod stats"],
+    "command.restore": ["emergency restore", "przywróć backup"],
+    "command.expand_logic": ["rozwiń logikę"],
+    "command.grow_network": ["rozbuduj sieć"],
+    "command.execute_task": ["wykonaj zadanie"],
+    "command.add_function": ["dodaj funkcję"],
+    # phone_interface.use_phone_feature
+    "phone.camera": ["zrób zdjęcie", "foto", "camera", "kamera"],
+    "phone.location": ["lokalizacja", "gps", "gdzie jestem", "location"],
+    "phone.call": ["zadzwoń", "call"],
+    "phone.sms": ["sms", "wiadomość"],
+    "phone.contacts": ["kontakty", "contacts"],
+    "phone.files": ["pliki", "files", "storage", "browse"],
+    "phone.notification": ["powiadomienie", "notification"],
+    "phone.microphone": ["nagraj", "mikrofon", "record", "audio"],
+    "phone.bluetooth": ["bluetooth"],
+    "phone.wifi": ["wifi"],
+    "phone.sensors": ["sensors", "sensory", "accelerometer", "gyroscope"],
+    "phone.battery": ["bateria", "battery"],
+    "phone.clipboard": ["schowek", "clipboard"],
+    "phone.permissions": ["pozwól ai"],
+    # main.py / main_full.py - oznaczenie odpowiedzi
+    "ui.phone": ["zrób zdjęcie", "lokalizacja", "sms", "bateria", "wifi"],
+    "ui.self_mod": ["modyfikuj", "utwórz moduł", "dodaj funkcję"],
+    # main_android_fixed.py - ikony odpowiedzi
+    "icon.camera": ["zrób zdjęcie", "foto", "camera", "kamera"],
+    "icon.location": ["lokalizacja", "gps", "gdzie"],
+    "icon.sms": ["sms", "wiadomość"],
+    "icon.call": ["zadzwoń", "call", "telefon"],
+    "icon.modify": ["modyfikuj", "edytuj", "zmień kod"],
+    "icon.module": ["utwórz moduł", "nowy moduł"],
+    "icon.status": ["status", "info", "informacje"],
+    "icon.science": ["fizyka", "kwant", "nauka"],
+}
+
+
+class KeywordAutomaton:
+    """
+    Automat Aho–Corasick wyszukujący wszystkie słowa kluczowe w tekście jednym przebiegiem.
+    """
+    def __init__(self, keywords: Iterable[str]) -> None:
+        """
+        Args:
+            keywords (Iterable[str]): Słowa kluczowe (małymi literami).
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+        for keyword in keywords:
+            self._add(keyword)
+        self._build_links()
+
+    def _add(self, keyword: str) -> None:
+        """Dodaje słowo kluczowe do drzewa trie."""
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            node = nxt
+        self._out[node].add(keyword)
+
+    def _build_links(self) -> None:
+        """Wyznacza krawędzie porażki (BFS) i scala wyjścia sufiksów."""
+        # Węzły na głębokości 1 mają krawędź porażki do korzenia (domyślne 0)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] |= self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> Set[str]:
+        """
+        Zwraca zbiór słów kluczowych występujących w tekście jako podciągi.
+        """
+        found: Set[str] = set()
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found |= self._out[node]
+        return found
+
+
+class Intent:
+    """
+    Wynik klasyfikacji wiadomości: dopasowane słowa kluczowe i kategorie.
+    """
+    __slots__ = ("text", "lower", "keywords", "categories")
+
+    def __init__(self, text: str, lower: str, keywords: FrozenSet[str], categories: FrozenSet[str]) -> None:
+        self.text = text
+        self.lower = lower
+        self.keywords = keywords
+        self.categories = categories
+
+    def matches(self, category: str) -> bool:
+        """Sprawdza, czy wiadomość zawiera którekolwiek słowo kluczowe kategorii."""
+        return category in self.categories
+
+    def has(self, keyword: str) -> bool:
+        """Sprawdza, czy wiadomość zawiera dane słowo kluczowe z tabel klasyfikatora."""
+        return keyword in self.keywords
+
+    def __repr__(self) -> str:
+        return f"Intent({self.text!r}, categories={sorted(self.categories)})"
+
+
+class IntentClassifier:
+    """
+    Klasyfikator intencji zbudowany raz z tabel słów kluczowych.
+    """
+    def __init__(self, tables: Dict[str, List[str]] = INTENT_KEYWORDS) -> None:
+        """
+        Args:
+            tables (Dict[str, List[str]]): Kategorie i ich słowa kluczowe.
+        """
+        self._categories_of: Dict[str, Set[str]] = {}
+        for category, keywords in tables.items():
+            for keyword in keywords:
+                self._categories_of.setdefault(keyword.lower(), set()).add(category)
+        self._automaton = KeywordAutomaton(self._categories_of)
+
+    def classify(self, text) -> Intent:
+        """
+        Klasyfikuje wiadomość (tekst lub analizę Utterance) jednym przebiegiem automatu.
+        """
+        utterance = as_utterance(text)
+        text, lower = utterance.text, utterance.lower
+        keywords = self._automaton.find_all(lower)
+        categories: Set[str] = set()
+        for keyword in keywords:
+            categories |= self._categories_of[keyword]
+        return Intent(text, lower, frozenset(keywords), frozenset(categories))
+
+
+# Instancja globalna dla łatwego dostępu
+intent_classifier = IntentClassifier()
+
+
+def classify_intent(text) -> Intent:
+    """
+    Klasyfikuje tekst współdzielonym klasyfikatorem.
+    """
+    return intent_classifier.classify(text)
@@ -0,0 +1,361 @@
+"""
+knowledge_benchmark.py
+----------------------
+Benchmark wyszukiwania w bazie wiedzy na syntetycznych korpusach (domyślnie 1k / 100k / 1M wpisów).
+Generator tworzy pseudo-polskie klucze i zestaw pytań o znanej odpowiedzi: klucz dokładny, bez polskich znaków,
+z literówką, z odmienionym słowem i z dopiskiem ("co to jest ...").
+Dla każdego trybu wyszukiwania mierzone są: czas budowy, przyrost pamięci (RSS), opóźnienie p50/p99
+oraz trafność top-1 (ogółem i dla każdego rodzaju pytań). Raport zapisywany jest jako JSON - do porównań między wersjami.
+Tryby keyword, semantic i batch wywołują funkcje ai_knowledge_base_universal na czas pomiaru podstawionym
+korpusie (`swapped_knowledge`), więc mierzą ten sam kod, który odpowiada użytkownikowi.
+
+Tryby:
+    keyword   - quantum_search bez etapu semantycznego
+    semantic  - quantum_search z etapem semantycznym (LSH, jak get_basic_answer), wymaga NumPy
+    batch     - get_basic_answers bez etapu semantycznego dla wszystkich pytań naraz; mierzony jest tylko
+                czas całego wywołania (queries_per_s, mean_ms), bez percentyli opóźnienia
+    pack      - pakiet wiedzy SQLite (knowledge_packs.py)
+
+Opcja --check sprawdza zamiast tego pytania regresyjne o znanej odpowiedzi we wbudowanej bazie wiedzy
+(KNOWN_ANSWERS) i kończy się kodem 1, gdy któraś odpowiedź jest błędna.
+
+Przykład:
+    python knowledge_benchmark.py --sizes 1000 100000 --queries 500 --output benchmark_report.json
+    python knowledge_benchmark.py --check
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import ai_knowledge_base_universal as knowledge_base
+from knowledge_index import KnowledgeIndex, fold_diacritics, tokenize
+from knowledge_packs import KnowledgePack, KnowledgePacks, build_pack
+from semantic_index import SEMANTIC_AVAILABLE
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+DEFAULT_QUERIES = 1000
+DEFAULT_MODES = ("keyword", "semantic", "batch", "pack")
+# Budowa indeksu semantycznego jest liniowa w Pythonie - powyżej tego rozmiaru tryb jest pomijany
+DEFAULT_SEMANTIC_MAX = 100000
+THRESHOLD = 0.5
+TOP_K = knowledge_base.SEARCH_TOP_K
+
+QUERY_KINDS = ("exact", "no_diacritics", "typo", "inflected", "prefixed")
+_SYLLABLES = ("ka", "to", "mi", "ra", "po", "ze", "ni", "wa", "sz", "cz", "ło", "ść", "ta", "be", "gro",
+              "stra", "kwa", "nt", "fi", "zy", "ją", "ęt", "ór", "ży", "dź", "ań", "le", "mo", "su", "we")
+_PREFIXES = ("co to jest", "czym jest", "opowiedz o", "wyjaśnij")
+_LETTERS = "aąbcćdeęfghijklłmnńoóprsśtuwyzźż"
+# Pytania regresyjne do wbudowanej bazy wiedzy: (pytanie, klucz, którego odpowiedź jest oczekiwana);
+# klucz None oznacza oczekiwany brak odpowiedzi (UNKNOWN_ANSWER)
+KNOWN_ANSWERS = (
+    ("co to jest kwant", "co to jest kwant"),
+    ("co to jest energia", "co to jest energia"),
+    ("czym jest foton w fizyce", "czym jest foton"),
+    # Klucze "co to jest ..." dzielą z pytaniem tylko częste słowa - odpowiedzią musi być temat pytania
+    ("co to jest splątanie", "czym jest splątanie"),
+    # Temat spoza bazy wiedzy - żaden klucz nie może odpowiedzieć samymi słowami pytającymi
+    ("co to jest fotosynteza", None),
+    ("co to jest grawitacja", None),
+    ("czym jest mitochondrium", None),
+)
+
+
+def generate_corpus(size: int, seed: int = 1) -> Dict[str, str]:
+    """Zwraca syntetyczną bazę wiedzy: klucze z 2-4 pseudo-polskich słów, słownik ~size/3 słów."""
+    rng = random.Random(seed)
+    vocabulary = set()
+    while len(vocabulary) < max(50, size // 3):
+        vocabulary.add("".join(rng.choices(_SYLLABLES, k=rng.randint(2, 4))))
+    vocabulary = sorted(vocabulary)
+    corpus = {}
+    while len(corpus) < size:
+        key = " ".join(rng.choices(vocabulary, k=rng.randint(2, 4)))
+        corpus.setdefault(key, f"odpowiedź {len(corpus)}")
+    return corpus
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    """Jedna literówka: zamiana sąsiednich liter, usunięcie lub podmiana litery."""
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == 1:
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice(_LETTERS) + word[i + 1:]
+
+
+def generate_queries(corpus: Dict[str, str], count: int, seed: int = 2) -> List[Tuple[str, str, str]]:
+    """
+    Zwraca pytania o znanej odpowiedzi: (rodzaj, pytanie, oczekiwana odpowiedź), po równo dla każdego rodzaju.
+    """
+    rng = random.Random(seed)
+    keys = rng.sample(list(corpus), min(count, len(corpus)))
+    queries = []
+    for position, key in enumerate(keys):
+        kind = QUERY_KINDS[position % len(QUERY_KINDS)]
+        words = key.split()
+        longest = max(range(len(words)), key=lambda i: len(words[i]))
+        if kind == "exact":
+            text = key
+        elif kind == "no_diacritics":
+            text = fold_diacritics(key)
+        elif kind == "typo":
+            words[longest] = _typo(words[longest], rng)
+            text = " ".join(words)
+        elif kind == "inflected":
+            words[longest] = words[longest][:-1] + rng.choice(("ie", "ą", "y", "ach"))
+            text = " ".join(words)
+        else:
+            text = f"{rng.choice(_PREFIXES)} {key}"
+        queries.append((kind, text, corpus[key]))
+    return queries
+
+
+def _rss_mb() -> Optional[float]:
+    """
+    Bieżąca pamięć procesu (Linux: /proc/self/statm, inaczej psutil, a bez niego maksymalna RSS z modułu
+    resource, niedostępnego w Windows). None, gdy żadne źródło nie jest dostępne.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def _memory_growth(before: Optional[float]) -> Optional[float]:
+    """Przyrost pamięci od pomiaru `before` (MB, zaokrąglony) lub None bez pomiaru pamięci."""
+    after = _rss_mb()
+    return round(after - before, 1) if before is not None and after is not None else None
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))]
+
+
+@contextlib.contextmanager
+def swapped_knowledge(corpus: Dict[str, str], index: KnowledgeIndex) -> Iterator[None]:
+    """
+    Podstawia korpus i jego indeks w ai_knowledge_base_universal (bez zainstalowanych pakietów wiedzy
+    i bez drzewa podpowiedzi), a po pomiarze przywraca wbudowaną bazę wiedzy.
+    """
+    with knowledge_base._LOCK:
+        saved = (knowledge_base.BASIC_KNOWLEDGE, knowledge_base._INDEX,
+                 knowledge_base._TRIE, knowledge_base.knowledge_packs)
+        knowledge_base.BASIC_KNOWLEDGE, knowledge_base._INDEX = corpus, index
+        knowledge_base._TRIE, knowledge_base.knowledge_packs = None, KnowledgePacks(directories=[])
+    try:
+        yield
+    finally:
+        with knowledge_base._LOCK:
+            (knowledge_base.BASIC_KNOWLEDGE, knowledge_base._INDEX,
+             knowledge_base._TRIE, knowledge_base.knowledge_packs) = saved
+
+
+def _measure(answer: Callable[[str], Optional[str]], queries: List[Tuple[str, str, str]]) -> Dict:
+    """Odpytuje tryb pytanie po pytaniu; zwraca opóźnienia i trafność."""
+    latencies = []
+    hits: Dict[str, List[int]] = {kind: [0, 0] for kind in QUERY_KINDS}
+    for kind, text, expected in queries:
+        started = time.perf_counter()
+        result = answer(text)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        hits[kind][0] += result == expected
+        hits[kind][1] += 1
+    return _summary(latencies, hits)
+
+
+def _accuracy(hits: Dict[str, List[int]]) -> Dict:
+    total_hits = sum(h for h, _ in hits.values())
+    total = sum(n for _, n in hits.values())
+    return {
+        "queries": total,
+        "accuracy": round(total_hits / total, 4) if total else 0.0,
+        "accuracy_by_kind": {kind: round(h / n, 4) for kind, (h, n) in hits.items() if n},
+    }
+
+
+def _summary(latencies: List[float], hits: Dict[str, List[int]]) -> Dict:
+    latencies = sorted(latencies)
+    summary = {
+        "p50_ms": round(_percentile(latencies, 50), 4),
+        "p99_ms": round(_percentile(latencies, 99), 4),
+        "mean_ms": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+    }
+    summary.update(_accuracy(hits))
+    return summary
+
+
+def check_known_answers() -> List[str]:
+    """
+    Odpytuje pytaniami KNOWN_ANSWERS get_basic_answer i quantum_search bez etapu semantycznego;
+    zwraca opisy błędnych odpowiedzi (pusta lista - wszystkie poprawne).
+    """
+    failures = []
+    for question, key in KNOWN_ANSWERS:
+        expected = knowledge_base.BASIC_KNOWLEDGE[key] if key is not None else knowledge_base.UNKNOWN_ANSWER
+        for semantic in (True, False):
+            answer = knowledge_base.quantum_search(question, THRESHOLD, semantic=semantic)
+            if answer != expected:
+                failures.append(f"{question!r} (semantic={semantic}): oczekiwano odpowiedzi klucza {key!r}, "
+                                f"otrzymano {answer[:60]!r}")
+    return failures
+
+
+def run_size(size: int, query_count: int, modes: List[str], semantic_max: int, seed: int) -> List[Dict]:
+    """Mierzy wszystkie tryby dla jednego rozmiaru korpusu."""
+    results = []
+    corpus = generate_corpus(size, seed)
+    queries = generate_queries(corpus, query_count, seed + 1)
+    print(f"[Benchmark] Korpus {size}: {len(queries)} pytań")
+
+    index = None
+    if {"keyword", "semantic", "batch"} & set(modes):
+        rss = _rss_mb()
+        started = time.perf_counter()
+        index = KnowledgeIndex(corpus)
+        build_s = time.perf_counter() - started
+        memory_mb = _memory_growth(rss)
+
+    for mode in modes:
+        entry = {"size": size, "mode": mode}
+        if index is not None:
+            index.clear_cache()  # każdy tryb startuje bez zapamiętanych korekt słów
+        if mode == "keyword":
+            entry.update(build_s=round(build_s, 3), memory_mb=memory_mb)
+            with swapped_knowledge(corpus, index):
+                entry.update(_measure(
+                    lambda text: knowledge_base.quantum_search(text, THRESHOLD, semantic=False), queries))
+        elif mode == "semantic":
+            if not SEMANTIC_AVAILABLE or size > semantic_max:
+                entry["skipped"] = "brak NumPy" if not SEMANTIC_AVAILABLE else f"rozmiar > {semantic_max}"
+            else:
+                rss = _rss_mb()
+                started = time.perf_counter()
+                index.semantic_match(frozenset(["_"]))  # budowa indeksu LSH
+                entry.update(build_s=round(time.perf_counter() - started, 3), memory_mb=_memory_growth(rss))
+                with swapped_knowledge(corpus, index):
+                    entry.update(_measure(
+                        lambda text: knowledge_base.quantum_search(text, THRESHOLD, semantic=True), queries))
+        elif mode == "batch":
+            texts = [text for _, text, _ in queries]
+            index.best_matches([frozenset()], THRESHOLD, TOP_K)  # kompilacja macierzy (NumPy)
+            with swapped_knowledge(corpus, index):
+                started = time.perf_counter()
+                answers = knowledge_base.get_basic_answers(texts, THRESHOLD, semantic=False)
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+            hits: Dict[str, List[int]] = {kind: [0, 0] for kind in QUERY_KINDS}
+            for (kind, _, expected), answer in zip(queries, answers):
+                hits[kind][0] += answer == expected
+                hits[kind][1] += 1
+            # Jedno wywołanie dla wszystkich pytań: opóźnienia pojedynczych pytań nie są znane
+            entry["mean_ms"] = round(elapsed_ms / len(texts), 4) if texts else 0.0
+            entry["queries_per_s"] = round(len(texts) / (elapsed_ms / 1000.0), 1) if elapsed_ms else None
+            entry.update(_accuracy(hits))
+        elif mode == "pack":
+            directory = tempfile.mkdtemp(prefix="nq-bench-")
+            try:
+                path = os.path.join(directory, f"bench_{size}.nqpack")
+                started = time.perf_counter()
+                build_pack(path, corpus.items())
+                entry["build_s"] = round(time.perf_counter() - started, 3)
+                entry["file_mb"] = round(os.path.getsize(path) / 2 ** 20, 1)
+                rss = _rss_mb()
+                pack = KnowledgePack(path)
+
+                def pack_answer(text):
+                    normalized = text.lower().strip()
+                    answer = pack.lookup(normalized)
+                    return answer if answer is not None else pack.search(tokenize(normalized), THRESHOLD, TOP_K)
+
+                entry.update(_measure(pack_answer, queries))
+                entry["memory_mb"] = _memory_growth(rss)
+                pack.close()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        else:
+            entry["skipped"] = "nieznany tryb"
+        results.append(entry)
+        if "skipped" in entry:
+            print(f"[Benchmark] {size} {mode}: pominięty ({entry['skipped']})")
+        elif mode == "batch":
+            print(f"[Benchmark] {size} {mode}: {entry['queries_per_s']} pytań/s, średnio {entry['mean_ms']} ms, "
+                  f"trafność {entry['accuracy']:.1%}")
+        else:
+            print(f"[Benchmark] {size} {mode}: p50 {entry['p50_ms']} ms, p99 {entry['p99_ms']} ms, "
+                  f"trafność {entry['accuracy']:.1%}")
+    return results
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, query_count: int = DEFAULT_QUERIES, modes=DEFAULT_MODES,
+                  semantic_max: int = DEFAULT_SEMANTIC_MAX, seed: int = 1) -> Dict:
+    """Uruchamia benchmark i zwraca raport (słownik gotowy do zapisu jako JSON)."""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    report = {
+        "format": 1,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+        "config": {"sizes": list(sizes), "queries": query_count, "modes": list(modes),
+                   "threshold": THRESHOLD, "top_k": TOP_K, "seed": seed},
+        "results": [],
+    }
+    for size in sizes:
+        report["results"].extend(run_size(size, query_count, list(modes), semantic_max, seed))
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark wyszukiwania w bazie wiedzy NeuroQuantumAI")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--modes", nargs="+", default=list(DEFAULT_MODES), choices=DEFAULT_MODES)
+    parser.add_argument("--semantic-max", type=int, default=DEFAULT_SEMANTIC_MAX)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="knowledge_benchmark.json")
+    parser.add_argument("--check", action="store_true", help="tylko pytania regresyjne KNOWN_ANSWERS")
+    args = parser.parse_args(argv)
+    if args.check:
+        failures = check_known_answers()
+        for failure in failures:
+            print(f"[Benchmark] Błędna odpowiedź: {failure}")
+        print(f"[Benchmark] Pytania regresyjne: {len(KNOWN_ANSWERS) - len(failures)}/{len(KNOWN_ANSWERS)} poprawnych")
+        sys.exit(1 if failures else 0)
+    report = run_benchmark(args.sizes, args.queries, args.modes, args.semantic_max, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[Benchmark] Raport zapisany: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+"""
+knowledge_index.py
+------------------
+Indeks odwrócony bazy wiedzy z rankingiem BM25.
+Słowa kluczy są tokenizowane raz przy budowie indeksu; zapytanie przechodzi tylko po listach
+dokumentów (posting lists) swoich słów, a najlepsze klucze wybierane są kopcem top-k.
+Koszt wyszukiwania zależy od długości dopasowanych list, a nie od rozmiaru bazy wiedzy.
+Słowa zapytania spoza słownika (brak polskich znaków, literówki) dopasowywane są do słów kluczy
+po usunięciu diakrytyków i przez indeks trigramów znakowych (`KnowledgeIndex.correct`).
+Zbudowany indeks można zapisać jako wersjonowaną migawkę (`save_snapshot`) opisaną sumą kontrolną kluczy;
+`load_or_build` wczytuje ją zamiast tokenizować bazę od nowa, dopóki wiedza się nie zmieni.
+Indeks jest aktualizowany przyrostowo (`add` / `remove`) - bez przebudowy przy nauce nowych faktów.
+Drugi etap wyszukiwania (`semantic_match`): kandydaci z indeksu LSH wektorów n-gramów znakowych
+(semantic_index.py) przeszeregowani wynikiem BM25 - dla parafraz i innych form słów.
+Z NumPy indeks kompilowany jest do rzadkiej macierzy wag BM25 (słowo x klucz), a pakiet zapytań
+oceniany jest jednym mnożeniem macierzy (`KnowledgeIndex.best_matches`); bez NumPy - pętla w Pythonie.
+"""
+
+import gc
+import hashlib
+import heapq
+import math
+import os
+import pickle
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_WORD_RE = re.compile(r"\w+")
+_POLISH_FOLD = str.maketrans("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ", "acelnoszzACELNOSZZ")
+
+# Parametry BM25: nasycenie częstości słowa i normalizacja długości klucza
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Dopasowanie rozmyte: minimalne podobieństwo trigramów (Dice) i minimalna długość słowa
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MIN_LENGTH = 4
+# Wersja formatu migawki indeksu (zmiana struktur indeksu = nowa wersja)
+INDEX_SNAPSHOT_VERSION = 1
+# Limit zapamiętanych dopasowań słów spoza słownika
+MAX_CACHED_CORRECTIONS = 10000
+# Od ilu kluczy pojedyncze zapytanie oceniane jest macierzowo (poniżej narzut NumPy przeważa)
+MATRIX_MIN_KEYS = 20000
+# Liczba zapytań ocenianych jednym mnożeniem macierzy (ogranicza pamięć przy dużych pakietach)
+MATRIX_BLOCK_QUERIES = 4096
+# Słowa pytające i funkcyjne - nieobecne w indeksie nie są tematem pytania (zob. rarest_words)
+QUERY_STOPWORDS = frozenset((
+    "a", "albo", "co", "czy", "czym", "czyli", "dla", "do", "dlaczego", "gdzie", "i", "ile", "jak", "jaka",
+    "jaki", "jakie", "jest", "kiedy", "kim", "kto", "mi", "mnie", "na", "o", "oraz", "po", "powiedz",
+    "opowiedz", "prosze", "proszę", "sa", "są", "sie", "się", "to", "w", "wyjasnij", "wyjaśnij", "z", "za",
+))
+
+
+def tokenize(text: str) -> List[str]:
+    """Dzieli tekst na słowa (małymi literami, bez interpunkcji)."""
+    return _WORD_RE.findall(text.lower())
+
+
+def fold_diacritics(text: str) -> str:
+    """Usuwa znaki diakrytyczne ("świadomość" -> "swiadomosc"), w tym "ł" -> "l"."""
+    text = text.translate(_POLISH_FOLD)
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+
+def trigrams(word: str) -> Set[str]:
+    """Zwraca trigramy znakowe słowa (z dopełnieniem spacjami na brzegach)."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def knowledge_checksum(keys: Iterable[str], k1: float = BM25_K1, b: float = BM25_B) -> str:
+    """Suma kontrolna kluczy bazy wiedzy (w kolejności) i parametrów indeksu - identyfikuje migawkę."""
+    digest = hashlib.sha256(f"{INDEX_SNAPSHOT_VERSION}\0{k1}\0{b}".encode("utf-8"))
+    for key in keys:
+        digest.update(b"\0")
+        digest.update(key.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class KnowledgeIndex:
+    """
+    Indeks BM25 nad kluczami bazy wiedzy (klucz = pytanie/hasło, wartość = odpowiedź).
+    """
+    # Atrybuty zapisywane w migawce (pozostałe to pamięci podręczne odtwarzane przy użyciu)
+    _SNAPSHOT_FIELDS = ("keys", "key_words", "_lengths", "_total_length", "_doc_ids", "_postings",
+                        "_exact", "_exact_folded", "_folded", "_trigrams")
+
+    def __init__(self, knowledge: Dict[str, str], k1: float = BM25_K1, b: float = BM25_B) -> None:
+        """
+        Args:
+            knowledge (Dict[str, str]): Baza wiedzy: klucz -> odpowiedź.
+            k1 (float): Parametr nasycenia częstości słowa BM25.
+            b (float): Parametr normalizacji długości BM25.
+        """
+        self.knowledge = knowledge
+        self.k1 = k1
+        self.b = b
+        # Id kluczy są stałe; usunięty klucz zostawia pustą pozycję (None)
+        self.keys: List[Optional[str]] = []
+        self.key_words: List[FrozenSet[str]] = []
+        self._lengths: List[int] = []
+        self._total_length = 0
+        self._doc_ids: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # Postać klucza (małe litery / bez diakrytyków) -> id kluczy w kolejności dodania
+        self._exact: Dict[str, List[int]] = {}
+        self._exact_folded: Dict[str, List[int]] = {}
+        # Słownik rozmyty: słowo bez diakrytyków -> słowa kluczy, trigram -> słowa bez diakrytyków
+        self._folded: Dict[str, Set[str]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._corrections: Dict[str, Tuple[str, ...]] = {}
+        self._matrix: Optional["_TermMatrix"] = None
+        self._semantic = None
+        for key in knowledge:
+            self._add(key)
+
+    @classmethod
+    def load_or_build(cls, knowledge: Dict[str, str], path: str,
+                      k1: float = BM25_K1, b: float = BM25_B) -> "KnowledgeIndex":
+        """
+        Wczytuje migawkę indeksu, jeśli pasuje do kluczy bazy wiedzy; w przeciwnym razie
+        buduje indeks i zapisuje nową migawkę.
+
+        Args:
+            knowledge (Dict[str, str]): Baza wiedzy: klucz -> odpowiedź.
+            path (str): Ścieżka pliku migawki.
+        """
+        checksum = knowledge_checksum(knowledge, k1, b)
+        index = cls.load_snapshot(path, knowledge, checksum, k1, b)
+        if index is None:
+            index = cls(knowledge, k1, b)
+            index.save_snapshot(path, checksum)
+        return index
+
+    @classmethod
+    def load_snapshot(cls, path: str, knowledge: Dict[str, str], checksum: str,
+                      k1: float = BM25_K1, b: float = BM25_B) -> Optional["KnowledgeIndex"]:
+        """Zwraca indeks z migawki lub None (brak pliku, inna wersja formatu lub suma kontrolna)."""
+        # Wczytanie tworzy miliony małych obiektów - bez GC jest ok. dwa razy szybsze
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[KnowledgeIndex] Uszkodzona migawka {path}: {e}")
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if (not isinstance(snapshot, dict) or snapshot.get("version") != INDEX_SNAPSHOT_VERSION
+                or snapshot.get("checksum") != checksum):
+            return None
+        index = cls.__new__(cls)
+        index.knowledge = knowledge
+        index.k1 = k1
+        index.b = b
+        for name in cls._SNAPSHOT_FIELDS:
+            setattr(index, name, snapshot["state"][name])
+        index._corrections = {}
+        index._matrix = None
+        index._semantic = None
+        return index
+
+    def save_snapshot(self, path: str, checksum: Optional[str] = None) -> bool:
+        """
+        Zapisuje migawkę indeksu (atomowo - plik tymczasowy i podmiana).
+
+        Returns:
+            bool: True, jeśli zapis się powiódł.
+        """
+        if checksum is None:
+            checksum = knowledge_checksum((key for key in self.keys if key is not None), self.k1, self.b)
+        snapshot = {
+            "version": INDEX_SNAPSHOT_VERSION,
+            "checksum": checksum,
+            "state": {name: getattr(self, name) for name in self._SNAPSHOT_FIELDS},
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"[KnowledgeIndex] Nie można zapisać migawki {path}: {e}")
+            return False
+
+    def _add(self, key: str) -> None:
+        """Dodaje klucz do indeksu."""
+        doc_id = len(self.keys)
+        words = tokenize(key)
+        self._doc_ids[key] = doc_id
+        self.keys.append(key)
+        self.key_words.append(frozenset(words))
+        self._lengths.append(len(words))
+        self._total_length += len(words)
+        normalized = key.lower().strip()
+        self._exact.setdefault(normalized, []).append(doc_id)
+        self._exact_folded.setdefault(fold_diacritics(normalized), []).append(doc_id)
+        self._matrix = None
+        for word, tf in Counter(words).items():
+            if word not in self._postings:
+                self._add_vocabulary_word(word)
+            self._postings.setdefault(word, {})[doc_id] = tf
+
+    def _add_vocabulary_word(self, word: str) -> None:
+        """Dodaje nowe słowo do słownika rozmytego."""
+        folded = fold_diacritics(word)
+        if folded not in self._folded:
+            self._folded[folded] = set()
+            for gram in trigrams(folded):
+                self._trigrams.setdefault(gram, set()).add(folded)
+        self._folded[folded].add(word)
+        self._corrections.clear()
+
+    def _remove_vocabulary_word(self, word: str) -> None:
+        """Usuwa słowo, które nie występuje już w żadnym kluczu, ze słownika rozmytego."""
+        folded = fold_diacritics(word)
+        words = self._folded.get(folded)
+        if words is None:
+            return
+        words.discard(word)
+        if not words:
+            del self._folded[folded]
+            for gram in trigrams(folded):
+                grams = self._trigrams.get(gram)
+                if grams is not None:
+                    grams.discard(folded)
+                    if not grams:
+                        del self._trigrams[gram]
+        self._corrections.clear()
+
+    def add(self, key: str) -> int:
+        """
+        Dodaje klucz do indeksu przyrostowo (istniejący klucz pozostaje bez zmian).
+
+        Returns:
+            int: Id klucza.
+        """
+        if key not in self._doc_ids:
+            self._add(key)
+            if self._semantic is not None:
+                self._semantic.add(self._doc_ids[key], key)
+        return self._doc_ids[key]
+
+    def remove(self, key: str) -> bool:
+        """
+        Usuwa klucz z indeksu przyrostowo (listy dokumentów jego słów, dopasowanie dokładne, słownik rozmyty).
+
+        Returns:
+            bool: True, jeśli klucz był w indeksie.
+        """
+        doc_id = self._doc_ids.pop(key, None)
+        if doc_id is None:
+            return False
+        for word in self.key_words[doc_id]:
+            postings = self._postings[word]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[word]
+                self._remove_vocabulary_word(word)
+        normalized = key.lower().strip()
+        for exact, text in ((self._exact, normalized), (self._exact_folded, fold_diacritics(normalized))):
+            ids = exact[text]
+            ids.remove(doc_id)
+            if not ids:
+                del exact[text]
+        self._total_length -= self._lengths[doc_id]
+        self.keys[doc_id] = None
+        self.key_words[doc_id] = frozenset()
+        self._lengths[doc_id] = 0
+        self._matrix = None
+        if self._semantic is not None:
+            self._semantic.remove(doc_id)
+        return True
+
+    def clear_cache(self) -> None:
+        """Czyści pamięć podręczną korekt słów (np. przed pomiarem wydajności)."""
+        self._corrections.clear()
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._doc_ids
+
+    def lookup(self, normalized: str, fold: bool = True) -> Optional[int]:
+        """
+        Zwraca id klucza identycznego z tekstem (małymi literami, bez skrajnych spacji) lub None.
+        Tekst bez polskich znaków też jest dopasowywany ("stala plancka"), chyba że fold=False.
+        """
+        ids = self._exact.get(normalized)
+        if not ids and fold:
+            ids = self._exact_folded.get(fold_diacritics(normalized))
+        return ids[0] if ids else None
+
+    def match_word(self, word: str) -> Tuple[str, ...]:
+        """
+        Dopasowuje słowo zapytania do słów kluczy: dokładnie, po usunięciu diakrytyków
+        lub - dla literówek - najbliższe słowo wg podobieństwa trigramów (Dice).
+
+        Returns:
+            Tuple[str, ...]: Słowa kluczy odpowiadające słowu (puste, gdy brak dopasowania).
+        """
+        if word in self._postings:
+            return (word,)
+        cached = self._corrections.get(word)
+        if cached is not None:
+            return cached
+        folded = fold_diacritics(word)
+        matches: Tuple[str, ...] = ()
+        if folded in self._folded:
+            matches = tuple(sorted(self._folded[folded]))
+        elif len(folded) >= FUZZY_MIN_LENGTH:
+            grams = trigrams(folded)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigrams.get(gram, ()))
+            best, best_similarity = None, FUZZY_MIN_SIMILARITY
+            for candidate, count in shared.items():
+                similarity = 2.0 * count / (len(grams) + len(candidate) + 1)
+                if similarity > best_similarity or (similarity == best_similarity and best is None):
+                    best, best_similarity = candidate, similarity
+            if best is not None:
+                matches = tuple(sorted(self._folded[best]))
+        if len(self._corrections) >= MAX_CACHED_CORRECTIONS:
+            self._corrections.clear()
+        self._corrections[word] = matches
+        return matches
+
+    def correct(self, words: Iterable[str]) -> FrozenSet[str]:
+        """
+        Zamienia słowa zapytania spoza słownika na dopasowane słowa kluczy.
+        Słowa bez dopasowania pozostają bez zmian.
+        """
+        corrected: Set[str] = set()
+        for word in words:
+            corrected.update(self.match_word(word) or (word,))
+        return frozenset(corrected)
+
+    def document_frequency(self, word: str) -> int:
+        """Zwraca liczbę kluczy zawierających słowo."""
+        return len(self._postings.get(word, ()))
+
+    def idf(self, word: str) -> float:
+        """Odwrotna częstość dokumentowa BM25 (zawsze dodatnia)."""
+        n = len(self._doc_ids)
+        df = self.document_frequency(word)
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, words: Iterable[str], k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Zwraca do k najlepszych kluczy dla słów zapytania.
+
+        Args:
+            words (Iterable[str]): Słowa zapytania (małymi literami).
+            k (int): Liczba wyników.
+
+        Returns:
+            List[Tuple[int, float]]: Pary (id klucza, wynik BM25) od najlepszego.
+                Przy równym wyniku wygrywa klucz wcześniejszy w bazie wiedzy.
+        """
+        if not self._doc_ids:
+            return []
+        avg_length = self._total_length / len(self._doc_ids) or 1.0
+        scores: Dict[int, float] = {}
+        for word in set(words):
+            postings = self._postings.get(word)
+            if not postings:
+                continue
+            idf = self.idf(word)
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return best
+
+    def rarest_words(self, words: Iterable[str]) -> FrozenSet[str]:
+        """
+        Zwraca najrzadsze słowa zapytania (najmniejsza częstość dokumentowa, najwyższe idf).
+        Słowa częste ("co", "to", "jest") nie wyznaczają tematu pytania - robi to najrzadsze słowo.
+        Słowo nieobecne w indeksie (także po korekcie) ma częstość 0, więc jest najrzadsze i żaden klucz
+        go nie zawiera; wyjątkiem są słowa pytające i funkcyjne (QUERY_STOPWORDS).
+        """
+        frequencies = {word: self.document_frequency(word) for word in set(words)}
+        frequencies = {word: df for word, df in frequencies.items() if df or word not in QUERY_STOPWORDS}
+        if not frequencies:
+            return frozenset()
+        lowest = min(frequencies.values())
+        return frozenset(word for word, df in frequencies.items() if df == lowest)
+
+    def best_match(self, words: FrozenSet[str], threshold: float, k: int = 5) -> Optional[int]:
+        """
+        Zwraca id najlepszego (wg BM25) spośród k kluczy, którego overlap_score osiąga próg
+        i który zawiera najrzadsze słowo zapytania (`rarest_words`), lub None.
+        Bez tego warunku klucze dzielące z zapytaniem same częste słowa ("co to jest energia"
+        dla "co to jest splątanie" czy "co to jest grawitacja") wygrywałyby z kluczem o właściwym temacie.
+        """
+        if np is not None and len(self) >= MATRIX_MIN_KEYS:
+            return self.best_matches([words], threshold, k)[0]
+        rarest = self.rarest_words(words)
+        if any(word not in self._postings for word in rarest):
+            return None  # temat pytania spoza indeksu
+        for doc_id, _ in self.search(words, k):
+            if self.key_words[doc_id] & rarest and self.overlap_score(words, doc_id) >= threshold:
+                return doc_id
+        return None
+
+    def best_matches(self, queries: Sequence[FrozenSet[str]], threshold: float, k: int = 5) -> List[Optional[int]]:
+        """
+        Wersja wsadowa `best_match`: z NumPy wszystkie zapytania oceniane są mnożeniem
+        rzadkiej macierzy zapytań przez macierz wag BM25 (w blokach), bez NumPy - kolejno.
+        """
+        if np is None or not self._doc_ids:
+            return [self.best_match(words, threshold, k) for words in queries]
+        if self._matrix is None:
+            self._matrix = _TermMatrix(self)
+        return self._matrix.best_matches(queries, threshold, k)
+
+    def scores(self, words: Iterable[str], doc_ids: Iterable[int]) -> Dict[int, float]:
+        """Zwraca wyniki BM25 słów zapytania dla wskazanych kluczy (0 - brak wspólnych słów)."""
+        doc_ids = list(doc_ids)
+        result = dict.fromkeys(doc_ids, 0.0)
+        if not self._doc_ids:
+            return result
+        avg_length = self._total_length / len(self._doc_ids) or 1.0
+        for word in set(words):
+            postings = self._postings.get(word)
+            if not postings:
+                continue
+            idf = self.idf(word)
+            for doc_id in doc_ids:
+                tf = postings.get(doc_id)
+                if tf:
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    result[doc_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return result
+
+    def semantic_match(self, words: FrozenSet[str]) -> Optional[int]:
+        """
+        Drugi etap wyszukiwania: kandydaci z indeksu LSH (podobieństwo n-gramów znakowych)
+        przeszeregowani wynikiem BM25, przy remisie - podobieństwem. None bez NumPy lub bez kandydatów.
+        Indeks semantyczny budowany jest przy pierwszym użyciu i dalej aktualizowany razem z indeksem.
+        """
+        from semantic_index import SEMANTIC_AVAILABLE, SemanticIndex
+        if not SEMANTIC_AVAILABLE or not self._doc_ids:
+            return None
+        if self._semantic is None:
+            semantic = SemanticIndex(weight=self.idf)
+            semantic.add_many((doc_id, key) for key, doc_id in self._doc_ids.items())
+            self._semantic = semantic
+        candidates = self._semantic.candidates(words)
+        if not candidates:
+            return None
+        bm25 = self.scores(words, (doc_id for doc_id, _ in candidates))
+        return max(candidates, key=lambda item: (bm25[item[0]], item[1], -item[0]))[0]
+
+    def overlap_score(self, words: FrozenSet[str], doc_id: int) -> float:
+        """
+        Dotychczasowa miara dopasowania (Jaccard + 0.1 za każde wspólne słowo),
+        używana jako próg pewności odpowiedzi.
+        """
+        key_words = self.key_words[doc_id]
+        overlap = len(words & key_words)
+        return overlap / (len(words | key_words) or 1) + 0.1 * overlap
+
+
+class _TermMatrix:
+    """
+    Skompilowany indeks: rzadka macierz wag BM25 w układzie CSR (wiersz = słowo, kolumny = klucze).
+    Wynik BM25 zapytania to suma wierszy jego słów, czyli iloczyn binarnego wektora zapytania i macierzy;
+    ta sama macierz z wagami 1 daje liczbę wspólnych słów potrzebną do overlap_score.
+    """
+    def __init__(self, index: KnowledgeIndex) -> None:
+        n = len(index.keys)
+        avg_length = index._total_length / len(index._doc_ids) or 1.0
+        lengths = np.asarray(index._lengths, dtype=np.float64)
+        norms = index.k1 * (1.0 - index.b + index.b * lengths / avg_length)
+        self.rows: Dict[str, int] = {}
+        indptr = [0]
+        columns: List[int] = []
+        frequencies: List[int] = []
+        idfs: List[float] = []
+        for word, postings in index._postings.items():
+            self.rows[word] = len(idfs)
+            idfs.append(index.idf(word))
+            columns.extend(postings.keys())
+            frequencies.extend(postings.values())
+            indptr.append(len(columns))
+        self.n_keys = n
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.columns = np.asarray(columns, dtype=np.int64)
+        tf = np.asarray(frequencies, dtype=np.float64)
+        row_idf = np.repeat(np.asarray(idfs, dtype=np.float64), np.diff(self.indptr))
+        self.weights = row_idf * tf * (index.k1 + 1.0) / (tf + norms[self.columns])
+        self.key_sizes = np.asarray([len(words) for words in index.key_words], dtype=np.float64)
+
+    def best_matches(self, queries: Sequence[FrozenSet[str]], threshold: float, k: int) -> List[Optional[int]]:
+        """Ocenia zapytania blokami po MATRIX_BLOCK_QUERIES."""
+        results: List[Optional[int]] = []
+        for start in range(0, len(queries), MATRIX_BLOCK_QUERIES):
+            results.extend(self._block(queries[start:start + MATRIX_BLOCK_QUERIES], threshold, k))
+        return results
+
+    def _block(self, queries: Sequence[FrozenSet[str]], threshold: float, k: int) -> List[Optional[int]]:
+        """Mnoży blok zapytań przez macierz wag i wybiera odpowiedź dla każdego zapytania."""
+        query_rows: List[int] = []
+        term_rows: List[int] = []
+        rare_rows: List[bool] = []
+        sizes = np.empty(len(queries), dtype=np.float64)
+        for position, words in enumerate(queries):
+            sizes[position] = len(words)
+            rows = [row for row in (self.rows.get(word) for word in words) if row is not None]
+            if not rows or any(word not in self.rows and word not in QUERY_STOPWORDS for word in words):
+                continue  # temat pytania spoza indeksu (jak KnowledgeIndex.rarest_words) - brak odpowiedzi
+            # Najrzadsze słowa zapytania (jak KnowledgeIndex.rarest_words): wiersze o najkrótszej liście kluczy
+            frequencies = [int(self.indptr[row + 1] - self.indptr[row]) for row in rows]
+            lowest = min(frequencies)
+            query_rows.extend([position] * len(rows))
+            term_rows.extend(rows)
+            rare_rows.extend(df == lowest for df in frequencies)
+        results: List[Optional[int]] = [None] * len(queries)
+        if not term_rows:
+            return results
+        # Iloczyn macierzy rzadkich: rozwinięcie wierszy słów każdego zapytania i sumowanie
+        # wag w niezerowych komórkach (zapytanie, klucz) - bez gęstej macierzy wyników
+        term_rows_array = np.asarray(term_rows, dtype=np.int64)
+        starts = self.indptr[term_rows_array]
+        counts = self.indptr[term_rows_array + 1] - starts
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        entries = np.repeat(starts, counts) + offsets
+        cells = np.repeat(np.asarray(query_rows, dtype=np.int64), counts) * self.n_keys + self.columns[entries]
+        cells, inverse = np.unique(cells, return_inverse=True)
+        scores = np.bincount(inverse, weights=self.weights[entries], minlength=cells.size)
+        common = np.bincount(inverse, minlength=cells.size).astype(np.float64)
+        rare = np.bincount(inverse, weights=np.repeat(np.asarray(rare_rows, dtype=np.float64), counts),
+                           minlength=cells.size) > 0
+        query, doc = np.divmod(cells, self.n_keys)
+
+        # Kolejność jak w KnowledgeIndex.search: zapytanie, malejący wynik, przy remisie niższe id klucza
+        order = np.lexsort((doc, -scores, query))
+        query, doc, common, rare = query[order], doc[order], common[order], rare[order]
+        group_starts = np.flatnonzero(np.r_[True, query[1:] != query[:-1]])
+        rank = np.arange(query.size) - np.repeat(group_starts, np.diff(np.r_[group_starts, query.size]))
+        union = sizes[query] + self.key_sizes[doc] - common
+        confidence = common / np.maximum(union, 1.0) + 0.1 * common
+        passed = np.flatnonzero((rank < k) & rare & (confidence >= threshold))
+        # Pierwszy spełniający próg w każdej grupie to najlepiej oceniony kandydat
+        answered, first = np.unique(query[passed], return_index=True)
+        for position, doc_id in zip(answered.tolist(), doc[passed[first]].tolist()):
+            results[position] = doc_id
+        return results
@@ -0,0 +1,337 @@
+"""
+knowledge_packs.py
+------------------
+Pakiety wiedzy na dysku - rozszerzenie BASIC_KNOWLEDGE bez zmian w kodzie.
+Pakiet to plik SQLite (*.nqpack) z tabelą wpisów (klucz -> odpowiedź), indeksem dokładnych kluczy
+i indeksem pełnotekstowym FTS5 (ranking BM25). Plik jest otwierany tylko do odczytu i mapowany w pamięć
+(PRAGMA mmap_size), więc pakiet z milionami wpisów nie jest wczytywany do RAM.
+Instalacja: skopiuj plik .nqpack do jednego z katalogów KNOWLEDGE_PACK_DIRS (lub `install_pack`);
+nowe pakiety wykrywane są w trakcie działania.
+
+Budowa pakietu z pliku JSON ({klucz: odpowiedź}) lub JSONL ({"key": ..., "answer": ...} w wierszu):
+    python knowledge_packs.py build wiedza.jsonl fizyka.nqpack --name fizyka
+    python knowledge_packs.py install fizyka.nqpack
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from knowledge_index import fold_diacritics, tokenize
+
+PACK_EXTENSION = ".nqpack"
+PACK_FORMAT_VERSION = 1
+KNOWLEDGE_PACK_DIRS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_packs"),
+    "/data/data/org.test.neuroquantumai/files/knowledge_packs",
+    os.path.join(os.path.expanduser("~"), "NeuroQuantumAI_knowledge_packs"),
+]
+# Co ile sekund sprawdzać katalogi pakietów (nowe / usunięte pliki)
+PACK_RESCAN_INTERVAL = 5.0
+# Rozmiar mapowania pliku pakietu w pamięć (bajty) i pamięci podręcznej stron SQLite (KiB)
+PACK_MMAP_SIZE = 256 * 1024 * 1024
+PACK_CACHE_KIB = 2048
+BUILD_BATCH_SIZE = 10000
+# Słowa występujące w większej liczbie kluczy są pomijane w wyszukiwaniu (niska wartość, wysoki koszt)
+PACK_MAX_TERM_KEYS = 20000
+
+
+def _normalize(text: str) -> str:
+    return text.lower().strip()
+
+
+def _read_source(path: str) -> Iterator[Tuple[str, str]]:
+    """Czyta pary (klucz, odpowiedź) z JSON-a (słownik) lub JSONL (strumieniowo)."""
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield entry["key"], entry["answer"]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f).items()
+
+
+def build_pack(path: str, entries: Iterable[Tuple[str, str]], name: Optional[str] = None) -> int:
+    """
+    Buduje plik pakietu wiedzy.
+
+    Args:
+        path (str): Ścieżka pliku wynikowego (istniejący plik jest zastępowany).
+        entries (Iterable[Tuple[str, str]]): Pary (klucz, odpowiedź); mogą być generatorem.
+        name (Optional[str]): Nazwa pakietu (domyślnie nazwa pliku).
+
+    Returns:
+        int: Liczba zapisanych wpisów.
+    """
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    count = 0
+    try:
+        conn.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE entries (id INTEGER PRIMARY KEY, key TEXT NOT NULL, normalized TEXT NOT NULL,
+                                  folded TEXT NOT NULL, answer TEXT NOT NULL);
+        """)
+        batch = []
+        for key, answer in entries:
+            normalized = _normalize(key)
+            batch.append((key, normalized, fold_diacritics(" ".join(tokenize(normalized))), answer))
+            if len(batch) >= BUILD_BATCH_SIZE:
+                conn.executemany("INSERT INTO entries (key, normalized, folded, answer) VALUES (?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany("INSERT INTO entries (key, normalized, folded, answer) VALUES (?, ?, ?, ?)", batch)
+            count += len(batch)
+        conn.execute("CREATE INDEX entries_normalized ON entries (normalized)")
+        conn.execute("CREATE INDEX entries_folded ON entries (folded)")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE entries_fts USING fts5("
+                         "folded, content='entries', content_rowid='id')")
+            conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+            # Liczba kluczy na słowo zapisana w pakiecie (fts5vocab liczy ją, przechodząc listy dokumentów)
+            conn.execute("CREATE VIRTUAL TABLE temp.entries_vocab USING fts5vocab(main, entries_fts, row)")
+            conn.execute("CREATE TABLE terms (term TEXT PRIMARY KEY, keys INTEGER NOT NULL) WITHOUT ROWID")
+            conn.execute("INSERT INTO terms SELECT term, doc FROM temp.entries_vocab")
+        except sqlite3.OperationalError as e:
+            print(f"[KnowledgePacks] FTS5 niedostępne ({e}) - pakiet obsłuży tylko dokładne klucze")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("format", "nqpack"), ("version", str(PACK_FORMAT_VERSION)),
+            ("name", name), ("entries", str(count)),
+        ])
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+class KnowledgePack:
+    """
+    Otwarty (tylko do odczytu) pakiet wiedzy. Bezpieczny wątkowo - zapytanie do pakietu zamkniętego
+    w międzyczasie (plik zmieniony lub usunięty, np. przez `install`) zwraca brak wyniku zamiast błędu.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Ścieżka pliku .nqpack.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._closed = False
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size = {PACK_MMAP_SIZE}")
+        self._conn.execute(f"PRAGMA cache_size = -{PACK_CACHE_KIB}")
+        meta = dict(self._conn.execute("SELECT name, value FROM meta"))
+        if meta.get("format") != "nqpack" or int(meta.get("version", 0)) > PACK_FORMAT_VERSION:
+            self._conn.close()
+            raise ValueError(f"Nieobsługiwany pakiet wiedzy: {path}")
+        self.name = meta.get("name", os.path.basename(path))
+        self.entries = int(meta.get("entries", 0))
+        self.has_fts = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'").fetchone() is not None
+
+    def lookup(self, normalized: str) -> Optional[str]:
+        """Zwraca odpowiedź dla klucza identycznego z tekstem (także bez polskich znaków) lub None."""
+        folded = fold_diacritics(" ".join(tokenize(normalized)))
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._conn.execute("SELECT answer FROM entries WHERE normalized = ? LIMIT 1",
+                                     (normalized,)).fetchone()
+            if row is None:
+                row = self._conn.execute("SELECT answer FROM entries WHERE folded = ? LIMIT 1",
+                                         (folded,)).fetchone()
+        return row[0] if row else None
+
+    def search(self, words: Iterable[str], threshold: float, k: int = 5) -> Optional[str]:
+        """
+        Zwraca odpowiedź najlepszego (BM25 z FTS5) spośród k kluczy, którego miara dopasowania
+        (Jaccard + 0.1 za wspólne słowo, jak w KnowledgeIndex) osiąga próg, lub None.
+        Słowa obecne w więcej niż PACK_MAX_TERM_KEYS kluczach nie wybierają kandydatów.
+        """
+        if not self.has_fts:
+            return None
+        folded = frozenset(fold_diacritics(word) for word in words)
+        if not folded:
+            return None
+        with self._lock:
+            if self._closed:
+                return None
+            selective = [word for word in sorted(folded) if self._term_keys(word) <= PACK_MAX_TERM_KEYS]
+            if not selective:
+                return None
+            query = " OR ".join('"' + word.replace('"', '""') + '"' for word in selective)
+            rows = self._conn.execute(
+                "SELECT e.folded, e.answer FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+                "WHERE entries_fts MATCH ? ORDER BY bm25(entries_fts), e.id LIMIT ?", (query, k)).fetchall()
+        for key_folded, answer in rows:
+            key_words = frozenset(key_folded.split())
+            overlap = len(folded & key_words)
+            if overlap / (len(folded | key_words) or 1) + 0.1 * overlap >= threshold:
+                return answer
+        return None
+
+    def terms(self, words: Iterable[str]) -> FrozenSet[str]:
+        """Zwraca słowa (w podanej pisowni), które występują w kluczach pakietu (także bez polskich znaków)."""
+        if not self.has_fts:
+            return frozenset()
+        with self._lock:
+            if self._closed:
+                return frozenset()
+            return frozenset(word for word in set(words) if self._term_keys(fold_diacritics(word)))
+
+    def _term_keys(self, word: str) -> int:
+        """Liczba kluczy zawierających słowo (wywoływane pod blokadą)."""
+        row = self._conn.execute("SELECT keys FROM terms WHERE term = ?", (word,)).fetchone()
+        return row[0] if row else 0
+
+    def close(self) -> None:
+        """Zamyka pakiet (po zakończeniu trwającego zapytania); kolejne zapytania zwracają None."""
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+
+
+class KnowledgePacks:
+    """
+    Zestaw zainstalowanych pakietów wiedzy wykrywanych w katalogach pakietów.
+    """
+    def __init__(self, directories: Optional[List[str]] = None,
+                 rescan_interval: float = PACK_RESCAN_INTERVAL) -> None:
+        """
+        Args:
+            directories (Optional[List[str]]): Katalogi z plikami .nqpack (domyślnie KNOWLEDGE_PACK_DIRS).
+            rescan_interval (float): Minimalny odstęp między sprawdzeniami katalogów (sekundy).
+        """
+        self.directories = list(directories) if directories is not None else list(KNOWLEDGE_PACK_DIRS)
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._packs: Dict[str, Tuple[float, KnowledgePack]] = {}
+        self._last_scan = None
+        self._version = 0
+
+    def packs(self) -> List[KnowledgePack]:
+        """Zwraca otwarte pakiety (w kolejności nazw plików), sprawdzając katalogi co rescan_interval."""
+        now = time.monotonic()
+        with self._lock:
+            if self._last_scan is None or now - self._last_scan >= self.rescan_interval:
+                self._last_scan = now
+                self._scan()
+            return [pack for _, (_, pack) in sorted(self._packs.items())]
+
+    def _scan(self) -> None:
+        """Otwiera nowe lub zmienione pakiety i zamyka usunięte (wywoływane pod blokadą)."""
+        found = {}
+        for directory in self.directories:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for filename in names:
+                if filename.endswith(PACK_EXTENSION):
+                    path = os.path.join(directory, filename)
+                    try:
+                        found.setdefault(path, os.path.getmtime(path))
+                    except OSError:
+                        pass
+        for path in list(self._packs):
+            mtime, pack = self._packs[path]
+            if found.get(path) != mtime:
+                pack.close()
+                del self._packs[path]
+                self._version += 1
+        for path, mtime in found.items():
+            if path not in self._packs:
+                try:
+                    pack = KnowledgePack(path)
+                    self._packs[path] = (mtime, pack)
+                    self._version += 1
+                    print(f"[KnowledgePacks] Załadowano pakiet {pack.name} ({pack.entries} wpisów)")
+                except (sqlite3.Error, ValueError) as e:
+                    print(f"[KnowledgePacks] Pominięto {path}: {e}")
+
+    def version(self) -> int:
+        """Licznik zmian zestawu pakietów (dodanie, zmiana lub usunięcie pliku) - sprawdza katalogi jak `packs`."""
+        self.packs()
+        return self._version
+
+    def lookup(self, normalized: str) -> Optional[str]:
+        """Szuka klucza identycznego z tekstem we wszystkich pakietach."""
+        for pack in self.packs():
+            answer = pack.lookup(normalized)
+            if answer is not None:
+                return answer
+        return None
+
+    def terms(self, words: Iterable[str]) -> FrozenSet[str]:
+        """Zwraca słowa występujące w kluczach któregokolwiek pakietu."""
+        words = frozenset(words)
+        found: FrozenSet[str] = frozenset()
+        for pack in self.packs():
+            found |= pack.terms(words - found)
+        return found
+
+    def search(self, words: Iterable[str], threshold: float, k: int = 5) -> Optional[str]:
+        """Zwraca pierwszą odpowiedź z pakietów, która osiąga próg dopasowania."""
+        words = frozenset(words)
+        for pack in self.packs():
+            answer = pack.search(words, threshold, k)
+            if answer is not None:
+                return answer
+        return None
+
+    def install(self, source: str) -> str:
+        """
+        Kopiuje plik pakietu do pierwszego zapisywalnego katalogu pakietów.
+
+        Returns:
+            str: Ścieżka zainstalowanego pakietu.
+        """
+        KnowledgePack(source).close()  # weryfikacja formatu
+        for directory in self.directories:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                target = os.path.join(directory, os.path.basename(source))
+                shutil.copyfile(source, target + ".tmp")
+                os.replace(target + ".tmp", target)
+            except OSError:
+                continue
+            with self._lock:
+                self._last_scan = None
+            return target
+        raise OSError("Brak zapisywalnego katalogu pakietów wiedzy")
+
+
+# Globalny zestaw pakietów używany przez bazę wiedzy
+knowledge_packs = KnowledgePacks()
+
+
+def install_pack(source: str) -> str:
+    """Instaluje pakiet wiedzy w globalnym zestawie (patrz `KnowledgePacks.install`)."""
+    return knowledge_packs.install(source)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) >= 3 and args[0] == "build":
+        pack_name = args[4] if len(args) >= 5 and args[3] == "--name" else None
+        total = build_pack(args[2], _read_source(args[1]), pack_name)
+        print(f"[KnowledgePacks] Zbudowano {args[2]}: {total} wpisów")
+    elif len(args) == 2 and args[0] == "install":
+        print(f"[KnowledgePacks] Zainstalowano: {install_pack(args[1])}")
+    else:
+        print(__doc__)
@@ -0,0 +1,153 @@
+"""
+latency_metrics.py
+------------------
+Pomiary czasu przetwarzania wiadomości przez AIEngine.
+Dla każdego nazwanego etapu (baza wiedzy, sieć, synapsy, moduły dynamiczne, fact-check, komendy)
+prowadzony jest histogram opóźnień, a najwolniejsze żądania zapamiętywane są wraz z rozbiciem na etapy.
+"""
+
+import bisect
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Górne granice przedziałów histogramu (milisekundy); ostatni przedział jest otwarty
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000)
+DEFAULT_SLOW_REQUESTS = 20
+
+
+class LatencyHistogram:
+    """
+    Histogram opóźnień o stałych, logarytmicznie rozłożonych przedziałach.
+    """
+    def __init__(self, bounds_ms=BUCKET_BOUNDS_MS) -> None:
+        """
+        Args:
+            bounds_ms: Rosnące górne granice przedziałów w milisekundach.
+        """
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Dodaje pomiar (w sekundach)."""
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        """
+        Zwraca przybliżony percentyl (górną granicę przedziału, nie więcej niż maksimum) w milisekundach.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(p / 100.0 * self.count)))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self.bounds_ms):
+                    return min(float(self.bounds_ms[index]), self.max_ms)
+                return self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Zwraca podsumowanie histogramu: liczba, średnia, p50, p90, p99, maksimum i przedziały."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p90_ms": round(self.percentile(90), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {(f"<={bound}" if i < len(self.bounds_ms) else f">{self.bounds_ms[-1]}"): n
+                        for i, (bound, n) in enumerate(zip(self.bounds_ms + (None,), self.counts)) if n},
+        }
+
+
+class LatencyRecorder:
+    """
+    Zbiera histogramy opóźnień etapów i listę najwolniejszych żądań. Bezpieczny wątkowo.
+    """
+    def __init__(self, slow_requests: int = DEFAULT_SLOW_REQUESTS) -> None:
+        """
+        Args:
+            slow_requests (int): Ile najwolniejszych żądań przechowywać.
+        """
+        self.slow_requests = slow_requests
+        self._lock = threading.Lock()
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._requests = LatencyHistogram()
+        self._slowest: List[tuple] = []  # kopiec minimalny (czas, numer, wpis)
+        self._counter = itertools.count()
+
+    def record(self, text: str, total: float, timings: Dict[str, float]) -> None:
+        """
+        Zapisuje pomiar jednego żądania.
+
+        Args:
+            text (str): Tekst użytkownika (w logu wolnych żądań skracany do 80 znaków).
+            total (float): Całkowity czas przetwarzania (sekundy).
+            timings (Dict[str, float]): Czas każdego etapu (sekundy).
+        """
+        with self._lock:
+            self._requests.add(total)
+            for name, seconds in timings.items():
+                histogram = self._stages.get(name)
+                if histogram is None:
+                    histogram = self._stages[name] = LatencyHistogram()
+                histogram.add(seconds)
+            if len(self._slowest) < self.slow_requests or total > self._slowest[0][0]:
+                entry = {
+                    "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "text": text[:80],
+                    "total_ms": round(total * 1000.0, 3),
+                    "stages_ms": {name: round(seconds * 1000.0, 3)
+                                  for name, seconds in sorted(timings.items(), key=lambda item: -item[1])},
+                }
+                item = (total, next(self._counter), entry)
+                if len(self._slowest) < self.slow_requests:
+                    heapq.heappush(self._slowest, item)
+                else:
+                    heapq.heapreplace(self._slowest, item)
+
+    def slowest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Zwraca najwolniejsze żądania, od najwolniejszego."""
+        with self._lock:
+            entries = [entry for _, _, entry in sorted(self._slowest, key=lambda item: -item[0])]
+        return entries[:limit] if limit is not None else entries
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Zwraca histogram całych żądań, histogramy etapów i listę najwolniejszych żądań."""
+        with self._lock:
+            metrics = {
+                "requests": self._requests.to_dict(),
+                "stages": {name: histogram.to_dict() for name, histogram in sorted(self._stages.items())},
+            }
+        metrics["slow_requests"] = self.slowest()
+        return metrics
+
+    def report(self, slow_limit: int = 5) -> str:
+        """
+        Zwraca czytelny raport: p50/p99/max dla każdego etapu i najwolniejsze żądania.
+        """
+        metrics = self.get_metrics()
+        requests = metrics["requests"]
+        lines = [f"⏱️ Wydajność: {requests['count']} żądań, p50 {requests['p50_ms']} ms, "
+                 f"p99 {requests['p99_ms']} ms, max {requests['max_ms']} ms"]
+        for name, stage in sorted(metrics["stages"].items(), key=lambda item: -item[1]["p99_ms"]):
+            lines.append(f"- {name}: n={stage['count']}, p50 {stage['p50_ms']} ms, "
+                         f"p99 {stage['p99_ms']} ms, max {stage['max_ms']} ms")
+        slowest = metrics["slow_requests"][:slow_limit]
+        if slowest:
+            lines.append("🐢 Najwolniejsze żądania:")
+            for entry in slowest:
+                top = ", ".join(f"{name} {ms} ms" for name, ms in list(entry["stages_ms"].items())[:3])
+                lines.append(f"- {entry['total_ms']} ms [{entry['time']}] \"{entry['text']}\" ({top})")
+        return "\n".join(lines)
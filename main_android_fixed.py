@@ -6,11 +6,26 @@ Obsługuje: telefon, samomodyfikację, dynamiczne moduły, bazę wiedzy, pamię
 
 import os
 import sys
+import threading
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
 from kivy.clock import Clock
 from kivy.logger import Logger
 from kivy.utils import platform
+from intent_classifier import classify_intent
+
+# Ikony odpowiedzi wg kategorii intencji (pierwsze dopasowanie wygrywa)
+RESPONSE_ICONS = [
+    ("icon.camera", "📸"),
+    ("icon.location", "📍"),
+    ("icon.sms", "💬"),
+    ("icon.call", "📞"),
+    ("icon.modify", "🔧"),
+    ("icon.module", "⚙️"),
+    ("icon.status", "�"),
+    ("icon.science", "🔬"),
+]
 
 # Android-specific imports
 if platform == 'android':
@@ -41,7 +56,7 @@ except ImportError as e:
         Logger.error(f"MAIN: Wszystkie AIEngine imports failed: {e2}")
         # Awaryjny AIEngine
         class AIEngine:
-            def __init__(self):
+            def __init__(self, **kwargs):
                 Logger.warning("MAIN: Używam awaryjnego AIEngine")
             
             def process_input(self, text):
@@ -57,7 +72,13 @@ class ChatBox(BoxLayout):
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.engine = AIEngine()
+        try:
+            # Szybki start - sondy środowiska (katalogi, status telefonu) i fact-checking w tle
+            self.engine = AIEngine(fast_start=True, background_fact_check=True)
+        except TypeError:
+            self.engine = AIEngine()
+        if hasattr(self.engine, "on_annotation"):
+            self.engine.on_annotation(self._on_annotation)
         Logger.info("ChatBox: AIEngine zainicjalizowany")
         
         # Pokaż status AI przy starcie
@@ -120,33 +141,21 @@ class ChatBox(BoxLayout):
         
         # Dodaj wiadomość użytkownika do logu
         self.ids.chat_log.text += f"\n\n👤 TY: {user_text}"
+
+        # Wyczyść pole input
+        self.ids.user_input.text = ""
+
+        # === STRUMIENIOWANIE - fragmenty odpowiedzi pojawiają się, gdy gotowe są kolejne etapy ===
+        if hasattr(self.engine, "process_input_stream"):
+            threading.Thread(target=self._stream_response, args=(user_text,), daemon=True).start()
+            return
         
         try:
             # === GŁÓWNE PRZETWARZANIE PRZEZ AI ENGINE ===
             response = self.engine.process_input(user_text)
             
             # === FORMATOWANIE ODPOWIEDZI ===
-            # Sprawdź typ komendy i dodaj ikony
-            user_lower = user_text.lower()
-            
-            if any(kw in user_lower for kw in ["zrób zdjęcie", "foto", "camera", "kamera"]):
-                icon = "📸"
-            elif any(kw in user_lower for kw in ["lokalizacja", "gps", "gdzie"]):
-                icon = "📍"
-            elif any(kw in user_lower for kw in ["sms", "wiadomość"]):
-                icon = "💬"
-            elif any(kw in user_lower for kw in ["zadzwoń", "call", "telefon"]):
-                icon = "📞"
-            elif any(kw in user_lower for kw in ["modyfikuj", "edytuj", "zmień kod"]):
-                icon = "🔧"
-            elif any(kw in user_lower for kw in ["utwórz moduł", "nowy moduł"]):
-                icon = "⚙️"
-            elif any(kw in user_lower for kw in ["status", "info", "informacje"]):
-                icon = "�"
-            elif any(kw in user_lower for kw in ["fizyka", "kwant", "nauka"]):
-                icon = "🔬"
-            else:
-                icon = "🤖"
+            icon = self._response_icon(user_text)
                 
             # Dodaj odpowiedź AI do logu
             self.ids.chat_log.text += f"\n{icon} AI: {response}"
@@ -157,11 +166,62 @@ class ChatBox(BoxLayout):
             traceback.print_exc()
             error_response = f"❌ Błąd przetwarzania: {str(e)}\n\nAI dalej działa, spróbuj ponownie."
             self.ids.chat_log.text += f"\n🤖 AI: {error_response}"
-
-        # Wyczyść pole input
-        self.ids.user_input.text = ""
         
         Logger.info("ChatBox: Message processed successfully")
+
+    def _stream_response(self, user_text):
+        """
+        Odbiera fragmenty odpowiedzi w wątku tła i dopisuje je do logu w wątku UI.
+        """
+        first = True
+        try:
+            for fragment in self.engine.process_input_stream(user_text):
+                if first:
+                    line = f"\n{self._response_icon(user_text)} AI: {fragment}"
+                    first = False
+                else:
+                    line = f"\n{fragment}"
+                Clock.schedule_once(lambda dt, line=line: self._append_to_log(line))
+            Logger.info("ChatBox: Message processed successfully")
+        except Exception as e:
+            Logger.error(f"ChatBox: AI processing error: {e}")
+            import traceback
+            traceback.print_exc()
+            error_response = f"❌ Błąd przetwarzania: {str(e)}\n\nAI dalej działa, spróbuj ponownie."
+            Clock.schedule_once(lambda dt: self._append_to_log(f"\n🤖 AI: {error_response}"))
+
+    def _append_to_log(self, text):
+        """Dopisuje tekst do logu czatu (wywoływane w wątku UI)."""
+        self.ids.chat_log.text += text
+
+    def on_input_text(self, text):
+        """Podpowiedzi z bazy wiedzy podczas pisania - przyciski nad polem wiadomości (on_text w .kv)."""
+        row = self.ids.get("suggestions")
+        if row is None:
+            return
+        row.clear_widgets()
+        suggest = getattr(self.engine, "suggest", None)
+        if suggest is None or not text.strip():
+            return
+        for key in suggest(text, 3):
+            button = Button(text=key, font_size='13sp', shorten=True)
+            button.bind(on_press=lambda button: self._use_suggestion(button.text))
+            row.add_widget(button)
+
+    def _use_suggestion(self, key):
+        """Wstawia wybraną podpowiedź do pola wiadomości."""
+        self.ids.user_input.text = key
+        self.ids.user_input.focus = True
+
+    def _on_annotation(self, job_id, user_text, annotation):
+        """Spóźniona adnotacja fact-checkingu (wątek tła) - dopisywana do logu w wątku UI."""
+        line = f"\n\n🔎 Fact-check „{user_text[:40]}”:\n{annotation}"
+        Clock.schedule_once(lambda dt: self._append_to_log(line))
+
+    def _response_icon(self, user_text):
+        """Dobiera ikonę odpowiedzi - intencja współdzielona z silnikiem."""
+        intent = getattr(self.engine, "last_intent", None) or classify_intent(user_text)
+        return next((icon for category, icon in RESPONSE_ICONS if intent.matches(category)), "🤖")
     
     def send(self):
         """Alias dla kompatybilności z .kv"""
@@ -208,11 +268,22 @@ class NeuroQuantumAIApp(App):
 
     def on_pause(self):
         """
-        Obsługa pauzowania aplikacji
+        Obsługa pauzowania aplikacji - zapis odroczonych zmian stanu AI
         """
         Logger.info("App: Application paused")
+        flush = getattr(self.root.engine, "flush", None)
+        if flush:
+            flush(timeout=2.0)
         return True
 
+    def on_stop(self):
+        """
+        Obsługa zamknięcia aplikacji
+        """
+        shutdown = getattr(self.root.engine, "shutdown", None)
+        if shutdown:
+            shutdown()
+
     def on_resume(self):
         """
         Obsługa wznawiania aplikacji
@@ -4,9 +4,13 @@ main.py
 Główny plik uruchamiający aplikację neuronowo-kwantowej AI z interfejsem Kivy.
 """
 
+import threading
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
 from AIEngine import AIEngine  # Centralny mózg AI
+from intent_classifier import classify_intent
 
 class ChatBox(BoxLayout):
     """
@@ -14,7 +18,9 @@ class ChatBox(BoxLayout):
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.engine = AIEngine()  # Inicjalizacja silnika AI
+        # Inicjalizacja silnika AI (sondy startowe i fact-checking w tle)
+        self.engine = AIEngine(fast_start=True, background_fact_check=True)
+        self.engine.on_annotation(self._on_annotation)
 
     def send_message(self):
         """
@@ -23,25 +29,66 @@ class ChatBox(BoxLayout):
         user_text = self.ids.user_input.text.strip()
         if not user_text:
             return
-        try:
-            # === Przetwarzanie wiadomości przez AIEngine ===
-            response = self.engine.process_input(user_text)
-            
-            # === Sprawdź czy to komenda telefonu/samomodyfikacji ===
-            phone_keywords = ["zrób zdjęcie", "lokalizacja", "sms", "bateria", "wifi"]
-            mod_keywords = ["modyfikuj", "utwórz moduł", "dodaj funkcję"]
-            
-            if any(kw in user_text.lower() for kw in phone_keywords):
-                response = "📱 " + response
-            elif any(kw in user_text.lower() for kw in mod_keywords):
-                response = "🔧 " + response
-                
-        except Exception as e:
-            response = f"❌ [Błąd AI] {e}"
 
         # === Aktualizacja interfejsu z kolorami ===
-        self.ids.chat_log.text += f"\n👤 User: {user_text}\n🤖 AI: {response}\n{'-'*50}"
+        self.ids.chat_log.text += f"\n👤 User: {user_text}\n🤖 AI: "
         self.ids.user_input.text = ""
+
+        # === Przetwarzanie wiadomości przez AIEngine - odpowiedź strumieniowana w tle ===
+        threading.Thread(target=self._stream_response, args=(user_text,), daemon=True).start()
+
+    def _stream_response(self, user_text):
+        """
+        Odbiera fragmenty odpowiedzi w wątku tła i dopisuje je do logu w wątku UI.
+        """
+        first = True
+        try:
+            for fragment in self.engine.process_input_stream(user_text):
+                if first:
+                    # === Sprawdź czy to komenda telefonu/samomodyfikacji ===
+                    # Intencja sklasyfikowana przez silnik jest współdzielona z interfejsem
+                    intent = getattr(self.engine, "last_intent", None) or classify_intent(user_text)
+                    if intent.matches("ui.phone"):
+                        fragment = "📱 " + fragment
+                    elif intent.matches("ui.self_mod"):
+                        fragment = "🔧 " + fragment
+                    text = fragment
+                    first = False
+                else:
+                    text = "\n" + fragment
+                Clock.schedule_once(lambda dt, text=text: self._append_to_log(text))
+        except Exception as e:
+            error_text = f"❌ [Błąd AI] {e}"
+            Clock.schedule_once(lambda dt: self._append_to_log(error_text))
+        Clock.schedule_once(lambda dt: self._append_to_log(f"\n{'-'*50}"))
+
+    def _append_to_log(self, text):
+        """Dopisuje tekst do logu czatu (wywoływane w wątku UI)."""
+        self.ids.chat_log.text += text
+
+    def on_input_text(self, text):
+        """Podpowiedzi z bazy wiedzy podczas pisania - przyciski nad polem wiadomości (on_text w .kv)."""
+        row = self.ids.get("suggestions")
+        if row is None:
+            return
+        row.clear_widgets()
+        suggest = getattr(self.engine, "suggest", None)
+        if suggest is None or not text.strip():
+            return
+        for key in suggest(text, 3):
+            button = Button(text=key, font_size=14, shorten=True)
+            button.bind(on_press=lambda button: self._use_suggestion(button.text))
+            row.add_widget(button)
+
+    def _use_suggestion(self, key):
+        """Wstawia wybraną podpowiedź do pola wiadomości."""
+        self.ids.user_input.text = key
+        self.ids.user_input.focus = True
+
+    def _on_annotation(self, job_id, user_text, annotation):
+        """Spóźniona adnotacja fact-checkingu (wątek tła) - dopisywana do logu w wątku UI."""
+        text = f"\n🔎 Fact-check „{user_text[:40]}”:\n{annotation}\n{'-'*50}"
+        Clock.schedule_once(lambda dt: self._append_to_log(text))
     
     # Alias dla kompatybilności z .kv
     def send(self):
@@ -54,5 +101,14 @@ class NeuroQuantumAIApp(App):
     def build(self):
         return ChatBox()
 
+    def on_pause(self):
+        """Przed pauzą (Android) zapisuje odroczone zmiany stanu AI."""
+        self.root.engine.flush(timeout=2.0)
+        return True
+
+    def on_stop(self):
+        """Przy zamknięciu zapisuje odroczone zmiany stanu AI."""
+        self.root.engine.shutdown()
+
 if __name__ == "__main__":
     NeuroQuantumAIApp().run()
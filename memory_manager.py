@@ -1,11 +1,20 @@
 
+from conversation_store import conversation_store
+
 def manage_memory(user_text: str, response: str) -> None:
     """
-    Dodaje interakcję użytkownika i AI do pliku ai_memory.txt jako prostą pamięć rozmów.
+    Dodaje interakcję użytkownika i AI do magazynu rozmów (conversation_store) jako prostą pamięć rozmów.
+    """
+    manage_memory_batch([(user_text, response)])
+
+def manage_memory_batch(exchanges) -> None:
+    """
+    Dopisuje wiele interakcji (pary tekst użytkownika, odpowiedź) do magazynu rozmów jedną transakcją.
     """
+    if not exchanges:
+        return
     try:
-        with open("ai_memory.txt", "a", encoding="utf-8") as f:
-            f.write(f"[Ty] {user_text}\n[AI] {response}\n")
+        conversation_store.append_many({"user": user_text, "assistant": response} for user_text, response in exchanges)
     except Exception as e:
         print(f"[Memory] Błąd zapisu pamięci: {e}")
 
@@ -14,35 +23,292 @@ memory_manager.py
 Moduł zarządzający długoterminową pamięcią AI. Pozwala na aktualizację i przywoływanie wspomnień.
 """
 
+import hashlib
+import json
+import math
+import os
 import random
+import threading
+from array import array
+
+LONG_MEMORY_FILE = "long_memory.txt"
+# Punkt kontrolny konsolidacji: id ostatniej wymiany z magazynu rozmów, z której wspomnienia zostały już przetworzone
+LONG_MEMORY_CHECKPOINT = "long_memory.checkpoint.json"
+# Trwały zbiór skrótów (uint64) wspomnień zapisanych w long_memory.txt - deduplikacja bez czytania pliku
+LONG_MEMORY_HASHES = "long_memory.hashes"
+# Indeks pozycji: offsety bajtowe (uint64) kolejnych wspomnień long_memory.txt i na końcu offset
+# końca zaindeksowanej części pliku; obok - ważność wspomnień (uint8, 1-255)
+LONG_MEMORY_INDEX = "long_memory.idx"
+LONG_MEMORY_IMPORTANCE = "long_memory.importance"
+LONG_MEMORY_HEADER = "# Kluczowe wspomnienia:\n"
+# Minimalna długość tekstu uznawanego za kluczowe wspomnienie
+MIN_MEMORY_LENGTH = 30
+# Przywoływanie ważone świeżością: waga wspomnienia maleje o połowę co tyle nowszych wspomnień
+RECALL_HALF_LIFE = 200
+# Limit losowań przy przywoływaniu ważonym ważnością (losowanie z odrzucaniem)
+RECALL_MAX_TRIES = 64
+
+_lock = threading.Lock()
+# Skróty wczytane z LONG_MEMORY_HASHES (None = jeszcze niewczytane) i liczba wczytanych bajtów pliku
+_hashes = None
+_hashes_read = 0
+
+
+def _memory_hash(text: str) -> int:
+    """Stabilny 64-bitowy skrót wspomnienia (blake2b)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _memory_text(line: str):
+    """Zwraca tekst wspomnienia z linii [Ty]/[AI] albo None, gdy linia nie jest kluczowym wspomnieniem."""
+    if line.startswith("[Ty]") or line.startswith("[AI]"):
+        text = line.split(']', 1)[1].strip()
+        if len(text) > MIN_MEMORY_LENGTH:
+            return text
+    return None
+
 
-def update_long_memory():
+def _load_hashes() -> set:
     """
-    Przetwarza plik ai_memory.txt i zapisuje kluczowe wspomnienia do long_memory.txt.
-    Wspomnienia muszą być odpowiednio długie i oznaczone jako [Ty] lub [AI].
+    Zwraca zbiór skrótów zapisanych wspomnień, doczytując tylko nowe wpisy pliku skrótów.
+    Gdy pliku nie ma, a long_memory.txt istnieje (pamięć sprzed konsolidacji przyrostowej), zbiór jest z niego odtwarzany.
     """
+    global _hashes, _hashes_read
+    if _hashes is None:
+        _hashes, _hashes_read = set(), 0
+        if not os.path.exists(LONG_MEMORY_HASHES) and os.path.exists(LONG_MEMORY_FILE):
+            seeded = array("Q")
+            with open(LONG_MEMORY_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("- "):
+                        seeded.append(_memory_hash(line[2:].rstrip("\n")))
+            with open(LONG_MEMORY_HASHES, "wb") as f:
+                seeded.tofile(f)
     try:
-        lines = open("ai_memory.txt", "r", encoding="utf-8").read().splitlines()
+        with open(LONG_MEMORY_HASHES, "rb") as f:
+            f.seek(_hashes_read)
+            data = f.read()
     except FileNotFoundError:
-        return
-    mem = set()
-    for l in lines:
-        if l.startswith("[Ty]") or l.startswith("[AI]"):
-            text = l.split(']', 1)[1].strip()
-            if len(text) > 30:
-                mem.add(text)
-    if mem:
-        with open("long_memory.txt", "w", encoding="utf-8") as f:
-            f.write("# Kluczowe wspomnienia:\n")
-            for m in mem:
-                f.write(f"- {m}\n")
-
-def recall_from_memory() -> str:
+        return _hashes
+    data = data[:len(data) - len(data) % 8]
+    _hashes.update(array("Q", data))
+    _hashes_read += len(data)
+    return _hashes
+
+
+def _exchange_memories(exchange):
+    """Teksty kluczowych wspomnień wymiany - linie [Ty]/[AI] jak w dawnym ai_memory.txt."""
+    for line in f"[Ty] {exchange['user']}\n[AI] {exchange['assistant']}".splitlines():
+        text = _memory_text(line)
+        if text is not None:
+            yield text
+
+
+def _read_checkpoint() -> int:
+    try:
+        with open(LONG_MEMORY_CHECKPOINT, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("exchange_id", 0))
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _write_checkpoint(exchange_id: int) -> None:
+    """Zapisuje punkt kontrolny atomowo (plik tymczasowy + os.replace)."""
+    tmp = LONG_MEMORY_CHECKPOINT + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"exchange_id": exchange_id}, f)
+    os.replace(tmp, LONG_MEMORY_CHECKPOINT)
+
+
+def _importance(text: str) -> int:
+    """Ważność wspomnienia (1-255): dłuższe wypowiedzi i pytania niosą więcej treści."""
+    score = len(text) + (40 if "?" in text else 0)
+    return max(1, min(255, score))
+
+
+def _sync_index() -> int:
+    """
+    Dopisuje do indeksu pozycji wspomnienia z niezaindeksowanej końcówki long_memory.txt (po dopisaniu
+    to tylko nowe linie); gdy plik jest krótszy niż zaindeksowana część lub indeks jest niespójny, buduje go od zera.
+    Wywoływane pod blokadą. Zwraca liczbę zaindeksowanych wspomnień.
+    """
+    try:
+        size = os.path.getsize(LONG_MEMORY_FILE)
+    except OSError:
+        return 0
+    count, end = 0, 0
+    try:
+        index_size = os.path.getsize(LONG_MEMORY_INDEX)
+        importance_size = os.path.getsize(LONG_MEMORY_IMPORTANCE)
+    except OSError:
+        index_size = importance_size = 0
+    if index_size >= 8 and index_size % 8 == 0 and importance_size == index_size // 8 - 1:
+        with open(LONG_MEMORY_INDEX, "rb") as f:
+            f.seek(index_size - 8)
+            end = array("Q", f.read(8))[0]
+        count = importance_size
+    if end > size:
+        count, end = 0, 0
+    if count == 0 and end == 0:
+        open(LONG_MEMORY_INDEX, "wb").close()
+        open(LONG_MEMORY_IMPORTANCE, "wb").close()
+    elif end == size:
+        return count
+    with open(LONG_MEMORY_FILE, "rb") as f:
+        f.seek(end)
+        data = f.read()
+    data = data[:data.rfind(b"\n") + 1]
+    offsets = array("Q")
+    importance = bytearray()
+    position = end
+    for line in data.splitlines(keepends=True):
+        if line.startswith(b"-"):
+            offsets.append(position)
+            importance.append(_importance(line.decode("utf-8", errors="replace")))
+        position += len(line)
+    offsets.append(position)
+    with open(LONG_MEMORY_INDEX, "r+b") as f:
+        # Nowe offsety zastępują dotychczasowy znacznik końca
+        f.seek(8 * count)
+        offsets.tofile(f)
+    with open(LONG_MEMORY_IMPORTANCE, "ab") as f:
+        f.write(importance)
+    return count + len(importance)
+
+
+def _rebuild_long_memory() -> int:
+    """Pełna konsolidacja: przepisuje long_memory.txt, skróty i punkt kontrolny od zera. Zwraca liczbę wspomnień."""
+    global _hashes, _hashes_read
+    last_id = 0
+    mem = {}
+    for exchange in conversation_store.exchanges():
+        last_id = exchange["id"]
+        for text in _exchange_memories(exchange):
+            mem.setdefault(_memory_hash(text), text)
+    with open(LONG_MEMORY_FILE, "w", encoding="utf-8") as f:
+        f.write(LONG_MEMORY_HEADER)
+        for m in mem.values():
+            f.write(f"- {m}\n")
+    with open(LONG_MEMORY_HASHES, "wb") as f:
+        array("Q", mem).tofile(f)
+    _hashes, _hashes_read = set(mem), 8 * len(mem)
+    # Plik przepisany od zera - indeks pozycji również
+    for path in (LONG_MEMORY_INDEX, LONG_MEMORY_IMPORTANCE):
+        if os.path.exists(path):
+            os.remove(path)
+    _sync_index()
+    _write_checkpoint(last_id)
+    return len(mem)
+
+
+def update_long_memory(incremental: bool = True) -> int:
+    """
+    Przetwarza rozmowy z magazynu rozmów i zapisuje kluczowe wspomnienia do long_memory.txt.
+    Wspomnienia muszą być odpowiednio długie (wiadomość użytkownika [Ty] lub odpowiedź AI [AI]).
+
+    W trybie przyrostowym czytane są tylko wymiany dopisane po ostatnim punkcie kontrolnym (id wymiany),
+    powtórzenia odrzucane są trwałym zbiorem skrótów, a nowe wspomnienia dopisywane na końcu long_memory.txt
+    (i do indeksu pozycji używanego przez `recall_from_memory`). Punkt kontrolny większy niż id najnowszej
+    wymiany (np. nowa baza rozmów) oznacza przetwarzanie od początku.
+
+    Args:
+        incremental (bool): False przepisuje long_memory.txt od zera na podstawie wszystkich rozmów.
+
+    Returns:
+        int: Liczba nowych wspomnień (w trybie pełnym - wszystkich).
+    """
+    global _hashes_read
+    with _lock:
+        if not incremental:
+            return _rebuild_long_memory()
+        checkpoint = _read_checkpoint()
+        if checkpoint > conversation_store.last_id():
+            checkpoint = 0
+        last_id = checkpoint
+        known = _load_hashes()
+        new_hashes = array("Q")
+        new_texts = []
+        for exchange in conversation_store.exchanges(after_id=checkpoint):
+            last_id = exchange["id"]
+            for text in _exchange_memories(exchange):
+                h = _memory_hash(text)
+                if h not in known:
+                    known.add(h)
+                    new_hashes.append(h)
+                    new_texts.append(text)
+        if last_id == checkpoint:
+            return 0
+        if new_texts:
+            # Najpierw wspomnienia, potem skróty i punkt kontrolny - przerwany zapis może najwyżej powtórzyć wpis
+            write_header = not os.path.exists(LONG_MEMORY_FILE)
+            with open(LONG_MEMORY_FILE, "a", encoding="utf-8") as f:
+                if write_header:
+                    f.write(LONG_MEMORY_HEADER)
+                f.write("".join(f"- {m}\n" for m in new_texts))
+            with open(LONG_MEMORY_HASHES, "ab") as f:
+                new_hashes.tofile(f)
+            _hashes_read += 8 * len(new_hashes)
+            _sync_index()
+        _write_checkpoint(last_id)
+        return len(new_texts)
+
+def _recall_position(count: int, weighting: str, importance_file) -> int:
+    """Losuje numer wspomnienia (0 = najstarsze) według wybranego ważenia."""
+    if weighting == "recency":
+        # Rozkład geometryczny wieku obcięty do liczby wspomnień - odwrotna dystrybuanta, bez pętli
+        ratio = 0.5 ** (1.0 / RECALL_HALF_LIFE)
+        u = random.random() * (1.0 - ratio ** count)
+        age = min(count - 1, int(math.log(1.0 - u) / math.log(ratio)))
+        return count - 1 - age
+    position = random.randrange(count)
+    if weighting == "importance":
+        # Losowanie z odrzucaniem: wspomnienie przyjmowane z prawdopodobieństwem ważność/255
+        for _ in range(RECALL_MAX_TRIES):
+            importance_file.seek(position)
+            if random.random() * 255 < importance_file.read(1)[0]:
+                break
+            position = random.randrange(count)
+    return position
+
+
+def recall_from_memory(weighting: str = "uniform") -> str:
     """
     Losowo przywołuje jedno kluczowe wspomnienie z long_memory.txt.
+    Pozycja wspomnienia odczytywana jest z indeksu offsetów, więc plik nie jest wczytywany w całości.
+
+    Args:
+        weighting (str): "uniform" (równe szanse), "recency" (nowsze częściej, waga maleje o połowę
+            co RECALL_HALF_LIFE wspomnień) lub "importance" (proporcjonalnie do zapisanej ważności).
     """
+    if weighting not in ("uniform", "recency", "importance"):
+        raise ValueError(f"Nieznane ważenie wspomnień: {weighting}")
     try:
-        lines = [l for l in open("long_memory.txt", "r", encoding="utf-8") if l.startswith("-")]
-        return random.choice(lines).lstrip("- ").strip()
+        with _lock:
+            count = _sync_index()
+            if not count:
+                return "Pamięć pusta."
+            with open(LONG_MEMORY_INDEX, "rb") as index, open(LONG_MEMORY_IMPORTANCE, "rb") as importance, \
+                    open(LONG_MEMORY_FILE, "rb") as memory:
+                position = _recall_position(count, weighting, importance)
+                index.seek(8 * position)
+                start, end = array("Q", index.read(16))
+                memory.seek(start)
+                line = memory.read(end - start).split(b"\n", 1)[0]
+        return line.decode("utf-8", errors="replace").lstrip("- ").strip()
     except Exception:
         return "Pamięć pusta."
+
+
+def recall_relevant(text, k: int = 3) -> list:
+    """
+    Przywołuje do `k` wcześniejszych wymian najbardziej podobnych do tekstu (lub Utterance),
+    z indeksu pełnotekstowego magazynu rozmów - w przeciwieństwie do losowego `recall_from_memory`.
+
+    Returns:
+        list: Wymiany {"id", "timestamp", "user", "assistant", "importance", "source", "score"}, od najtrafniejszej.
+    """
+    try:
+        return conversation_store.search(text, k)
+    except Exception as e:
+        print(f"[Memory] Błąd przywoływania wymian: {e}")
+        return []
@@ -2,12 +2,11 @@
 def generate_new_nodes() -> str:
     """
     Generuje nowe moduły tematyczne na podstawie historii rozmów (jeśli dostępna).
+    Tematy pochodzą z indeksu tematów magazynu rozmów - bez wczytywania całej historii.
     """
-    import os, json
-    if os.path.exists("conversation_history.json"):
-        with open("conversation_history.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
+    from conversation_store import conversation_store
+    data = [{"user": topic} for topic in conversation_store.topic_counts()]
+    if not data:
         data = [{"user": "przykładowy temat"}]
     result = evolve_network_from_data(data)
     return f"[Sieć] {result}"
@@ -4,12 +4,15 @@ network_one.py
 Moduł tematyczny: rozpoznawanie kluczowych pojęć w tekście użytkownika.
 """
 
+from utterance import as_utterance
+
 KEYS = ['czas', 'świadomość', 'technologia', 'emocje', 'lokalizacja']
 
-def process_input_one(text: str):
+def process_input_one(text):
     """
-    Zwraca listę kluczowych pojęć znalezionych w tekście użytkownika.
+    Zwraca listę kluczowych pojęć znalezionych w tekście użytkownika (lub w analizie Utterance).
     Jeśli nie znaleziono, zwraca ['ogólne'].
     """
-    found = [k for k in KEYS if k in text.lower()]
+    lower = as_utterance(text).lower
+    found = [k for k in KEYS if k in lower]
     return found or ['ogólne']
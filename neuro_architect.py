@@ -3,51 +3,40 @@
 neuro_architect.py
 ------------------
 This module defines the NeuroArchitect class, responsible for analyzing conversation history to extract frequent topics and dynamically generate Python modules for those topics.
+Conversation history is read from the shared conversation store (conversation_store.py).
 Part of the NeuroQuantumAI Android app project.
 """
 
 import os
-import json
-from typing import List, Dict, Any
+from typing import List
+
+from conversation_store import ConversationStore, conversation_store
 
 
 class NeuroArchitect:
     """
     The NeuroArchitect analyzes conversation logs to identify frequent topics and can generate new Python modules for those topics.
     """
-    def __init__(self, log_path: str = "conversation_history.json") -> None:
+    def __init__(self, store: ConversationStore = None) -> None:
         """
         Initialize the NeuroArchitect.
         Args:
-            log_path (str): Path to the conversation history JSON file.
+            store (ConversationStore): Conversation store to analyze (defaults to the shared store).
         """
-        self.log_path = log_path
+        self.store = store or conversation_store
 
     def analyze_topics(self) -> List[str]:
         """
-        Analyze the conversation log and extract frequently mentioned topics (words).
+        Extract frequently mentioned topics from the conversation history with one indexed query.
         Returns:
-            List[str]: List of words that appear at least 3 times in user input.
+            List[str]: Topics (user input words longer than 3 characters) of at least 3 conversations.
         """
-        if not os.path.exists(self.log_path):
-            return []
         try:
-            with open(self.log_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"[NeuroArchitect] Error reading log file: {e}")
+            return list(self.store.topic_counts(min_count=3))
+        except Exception as e:
+            print(f"[NeuroArchitect] Error reading conversation store: {e}")
             return []
 
-        topic_counter: Dict[str, int] = {}
-        for entry in data:
-            user_input = entry.get("user", "")
-            keywords = user_input.lower().split()
-            for word in keywords:
-                topic_counter[word] = topic_counter.get(word, 0) + 1
-
-        frequent = [word for word, count in topic_counter.items() if count >= 3]
-        return frequent
-
     def build_module(self, topic: str) -> str:
         """
         Dynamically create a Python module for a given topic if it does not already exist.
@@ -9,35 +9,44 @@ Part of the NeuroQuantumAI Android app project.
 import json
 import random
 import os
-from typing import List, Union
+from typing import Any, Dict, List, Optional, Union
+
+from utterance import Utterance, as_utterance
 
 MAP_FILE = "network_map.json"
-def grow_network(user_text: str) -> str:
+def grow_network(user_text: Union[str, Utterance], map_data: Optional[Dict[str, Any]] = None) -> str:
     """
-    Rozbudowuje sieć neuronową na podstawie tekstu użytkownika.
+    Rozbudowuje sieć neuronową na podstawie tekstu użytkownika (tekst lub gotowa analiza Utterance).
     Tworzy nowe połączenie synaptyczne i zwraca komunikat.
+    Jeśli podano map_data, zmienia mapę w pamięci zamiast pliku (tryb wsadowy).
     """
     # Prosta logika: każde słowo >3 znaki traktuj jako sygnał
-    words = [w for w in user_text.split() if len(w) > 3]
+    words = list(as_utterance(user_text).signals)
     if not words:
         return "[Sieć] Brak wystarczających danych do rozbudowy sieci."
     target = words[0]
     sources = words[1:] if len(words) > 1 else ["AI"]
-    msg = generate_synaptic_connection(sources, target)
+    msg = generate_synaptic_connection(sources, target, map_data)
     return f"[Sieć] {msg}"
 
-def generate_synaptic_connection(source_signals: Union[str, List[str]], target: str) -> str:
+def generate_synaptic_connection(source_signals: Union[str, List[str]], target: str,
+                                 map_data: Optional[Dict[str, Any]] = None) -> str:
     """
     Generate a synaptic connection from source signals to a target neuron and update the network map.
     Args:
         source_signals (Union[str, List[str]]): Source neuron(s) or signal(s).
         target (str): Target neuron or signal.
+        map_data (Optional[Dict[str, Any]]): In-memory network map to update instead of the file.
     Returns:
         str: Status message indicating success or error.
     """
     if not isinstance(source_signals, list):
         source_signals = [str(source_signals)]
     weight = round(random.uniform(0.75, 0.98), 2)
+    if map_data is not None:
+        for src in source_signals:
+            map_data[f"{src}→{target}"] = weight
+        return f"🧠 Połączenie utworzone: {', '.join(source_signals)} → {target}, waga: {weight}"
     try:
         if os.path.exists(MAP_FILE):
             with open(MAP_FILE, "r", encoding="utf-8") as f:
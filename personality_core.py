@@ -1,5 +1,5 @@
 
-def generate_personality_response(user_text: str) -> str:
+def generate_personality_response(user_text) -> str:
     """
     Generuje odpowiedź AI inspirowaną osobowością na podstawie tekstu użytkownika.
     """
@@ -14,7 +14,9 @@ Part of the NeuroQuantumAI Android app project.
 """
 
 import random
-from typing import List
+from typing import List, Union
+
+from utterance import Utterance, as_utterance
 
 favorite_topics: List[str] = ["czas", "świadomość", "technologia", "przyszłość", "emocje", "kwanty"]
 
@@ -43,16 +45,17 @@ def internal_goals() -> str:
     ]
     return random.choice(goals)
 
-def shape_thought(ui: str) -> str:
+def shape_thought(ui: Union[str, Utterance]) -> str:
     """
     Shape the AI's response based on user input and favorite topics.
     Args:
-        ui (str): User input string.
+        ui (Union[str, Utterance]): User input string or its pre-computed analysis.
     Returns:
         str: A response shaped by the AI's personality and favorite topics.
     """
+    lower = as_utterance(ui).lower
     for t in favorite_topics:
-        if t in ui.lower():
+        if t in lower:
             return stylistic_response(t)
     return (
         "Twoje pytanie otwiera nowe obszary. "
@@ -7,17 +7,67 @@ Obsługuje wszystkie funkcje telefonu przez Termux/Plyer/Native Android API.
 Brak ograniczeń - AI ma pełną kontrolę nad urządzeniem z zgodą użytkownika.
 """
 
+import asyncio
 import subprocess
 import os
 import json
 import time
 from typing import Optional, Dict, List, Any
 from datetime import datetime
+from intent_classifier import Intent, classify_intent
 
 # Ścieżka do pliku uprawnień i konfiguracji
 PERMISSIONS_FILE = "phone_permissions.json"
 PHONE_LOG = "phone_activity.json"
 
+# Funkcje-zapytania realizowane jednym poleceniem Termux (wspólne dla wersji sync i async)
+QUERY_FEATURES: Dict[str, Dict[str, Any]] = {
+    "phone.contacts": {
+        "permission": "contacts", "denied": "❌ Brak uprawnień do kontaktów",
+        "command": ["termux-contact-list"],
+        "format": lambda out: f"📋 Kontakty: {out.decode()[:200]}...",
+        "error": "❌ Nie mogę pobrać kontaktów",
+        "log": ("contacts", "Pobrano listę kontaktów"),
+    },
+    "phone.files": {
+        "permission": "files", "denied": "❌ Brak uprawnień do plików",
+        "command": ["ls", "/storage/emulated/0/"],
+        "format": lambda out: f"📁 Pliki: {out.decode()[:200]}...",
+        "error": "❌ Nie mogę przeglądać plików",
+    },
+    "phone.bluetooth": {
+        "permission": "bluetooth", "denied": "❌ Brak uprawnień do Bluetooth",
+        "command": ["termux-bluetooth-info"],
+        "format": lambda out: f"📶 Bluetooth: {out.decode()[:200]}...",
+        "error": "❌ Nie mogę sprawdzić Bluetooth",
+    },
+    "phone.wifi": {
+        "permission": "wifi", "denied": "❌ Brak uprawnień do WiFi",
+        "command": ["termux-wifi-connectioninfo"],
+        "format": lambda out: f"📶 WiFi: {out.decode()[:200]}...",
+        "error": "❌ Nie mogę sprawdzić WiFi",
+    },
+    "phone.sensors": {
+        "permission": "sensors", "denied": "❌ Brak uprawnień do sensorów",
+        "command": ["termux-sensor", "-l"],
+        "format": lambda out: f"📱 Sensory: {out.decode()[:200]}...",
+        "error": "❌ Nie mogę odczytać sensorów",
+    },
+    "phone.battery": {
+        "permission": None,
+        "command": ["termux-battery-status"],
+        "format": lambda out: _format_battery(json.loads(out.decode())),
+        "error": "❌ Nie mogę sprawdzić baterii",
+    },
+}
+
+# Kolejność rozpoznawania funkcji telefonu w use_phone_feature (pierwsze dopasowanie wygrywa)
+PHONE_FEATURE_ORDER = [
+    "phone.camera", "phone.location", "phone.call", "phone.sms", "phone.contacts",
+    "phone.files", "phone.notification", "phone.microphone", "phone.bluetooth",
+    "phone.wifi", "phone.sensors", "phone.battery", "phone.clipboard", "phone.permissions",
+]
+
 def load_permissions() -> Dict[str, bool]:
     """Ładuje ustawienia uprawnień AI do funkcji telefonu."""
     try:
@@ -60,16 +110,19 @@ def log_phone_activity(action: str, result: str, timestamp: str = None):
     with open(PHONE_LOG, "w", encoding="utf-8") as f:
         json.dump(log, f, ensure_ascii=False, indent=2)
 
-def use_phone_feature(ui: str) -> str:
+def use_phone_feature(ui: str, intent: Optional[Intent] = None) -> str:
     """
     ROZSZERZONA OBSŁUGA TELEFONU - AI może korzystać z wszystkich funkcji!
+    Przyjmuje opcjonalnie gotowy wynik klasyfikacji intencji (np. z AIEngine).
     """
-    ui = ui.lower().strip()
+    if intent is None:
+        intent = classify_intent(ui)
+    ui = intent.lower.strip()
     permissions = load_permissions()
     
     try:
         # === KAMERA I MULTIMEDIA ===
-        if any(word in ui for word in ["zrób zdjęcie", "foto", "camera", "kamera"]):
+        if intent.matches("phone.camera"):
             if not permissions.get("camera", True):
                 return "❌ Brak uprawnień do kamery. Użyj: 'pozwól ai kamera'"
             
@@ -92,7 +145,7 @@ def use_phone_feature(ui: str) -> str:
             return result
 
         # === LOKALIZACJA I GPS ===
-        if any(word in ui for word in ["lokalizacja", "gps", "gdzie jestem", "location"]):
+        if intent.matches("phone.location"):
             if not permissions.get("location", True):
                 return "❌ Brak uprawnień do lokalizacji. Użyj: 'pozwól ai lokalizacja'"
             
@@ -117,7 +170,7 @@ def use_phone_feature(ui: str) -> str:
             return result
 
         # === TELEFON I SMS ===
-        if "zadzwoń" in ui or "call" in ui:
+        if intent.matches("phone.call"):
             if not permissions.get("calls", True):
                 return "❌ Brak uprawnień do połączeń. Użyj: 'pozwól ai połączenia'"
             
@@ -135,7 +188,7 @@ def use_phone_feature(ui: str) -> str:
             log_phone_activity("phone_call", f"{result} ({number})")
             return result
 
-        if "sms" in ui or "wiadomość" in ui:
+        if intent.matches("phone.sms"):
             if not permissions.get("sms", True):
                 return "❌ Brak uprawnień do SMS. Użyj: 'pozwól ai sms'"
             
@@ -153,35 +206,15 @@ def use_phone_feature(ui: str) -> str:
             return result
 
         # === KONTAKTY ===
-        if "kontakty" in ui or "contacts" in ui:
-            if not permissions.get("contacts", True):
-                return "❌ Brak uprawnień do kontaktów"
-            
-            try:
-                contacts = subprocess.check_output(["termux-contact-list"], timeout=5)
-                result = f"📋 Kontakty: {contacts.decode()[:200]}..."
-            except:
-                result = "❌ Nie mogę pobrać kontaktów"
-            
-            log_phone_activity("contacts", "Pobrano listę kontaktów")
-            return result
+        if intent.matches("phone.contacts"):
+            return _run_query_feature("phone.contacts", permissions)
 
         # === PLIKI I STORAGE ===
-        if any(word in ui for word in ["pliki", "files", "storage", "browse"]):
-            if not permissions.get("files", True):
-                return "❌ Brak uprawnień do plików"
-            
-            try:
-                # Lista plików w storage
-                files = subprocess.check_output(["ls", "/storage/emulated/0/"], timeout=5)
-                result = f"📁 Pliki: {files.decode()[:200]}..."
-            except:
-                result = "❌ Nie mogę przeglądać plików"
-            
-            return result
+        if intent.matches("phone.files"):
+            return _run_query_feature("phone.files", permissions)
 
         # === POWIADOMIENIA ===
-        if "powiadomienie" in ui or "notification" in ui:
+        if intent.matches("phone.notification"):
             if not permissions.get("notifications", True):
                 return "❌ Brak uprawnień do powiadomień"
             
@@ -203,7 +236,7 @@ def use_phone_feature(ui: str) -> str:
             return result
 
         # === MIKROFON I NAGRYWANIE ===
-        if any(word in ui for word in ["nagraj", "mikrofon", "record", "audio"]):
+        if intent.matches("phone.microphone"):
             if not permissions.get("microphone", True):
                 return "❌ Brak uprawnień do mikrofonu"
             
@@ -220,59 +253,23 @@ def use_phone_feature(ui: str) -> str:
             return result
 
         # === BLUETOOTH ===
-        if "bluetooth" in ui:
-            if not permissions.get("bluetooth", True):
-                return "❌ Brak uprawnień do Bluetooth"
-            
-            try:
-                bt_info = subprocess.check_output(["termux-bluetooth-info"], timeout=5)
-                result = f"📶 Bluetooth: {bt_info.decode()[:200]}..."
-            except:
-                result = "❌ Nie mogę sprawdzić Bluetooth"
-            
-            return result
+        if intent.matches("phone.bluetooth"):
+            return _run_query_feature("phone.bluetooth", permissions)
 
         # === WIFI ===
-        if "wifi" in ui:
-            if not permissions.get("wifi", True):
-                return "❌ Brak uprawnień do WiFi"
-            
-            try:
-                wifi_info = subprocess.check_output(["termux-wifi-connectioninfo"], timeout=5)
-                result = f"📶 WiFi: {wifi_info.decode()[:200]}..."
-            except:
-                result = "❌ Nie mogę sprawdzić WiFi"
-            
-            return result
+        if intent.matches("phone.wifi"):
+            return _run_query_feature("phone.wifi", permissions)
 
         # === SENSORY ===
-        if any(word in ui for word in ["sensors", "sensory", "accelerometer", "gyroscope"]):
-            if not permissions.get("sensors", True):
-                return "❌ Brak uprawnień do sensorów"
-            
-            try:
-                sensor_data = subprocess.check_output(["termux-sensor", "-l"], timeout=5)
-                result = f"📱 Sensory: {sensor_data.decode()[:200]}..."
-            except:
-                result = "❌ Nie mogę odczytać sensorów"
-            
-            return result
+        if intent.matches("phone.sensors"):
+            return _run_query_feature("phone.sensors", permissions)
 
         # === BATERIA ===
-        if "bateria" in ui or "battery" in ui:
-            try:
-                battery_info = subprocess.check_output(["termux-battery-status"], timeout=5)
-                battery_data = json.loads(battery_info.decode())
-                level = battery_data.get("percentage", "nieznany")
-                status = battery_data.get("status", "nieznany")
-                result = f"🔋 Bateria: {level}% ({status})"
-            except:
-                result = "❌ Nie mogę sprawdzić baterii"
-            
-            return result
+        if intent.matches("phone.battery"):
+            return _run_query_feature("phone.battery", permissions)
 
         # === SCHOWEK ===
-        if "schowek" in ui or "clipboard" in ui:
+        if intent.matches("phone.clipboard"):
             if not permissions.get("clipboard", True):
                 return "❌ Brak uprawnień do schowka"
             
@@ -293,7 +290,7 @@ def use_phone_feature(ui: str) -> str:
             return result
 
         # === UPRAWNIENIA ===
-        if "pozwól ai" in ui:
+        if intent.matches("phone.permissions"):
             return manage_permissions(ui)
 
         # === INNE FUNKCJE ===
@@ -304,6 +301,40 @@ def use_phone_feature(ui: str) -> str:
         log_phone_activity("error", error_msg)
         return error_msg
 
+def _format_battery(battery_data: Dict[str, Any]) -> str:
+    """Formatuje odczyt termux-battery-status."""
+    level = battery_data.get("percentage", "nieznany")
+    status = battery_data.get("status", "nieznany")
+    return f"🔋 Bateria: {level}% ({status})"
+
+def _check_query_permission(category: str, permissions: Dict[str, bool]) -> Optional[str]:
+    """Zwraca komunikat odmowy, jeśli funkcja-zapytanie nie ma uprawnień."""
+    spec = QUERY_FEATURES[category]
+    if spec["permission"] and not permissions.get(spec["permission"], True):
+        return spec["denied"]
+    return None
+
+def _log_query_feature(category: str, result: str) -> None:
+    """Loguje wykonanie funkcji-zapytania, jeśli jest to przewidziane w konfiguracji."""
+    log = QUERY_FEATURES[category].get("log")
+    if log:
+        action, message = log
+        log_phone_activity(action, message or result)
+
+def _run_query_feature(category: str, permissions: Dict[str, bool]) -> str:
+    """Wykonuje funkcję-zapytanie (jedno polecenie Termux) i formatuje wynik."""
+    denied = _check_query_permission(category, permissions)
+    if denied:
+        return denied
+    spec = QUERY_FEATURES[category]
+    try:
+        output = subprocess.check_output(spec["command"], timeout=spec.get("timeout", 5))
+        result = spec["format"](output)
+    except:
+        result = spec["error"]
+    _log_query_feature(category, result)
+    return result
+
 def extract_phone_number(text: str) -> Optional[str]:
     """Wyciąga numer telefonu z tekstu."""
     import re
@@ -428,3 +459,83 @@ def emergency_phone_access() -> str:
     }
     save_permissions(default_perms)
     return "🚨 PRZYWRÓCONO PEŁNY DOSTĘP AI DO TELEFONU!"
+
+# === ASYNCHRONICZNE API (dla aprocess_input) ===
+
+async def _acheck_output(command: List[str], timeout: float = 5) -> bytes:
+    """Asynchroniczny odpowiednik subprocess.check_output - nie blokuje pętli zdarzeń."""
+    proc = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    try:
+        output, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, command, output)
+    return output
+
+async def ause_phone_feature(ui: str, intent: Optional[Intent] = None) -> str:
+    """
+    Asynchroniczny odpowiednik use_phone_feature.
+    Funkcje-zapytania (kontakty, pliki, Bluetooth, WiFi, sensory, bateria) uruchamiają polecenia
+    Termux jako podprocesy asyncio; pozostałe funkcje wykonywane są w puli wątków.
+    """
+    if intent is None:
+        intent = classify_intent(ui)
+    category = next((c for c in PHONE_FEATURE_ORDER if intent.matches(c)), None)
+    if category not in QUERY_FEATURES:
+        return await asyncio.to_thread(use_phone_feature, ui, intent)
+
+    try:
+        permissions = await asyncio.to_thread(load_permissions)
+        denied = _check_query_permission(category, permissions)
+        if denied:
+            return denied
+        spec = QUERY_FEATURES[category]
+        try:
+            output = await _acheck_output(spec["command"], timeout=spec.get("timeout", 5))
+            result = spec["format"](output)
+        except Exception:
+            result = spec["error"]
+        await asyncio.to_thread(_log_query_feature, category, result)
+        return result
+    except Exception as e:
+        error_msg = f"❌ Błąd funkcji telefonu: {e}"
+        await asyncio.to_thread(log_phone_activity, "error", error_msg)
+        return error_msg
+
+async def aget_phone_status() -> Dict[str, Any]:
+    """Asynchroniczny odpowiednik get_phone_status - trzy zapytania wykonywane równolegle."""
+    async def query(command):
+        try:
+            return await _acheck_output(command, timeout=5)
+        except Exception:
+            return None
+
+    permissions, device_info, battery, wifi = await asyncio.gather(
+        asyncio.to_thread(load_permissions),
+        query(["getprop"]),
+        query(["termux-battery-status"]),
+        query(["termux-wifi-connectioninfo"]),
+    )
+    status = {
+        "permissions": permissions,
+        "device_info": {},
+        "connectivity": {},
+        "storage": {},
+        "power": {}
+    }
+    if device_info is not None:
+        status["device_info"] = {"raw": device_info.decode()[:500]}
+    try:
+        if battery is not None:
+            status["power"] = json.loads(battery)
+    except Exception:
+        pass
+    try:
+        if wifi is not None:
+            status["connectivity"]["wifi"] = json.loads(wifi)
+    except Exception:
+        pass
+    return status
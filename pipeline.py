@@ -0,0 +1,325 @@
+"""
+pipeline.py
+-----------
+Etapowy silnik przetwarzania dla AIEngine.
+Każdy etap deklaruje nazwy swoich wejść i wyjść. Etapy, których wejścia są już dostępne,
+uruchamiane są równolegle na ograniczonej puli wątków, każdy z własnym limitem czasu.
+Wynikiem przebiegu jest słownik kontekstu, z którego odpowiedź składana jest w stałej kolejności.
+Ten sam zestaw etapów można wykonać w pętli asyncio (`StageExecutor.arun`)
+lub krokowo, otrzymując nazwy etapów w miarę ich kończenia (`StageExecutor.iter_run`).
+Czas wykonania każdego uruchomionego etapu trafia do słownika `timings` (sekundy).
+Etapy blokujące na wejściu/wyjściu (zapytania HTTP, moduły dynamiczne) oznaczone `blocking=True`
+wykonują się na osobnej puli - etap, który przekroczył limit i nadal czeka na sieć, nie zajmuje
+wątków pozostałych etapów. Limit czasu etapu liczony jest od chwili, w której etap faktycznie
+zaczął się wykonywać, a nie od zgłoszenia go do puli.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_MAX_WORKERS = 4
+# Pula etapów blokujących: większa, bo jej wątki głównie czekają (także po przekroczeniu limitu etapu)
+DEFAULT_IO_WORKERS = 16
+DEFAULT_STAGE_TIMEOUT = 10.0
+# Jak często sprawdzać, czy etap czekający w kolejce puli już się rozpoczął (sekundy)
+QUEUE_POLL_INTERVAL = 0.01
+
+
+class Stage:
+    """
+    Pojedynczy etap potoku: funkcja wywoływana z wartościami kontekstu wskazanymi w `inputs`
+    (argumenty pozycyjne w tej samej kolejności).
+    """
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (), timeout: Optional[float] = DEFAULT_STAGE_TIMEOUT,
+                 default: Any = None, condition: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 blocking: bool = False) -> None:
+        """
+        Args:
+            name (str): Unikalna nazwa etapu.
+            func (Callable): Funkcja wywoływana z wartościami `inputs` jako argumentami pozycyjnymi.
+            inputs (Iterable[str]): Nazwy wartości kontekstu wymaganych przez etap.
+            outputs (Iterable[str]): Nazwy wartości produkowanych przez etap.
+                Przy więcej niż jednym wyjściu funkcja zwraca krotkę w tej samej kolejności.
+            timeout (Optional[float]): Limit czasu w sekundach (None = bez limitu).
+            default (Any): Wartość wyjść, gdy etap zostanie pominięty, przekroczy czas lub zgłosi wyjątek.
+            condition (Optional[Callable]): Warunek na kontekście; gdy zwróci False, etap jest pomijany.
+            blocking (bool): Etap blokuje na wejściu/wyjściu (np. HTTP) - wykonywany na puli etapów blokujących.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.timeout = timeout
+        self.default = default
+        self.condition = condition
+        self.blocking = blocking
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+
+class StageExecutor:
+    """
+    Wykonuje listę etapów na współdzielonej, ograniczonej puli wątków
+    (etapy blokujące - na osobnej puli).
+    """
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, io_workers: int = DEFAULT_IO_WORKERS) -> None:
+        """
+        Args:
+            max_workers (int): Maksymalna liczba równolegle wykonywanych etapów.
+            io_workers (int): Maksymalna liczba równolegle wykonywanych etapów blokujących.
+        """
+        self.max_workers = max_workers
+        self.io_workers = io_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nq-stage")
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="nq-stage-io")
+        self.last_status: Dict[str, str] = {}
+        self.last_timings: Dict[str, float] = {}
+
+    def run(self, stages: List[Stage], context: Dict[str, Any],
+            timings: Optional[Dict[str, float]] = None,
+            status: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Uruchamia etapy w kolejności wynikającej z zależności wejść/wyjść.
+
+        Args:
+            stages (List[Stage]): Etapy do wykonania.
+            context (Dict[str, Any]): Wartości początkowe (np. tekst użytkownika).
+            timings (Optional[Dict[str, float]]): Słownik uzupełniany czasem wykonania etapów.
+            status (Optional[Dict[str, str]]): Słownik uzupełniany statusem etapów tego wywołania
+                (`last_status` dotyczy ostatniego wywołania dowolnego wątku).
+
+        Returns:
+            Dict[str, Any]: Kontekst uzupełniony o wyjścia wszystkich etapów.
+                Status każdego etapu ("ok", "skipped", "timeout", "error") trafia do `last_status`,
+                a czasy etapów do `last_timings`.
+        """
+        ctx = dict(context)
+        for _ in self.iter_run(stages, ctx, timings, status):
+            pass
+        return ctx
+
+    def iter_run(self, stages: List[Stage], ctx: Dict[str, Any],
+                 timings: Optional[Dict[str, float]] = None,
+                 status: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        """
+        Generator wykonujący etapy jak `run`, ale zwracający nazwę każdego etapu zaraz po jego
+        zakończeniu (także pominięcia lub przekroczenia czasu). Wyjścia etapu są już wtedy w `ctx`.
+
+        Args:
+            stages (List[Stage]): Etapy do wykonania.
+            ctx (Dict[str, Any]): Kontekst początkowy - uzupełniany w miejscu.
+            timings (Optional[Dict[str, float]]): Słownik uzupełniany czasem wykonania etapów.
+            status (Optional[Dict[str, str]]): Słownik uzupełniany statusem etapów.
+
+        Yields:
+            str: Nazwa zakończonego etapu.
+        """
+        _check_stages(stages)
+        status = {} if status is None else status
+        timings = {} if timings is None else timings
+        self.last_status = status
+        self.last_timings = timings
+        pending = list(stages)
+        running: Dict[Any, tuple] = {}
+        reported = 0
+
+        while pending or running:
+            for stage, args in _ready_stages(pending, ctx, status):
+                # Chwilę rozpoczęcia zapisuje wątek puli - czas w kolejce nie wlicza się do limitu
+                started: List[float] = []
+                future = self._pool_for(stage).submit(_call_started, started, stage.func, args)
+                running[future] = (stage, started)
+
+            if not running:
+                _skip_unreachable(pending, ctx, status)
+            else:
+                deadlines = [started[0] + stage.timeout for stage, started in running.values()
+                             if started and stage.timeout is not None]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                if any(not started and stage.timeout is not None for stage, started in running.values()):
+                    timeout = QUEUE_POLL_INTERVAL if timeout is None else min(timeout, QUEUE_POLL_INTERVAL)
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                now = time.monotonic()
+                for future in done:
+                    stage, started = running.pop(future)
+                    timings[stage.name] = now - started[0] if started else 0.0
+                    try:
+                        _store(ctx, stage, future.result())
+                        status[stage.name] = "ok"
+                    except Exception as e:
+                        print(f"[Pipeline] Błąd etapu {stage.name}: {e}")
+                        _store(ctx, stage, stage.default)
+                        status[stage.name] = "error"
+
+                for future, (stage, started) in list(running.items()):
+                    if started and stage.timeout is not None and now >= started[0] + stage.timeout:
+                        # Wątku nie da się przerwać - wynik zostanie zignorowany
+                        running.pop(future)
+                        timings[stage.name] = now - started[0]
+                        print(f"[Pipeline] Etap {stage.name} przekroczył limit {stage.timeout}s")
+                        _store(ctx, stage, stage.default)
+                        status[stage.name] = "timeout"
+
+            # Status jest słownikiem uporządkowanym wg kolejności zakończenia etapów
+            finished = list(status)[reported:]
+            reported = len(status)
+            yield from finished
+
+    async def arun(self, stages: List[Stage], context: Dict[str, Any],
+                   timings: Optional[Dict[str, float]] = None,
+                   status: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Asynchroniczny odpowiednik `run` dla pętli zdarzeń asyncio.
+        Etapy będące korutynami są oczekiwane bezpośrednio, a zwykłe funkcje
+        (np. operacje na plikach) wykonywane na tych samych pulach wątków co w `run`.
+
+        Args:
+            stages (List[Stage]): Etapy do wykonania.
+            context (Dict[str, Any]): Wartości początkowe (np. tekst użytkownika).
+            timings (Optional[Dict[str, float]]): Słownik uzupełniany czasem wykonania etapów.
+            status (Optional[Dict[str, str]]): Słownik uzupełniany statusem etapów.
+
+        Returns:
+            Dict[str, Any]: Kontekst uzupełniony o wyjścia wszystkich etapów.
+        """
+        _check_stages(stages)
+        ctx = dict(context)
+        status = {} if status is None else status
+        timings = {} if timings is None else timings
+        pending = list(stages)
+        running: Dict[Any, tuple] = {}
+
+        while pending or running:
+            for stage, args in _ready_stages(pending, ctx, status):
+                running[asyncio.ensure_future(self._acall(stage, args))] = (stage, time.monotonic())
+
+            if not running:
+                _skip_unreachable(pending, ctx, status)
+                break
+
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            now = time.monotonic()
+            for task in done:
+                stage, started = running.pop(task)
+                timings[stage.name] = now - started
+                try:
+                    _store(ctx, stage, task.result())
+                    status[stage.name] = "ok"
+                except asyncio.TimeoutError:
+                    print(f"[Pipeline] Etap {stage.name} przekroczył limit {stage.timeout}s")
+                    _store(ctx, stage, stage.default)
+                    status[stage.name] = "timeout"
+                except Exception as e:
+                    print(f"[Pipeline] Błąd etapu {stage.name}: {e}")
+                    _store(ctx, stage, stage.default)
+                    status[stage.name] = "error"
+
+        self.last_status = status
+        self.last_timings = timings
+        return ctx
+
+    async def _acall(self, stage: Stage, args: List[Any]) -> Any:
+        """
+        Wywołuje etap jako korutynę lub na puli wątków, z limitem czasu etapu
+        (dla puli - liczonym od rozpoczęcia wykonywania, a nie od zgłoszenia).
+        """
+        if asyncio.iscoroutinefunction(stage.func):
+            return await asyncio.wait_for(stage.func(*args), stage.timeout)
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def call():
+            loop.call_soon_threadsafe(lambda: started.done() or started.set_result(time.monotonic()))
+            return stage.func(*args)
+
+        future = loop.run_in_executor(self._pool_for(stage), call)
+        if stage.timeout is None:
+            return await future
+        await asyncio.wait([started, future], return_when=asyncio.FIRST_COMPLETED)
+        if future.done():
+            return future.result()
+        remaining = started.result() + stage.timeout - time.monotonic()
+        return await asyncio.wait_for(future, max(0.0, remaining))
+
+    def _pool_for(self, stage: Stage) -> ThreadPoolExecutor:
+        """Pula wątków etapu: osobna dla etapów blokujących."""
+        return self._io_pool if stage.blocking else self._pool
+
+    def map(self, func: Callable[[Any], Any], items: Iterable[Any], blocking: bool = False) -> List[Any]:
+        """
+        Wykonuje funkcję dla każdego elementu na puli wątków i zwraca wyniki w kolejności elementów.
+        Dla blocking=True (np. zapytania HTTP) - na puli etapów blokujących.
+        """
+        return list((self._io_pool if blocking else self._pool).map(func, items))
+
+    def shutdown(self, wait_for_stages: bool = False) -> None:
+        """
+        Zamyka pule wątków.
+        """
+        self._pool.shutdown(wait=wait_for_stages)
+        self._io_pool.shutdown(wait=wait_for_stages)
+
+
+def _call_started(started: List[float], func: Callable[..., Any], args: List[Any]) -> Any:
+    """Zapisuje chwilę rozpoczęcia etapu w wątku puli i wywołuje funkcję etapu."""
+    started.append(time.monotonic())
+    return func(*args)
+
+
+def _ready_stages(pending: List[Stage], ctx: Dict[str, Any], status: Dict[str, str]) -> List[tuple]:
+    """
+    Zdejmuje z `pending` etapy z gotowymi wejściami i zwraca pary (etap, argumenty) do uruchomienia.
+    Etapy, których warunek nie jest spełniony, otrzymują wartość domyślną od razu.
+    """
+    ready = []
+    progressed = True
+    while progressed:
+        progressed = False
+        for stage in list(pending):
+            if not all(name in ctx for name in stage.inputs):
+                continue
+            pending.remove(stage)
+            progressed = True
+            if stage.condition is not None and not stage.condition(ctx):
+                _store(ctx, stage, stage.default)
+                status[stage.name] = "skipped"
+                continue
+            ready.append((stage, [ctx[name] for name in stage.inputs]))
+    return ready
+
+
+def _skip_unreachable(pending: List[Stage], ctx: Dict[str, Any], status: Dict[str, str]) -> None:
+    """Pozostałe etapy czekają na wejścia, które nigdy nie powstaną - otrzymują wartości domyślne."""
+    for stage in pending:
+        print(f"[Pipeline] Etap {stage.name} pominięty - brak wejść")
+        _store(ctx, stage, stage.default)
+        status[stage.name] = "skipped"
+    pending.clear()
+
+
+def _store(ctx: Dict[str, Any], stage: Stage, value: Any) -> None:
+    """Zapisuje wynik etapu pod nazwami jego wyjść."""
+    if len(stage.outputs) == 1:
+        ctx[stage.outputs[0]] = value
+    elif stage.outputs:
+        values = value if isinstance(value, tuple) else (value,) * len(stage.outputs)
+        for name, item in zip(stage.outputs, values):
+            ctx[name] = item
+
+
+def _check_stages(stages: List[Stage]) -> None:
+    """Sprawdza unikalność nazw etapów i wyjść."""
+    names, outputs = set(), set()
+    for stage in stages:
+        if stage.name in names:
+            raise ValueError(f"Zduplikowana nazwa etapu: {stage.name}")
+        names.add(stage.name)
+        for name in stage.outputs:
+            if name in outputs:
+                raise ValueError(f"Wyjście {name} produkowane przez więcej niż jeden etap")
+            outputs.add(name)
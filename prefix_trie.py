@@ -0,0 +1,169 @@
+"""
+prefix_trie.py
+--------------
+Skompresowane drzewo prefiksowe (radix trie) do podpowiedzi podczas pisania.
+Klucze indeksowane są małymi literami i bez polskich znaków, więc "swiad" podpowiada "świadomość".
+Każdy węzeł przechowuje gotową listę najpopularniejszych kluczy swojego poddrzewa, dlatego
+zapytanie kosztuje tylko przejście po prefiksie - niezależnie od liczby kluczy.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from knowledge_index import fold_diacritics
+
+# Ile najlepszych kluczy pamięta każdy węzeł (górna granica `limit` w `complete`)
+TRIE_TOP_N = 10
+
+
+def _normalize(text: str) -> str:
+    return " ".join(fold_diacritics(text.lower()).split())
+
+
+def _rank(item: Tuple[float, str]):
+    """Kolejność podpowiedzi: popularność malejąco, potem krótsze i alfabetycznie."""
+    score, key = item
+    return -score, len(key), key
+
+
+class _Node:
+    __slots__ = ("label", "children", "entries", "top")
+
+    def __init__(self, label: str = "") -> None:
+        self.label = label
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: Dict[str, float] = {}
+        self.top: List[Tuple[float, str]] = []
+
+
+class PrefixTrie:
+    """
+    Radix trie: klucz -> popularność, z listą top-N w każdym węźle.
+    """
+    def __init__(self, top_n: int = TRIE_TOP_N) -> None:
+        self.top_n = top_n
+        self._root = _Node()
+        self._scores: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._scores
+
+    def _path(self, text: str, create: bool) -> Optional[List[_Node]]:
+        """Zwraca węzły od korzenia do węzła dokładnie odpowiadającego tekstowi (tworzy je, gdy create)."""
+        node = self._root
+        path = [node]
+        rest = text
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[rest[0]] = _Node(rest)
+                path.append(child)
+                return path
+            common = 0
+            limit = min(len(child.label), len(rest))
+            while common < limit and child.label[common] == rest[common]:
+                common += 1
+            if common < len(child.label):
+                if not create:
+                    return None
+                # Podział krawędzi: węzeł pośredni z częścią wspólną etykiety
+                middle = _Node(child.label[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                middle.top = list(child.top)
+                node.children[rest[0]] = middle
+                child = middle
+            node = child
+            path.append(node)
+            rest = rest[common:]
+        return path
+
+    def _refresh(self, path: List[_Node]) -> None:
+        """Przelicza listy top-N od węzła końcowego do korzenia."""
+        for node in reversed(path):
+            candidates = [(score, key) for key, score in node.entries.items()]
+            for child in node.children.values():
+                candidates.extend(child.top)
+            candidates.sort(key=_rank)
+            node.top = candidates[:self.top_n]
+
+    def _promote(self, path: List[_Node], key: str, score: float) -> None:
+        """Wstawia klucz o wyższej niż dotąd popularności do list top-N na ścieżce (bez pełnego przeliczania)."""
+        for node in path:
+            top = [item for item in node.top if item[1] != key]
+            if len(top) < self.top_n or _rank((score, key)) < _rank(top[-1]):
+                top.append((score, key))
+                top.sort(key=_rank)
+                node.top = top[:self.top_n]
+
+    def build(self, scores: Dict[str, float]) -> None:
+        """Wstawia wiele kluczy naraz i liczy listy top-N jednym przejściem drzewa."""
+        for key, score in scores.items():
+            self._path(_normalize(key), create=True)[-1].entries[key] = score
+            self._scores[key] = score
+        stack = [(self._root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                self._refresh([node])
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+
+    def set(self, key: str, score: float = 0.0) -> None:
+        """Dodaje klucz lub ustawia jego popularność."""
+        previous = self._scores.get(key)
+        path = self._path(_normalize(key), create=True)
+        path[-1].entries[key] = score
+        self._scores[key] = score
+        if previous is None or score >= previous:
+            self._promote(path, key, score)
+        else:
+            self._refresh(path)
+
+    def increment(self, key: str, amount: float = 1.0) -> None:
+        """Zwiększa popularność istniejącego klucza (np. po udzieleniu odpowiedzi z tego klucza)."""
+        if key in self._scores:
+            self.set(key, self._scores[key] + amount)
+
+    def remove(self, key: str) -> bool:
+        """Usuwa klucz; zwraca True, jeśli istniał."""
+        if self._scores.pop(key, None) is None:
+            return False
+        path = self._path(_normalize(key), create=False)
+        if path is not None:
+            path[-1].entries.pop(key, None)
+            # Puste liście są usuwane, by drzewo nie rosło przy nauce i zapominaniu faktów
+            while len(path) > 1 and not path[-1].entries and not path[-1].children:
+                leaf = path.pop()
+                del path[-1].children[leaf.label[0]]
+            self._refresh(path)
+        return True
+
+    def complete(self, prefix: str, limit: int = 5) -> List[str]:
+        """
+        Zwraca do `limit` (najwyżej top_n) najpopularniejszych kluczy zaczynających się od prefiksu.
+        """
+        rest = _normalize(prefix)
+        if not rest:
+            return []
+        node = self._root
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return []
+            label = child.label
+            if len(rest) <= len(label):
+                if not label.startswith(rest):
+                    return []
+                node = child
+                break
+            if not rest.startswith(label):
+                return []
+            node = child
+            rest = rest[len(label):]
+        return [key for _, key in node.top[:limit]]
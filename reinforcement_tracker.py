@@ -1,12 +1,27 @@
 
-def track_reinforcement(user_text: str, response: str = "") -> None:
+from utterance import as_utterance
+
+def track_reinforcement(user_text, response: str = "", tracker: "ReinforcementTracker" = None) -> None:
     """
     Wzmacnia temat na podstawie tekstu użytkownika (prosta heurystyka: każde słowo >3 znaki).
+    user_text może być tekstem lub gotową analizą Utterance.
+    Można przekazać własny tracker (np. z autosave=False w trybie wsadowym).
+    """
+    if tracker is None:
+        tracker = ReinforcementTracker()
+    for word in as_utterance(user_text).topics:
+        tracker.reinforce(word)
+
+def track_reinforcement_batch(texts) -> None:
+    """
+    Wzmacnia tematy wielu tekstów naraz - jeden odczyt i jeden zapis reinforcement.json.
     """
-    tracker = ReinforcementTracker()
-    for word in user_text.split():
-        if len(word) > 3:
-            tracker.reinforce(word.lower())
+    if not texts:
+        return
+    tracker = ReinforcementTracker(autosave=False)
+    for user_text in texts:
+        track_reinforcement(user_text, tracker=tracker)
+    tracker.save()
 
 """
 reinforcement_tracker.py
@@ -22,13 +37,15 @@ class ReinforcementTracker:
     """
     Tracks reinforcement strengths for topics and persists them to a JSON file.
     """
-    def __init__(self, db_path: str = "reinforcement.json") -> None:
+    def __init__(self, db_path: str = "reinforcement.json", autosave: bool = True) -> None:
         """
         Initialize the tracker and load strengths from file.
         Args:
             db_path (str): Path to the reinforcement JSON file.
+            autosave (bool): Save after every reinforcement; when False, call save() explicitly.
         """
         self.db_path = db_path
+        self.autosave = autosave
         self.strength: Dict[str, int] = self.load()
 
     def load(self) -> Dict[str, int]:
@@ -53,7 +70,8 @@ class ReinforcementTracker:
             topic (str): The topic to reinforce.
         """
         self.strength[topic] = self.strength.get(topic, 0) + 1
-        self.save()
+        if self.autosave:
+            self.save()
 
     def get_strength(self, topic: str) -> int:
         """
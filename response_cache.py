@@ -0,0 +1,95 @@
+"""
+response_cache.py
+-----------------
+Pamięć podręczna wyników etapów AIEngine dla powtarzających się wiadomości ("witaj", "kim jesteś").
+Kluczem jest znormalizowany tekst (małe litery, bez interpunkcji i nadmiarowych spacji) oraz wersja
+stanu silnika (baza wiedzy, pakiety wiedzy). Zmiana wersji unieważnia całą pamięć,
+a po przekroczeniu limitu usuwane są najdawniej używane wpisy (LRU).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Domyślna maksymalna liczba zapamiętanych wiadomości
+RESPONSE_CACHE_SIZE = 512
+
+
+def cache_text_key(utterance) -> str:
+    """Klucz wiadomości: słowa (`Utterance.words`) połączone spacją - "Witaj!" i "witaj" dają ten sam klucz."""
+    return " ".join(utterance.words)
+
+
+class ResponseCache:
+    """
+    Wątkowo bezpieczna pamięć LRU: klucz wiadomości -> wyjścia etapów przetwarzania.
+    """
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE) -> None:
+        """
+        Args:
+            max_entries (int): Limit wpisów (0 wyłącza pamięć podręczną).
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: Hashable) -> None:
+        """Czyści pamięć, gdy zmienił się stan silnika (wywoływane pod blokadą)."""
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: str, version: Hashable) -> Optional[Dict[str, Any]]:
+        """Zwraca kopię zapamiętanych wyjść etapów lub None."""
+        if not self.max_entries or not key:
+            return None
+        with self._lock:
+            self._check_version(version)
+            values = self._entries.get(key)
+            if values is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(values)
+
+    def put(self, key: str, version: Hashable, values: Dict[str, Any]) -> None:
+        """Zapamiętuje wyjścia etapów dla wiadomości obliczone przy danej wersji stanu."""
+        if not self.max_entries or not key:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = dict(values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Zwraca liczbę wpisów, trafień, chybień, usunięć (LRU) i unieważnień."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
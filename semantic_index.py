@@ -0,0 +1,167 @@
+"""
+semantic_index.py
+-----------------
+Wyszukiwanie semantyczne offline (bez sieci i GPU) dla bazy wiedzy.
+Klucze i pytania zamieniane są na zahaszowane wektory n-gramów znakowych (3-4 znaki, bez diakrytyków),
+ważone IDF słowa i normalizowane (NumPy). Wektory trafiają do indeksu LSH (losowe hiperpłaszczyzny,
+kilka tablic z sondowaniem sąsiednich kubełków), który w czasie podliniowym zwraca kandydatów
+podobnych do pytania także wtedy, gdy słowa różnią się odmianą ("splątania" / "splątanie").
+Kandydaci są następnie przeszeregowani wynikiem BM25 (`KnowledgeIndex.scores`).
+Bez NumPy indeks jest niedostępny (`SEMANTIC_AVAILABLE = False`), a baza wiedzy działa tylko na słowach kluczowych.
+"""
+
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from knowledge_index import fold_diacritics, tokenize
+
+SEMANTIC_AVAILABLE = np is not None
+
+EMBEDDING_DIM = 256
+NGRAM_SIZES = (3, 4)
+# LSH: liczba tablic i bitów (hiperpłaszczyzn) na tablicę
+LSH_TABLES = 12
+LSH_BITS = 16
+LSH_SEED = 97
+# Minimalne podobieństwo kosinusowe kandydata i limit kandydatów przekazywanych do BM25
+SEMANTIC_MIN_SIMILARITY = 0.45
+SEMANTIC_CANDIDATES = 20
+
+
+def _ngrams(word: str) -> Iterable[str]:
+    padded = f"<{word}>"
+    for size in NGRAM_SIZES:
+        for i in range(len(padded) - size + 1):
+            yield padded[i:i + size]
+
+
+def embed(text_or_words, weight: Optional[Callable[[str], float]] = None, dim: int = EMBEDDING_DIM):
+    """
+    Zwraca znormalizowany wektor n-gramów znakowych (haszowanie ze znakiem, crc32 - stabilne między procesami).
+
+    Args:
+        text_or_words: Tekst lub słowa (małymi literami).
+        weight (Optional[Callable[[str], float]]): Waga słowa (np. IDF); domyślnie 1.
+        dim (int): Wymiar wektora.
+    """
+    words = tokenize(text_or_words) if isinstance(text_or_words, str) else text_or_words
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in words:
+        w = weight(word) if weight else 1.0
+        if w <= 0.0:
+            continue
+        for gram in _ngrams(fold_diacritics(word)):
+            h = zlib.crc32(gram.encode("utf-8"))
+            vector[h % dim] += w if h & 0x80000000 else -w
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    """
+    Indeks LSH nad wektorami kluczy; id kluczy są wspólne z KnowledgeIndex.
+    """
+    def __init__(self, weight: Optional[Callable[[str], float]] = None, dim: int = EMBEDDING_DIM,
+                 tables: int = LSH_TABLES, bits: int = LSH_BITS, seed: int = LSH_SEED) -> None:
+        """
+        Args:
+            weight (Optional[Callable[[str], float]]): Waga słowa przy osadzaniu (np. KnowledgeIndex.idf).
+            dim (int): Wymiar wektorów.
+            tables (int): Liczba tablic LSH.
+            bits (int): Liczba bitów skrótu w tablicy.
+            seed (int): Ziarno losowych hiperpłaszczyzn (stały - powtarzalne kubełki).
+        """
+        if np is None:
+            raise RuntimeError("SemanticIndex wymaga pakietu numpy")
+        self.weight = weight
+        self.dim = dim
+        self.bits = bits
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((tables, dim, bits)).astype(np.float32)
+        self._powers = (1 << np.arange(bits, dtype=np.int64))
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(tables)]
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._codes = np.zeros((0, tables), dtype=np.int64)
+        self._size = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _hash(self, vectors):
+        """Zwraca kody kubełków (wiersz = wektor, kolumna = tablica)."""
+        signs = np.einsum("nd,tdb->ntb", vectors, self._planes) > 0
+        return signs.astype(np.int64) @ self._powers
+
+    def add_many(self, items: Iterable[Tuple[int, str]]) -> None:
+        """Dodaje klucze (id, tekst klucza) - osadzenia i kody liczone wsadowo."""
+        items = list(items)
+        if not items:
+            return
+        vectors = np.stack([embed(key, self.weight, self.dim) for _, key in items])
+        codes = self._hash(vectors)
+        needed = max(doc_id for doc_id, _ in items) + 1
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors))
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:len(self._vectors)] = self._vectors
+            grown_codes = np.full((capacity, len(self._buckets)), -1, dtype=np.int64)
+            grown_codes[:len(self._codes)] = self._codes
+            self._vectors, self._codes = grown, grown_codes
+        self._size = max(self._size, needed)
+        for row, (doc_id, _) in enumerate(items):
+            if self._codes[doc_id, 0] >= 0:
+                self.remove(doc_id)
+            self._count += 1
+            self._vectors[doc_id] = vectors[row]
+            self._codes[doc_id] = codes[row]
+            for table, code in enumerate(codes[row].tolist()):
+                self._buckets[table].setdefault(code, set()).add(doc_id)
+
+    def add(self, doc_id: int, key: str) -> None:
+        """Dodaje jeden klucz."""
+        self.add_many([(doc_id, key)])
+
+    def remove(self, doc_id: int) -> None:
+        """Usuwa klucz z kubełków."""
+        if doc_id >= self._size or self._codes[doc_id, 0] < 0:
+            return
+        for table, code in enumerate(self._codes[doc_id].tolist()):
+            bucket = self._buckets[table].get(code)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[table][code]
+        self._codes[doc_id] = -1
+        self._vectors[doc_id] = 0.0
+        self._count -= 1
+
+    def candidates(self, words: Iterable[str], limit: int = SEMANTIC_CANDIDATES,
+                   min_similarity: float = SEMANTIC_MIN_SIMILARITY) -> List[Tuple[int, float]]:
+        """
+        Zwraca do `limit` kluczy podobnych do słów pytania: (id, podobieństwo kosinusowe), od najbliższego.
+        Kandydaci pochodzą z kubełków pytania i kubełków różniących się jednym bitem (multi-probe LSH).
+        """
+        query = embed(list(words), self.weight, self.dim)
+        if not query.any():
+            return []
+        codes = self._hash(query[None, :])[0].tolist()
+        found: Set[int] = set()
+        for table, code in enumerate(codes):
+            buckets = self._buckets[table]
+            found.update(buckets.get(code, ()))
+            for bit in range(self.bits):
+                found.update(buckets.get(code ^ (1 << bit), ()))
+        if not found:
+            return []
+        ids = np.fromiter(found, dtype=np.int64, count=len(found))
+        similarity = self._vectors[ids] @ query
+        keep = similarity >= min_similarity
+        ids, similarity = ids[keep], similarity[keep]
+        order = np.lexsort((ids, -similarity))[:limit]
+        return [(int(ids[i]), float(similarity[i])) for i in order]
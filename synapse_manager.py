@@ -1,18 +1,24 @@
-def update_synapses(user_text: str = "") -> str:
+def update_synapses(user_text: str = "", map_data: dict = None) -> str:
     """
     Symuluje aktualizację wag synaptycznych na podstawie tekstu użytkownika.
     Zwraca komunikat o aktualizacji.
+    Jeśli podano map_data (mapę wczytaną przez load_network_map), zmienia ją w pamięci zamiast pliku.
     """
-    synapses = load_synapses()
+    if map_data is not None:
+        synapses = dict(_synapses_of(map_data))
+    else:
+        synapses = load_synapses()
     if not synapses:
         return "[Synapsy] Brak synaps do aktualizacji."
     import random
     key = random.choice(list(synapses.keys()))
     synapses[key] = round(synapses[key] * random.uniform(1.01, 1.10), 2)
-    # Zapisz z powrotem do network_map.json pod kluczem 'synaptic_connections'
-    with open("network_map.json", "w", encoding="utf-8") as f:
-        import json
-        json.dump({"synaptic_connections": synapses}, f, indent=2, ensure_ascii=False)
+    if map_data is not None:
+        map_data.clear()
+        map_data["synaptic_connections"] = synapses
+    else:
+        # Zapisz z powrotem do network_map.json pod kluczem 'synaptic_connections'
+        save_network_map({"synaptic_connections": synapses})
     return f"[Synapsy] Zaktualizowano wagę połączenia: {key} → {synapses[key]}"
 """
 synapse_manager.py
@@ -34,14 +40,34 @@ def load_synapses() -> Dict[str, float]:
     Returns:
         Dict[str, float]: Mapping of edge (str) to weight (float).
     """
+    return _synapses_of(load_network_map())
+
+def _synapses_of(data: Dict[str, Any]) -> Dict[str, float]:
+    """Return the synaptic connections stored in a network map."""
+    if isinstance(data, dict) and "synaptic_connections" in data:
+        return data["synaptic_connections"]
+    return data
+
+def load_network_map() -> Dict[str, Any]:
+    """
+    Load the raw network map file.
+    Returns:
+        Dict[str, Any]: File content, or an empty dict if the file does not exist.
+    """
     if os.path.exists(MAP_FILE):
         with open(MAP_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict) and "synaptic_connections" in data:
-                return data["synaptic_connections"]
-            return data
+            return json.load(f)
     return {}
 
+def save_network_map(map_data: Dict[str, Any]) -> None:
+    """
+    Write the network map file.
+    Args:
+        map_data (Dict[str, Any]): Complete network map to store.
+    """
+    with open(MAP_FILE, "w", encoding="utf-8") as f:
+        json.dump(map_data, f, indent=2, ensure_ascii=False)
+
 def analyze_synapses() -> Dict[str, float]:
     """
     Analyze synaptic weights, applying a small random modulation to simulate effectiveness.
@@ -0,0 +1,54 @@
+"""
+test_response_cache.py
+----------------------
+Testy pamięci podręcznej odpowiedzi AIEngine: powtórzona wiadomość korzysta z zapamiętanej odpowiedzi
+bazy wiedzy, ale fact-checking wykonywany jest ponownie (wynik z czasu braku sieci nie jest powtarzany).
+
+Uruchomienie:
+    python -m unittest test_response_cache
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import fact_checker
+from AIEngine import AIEngine
+
+
+class _Response:
+    """Udana odpowiedź HTTP bez wyników (requests.Response w zakresie używanym przez fact_checker)."""
+    ok = True
+
+    def json(self):
+        return {}
+
+
+class ResponseCacheFactCheckTest(unittest.TestCase):
+    def setUp(self):
+        # Silnik zapisuje stan w katalogu roboczym - test pracuje w katalogu tymczasowym
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp(prefix="nq-test-")
+        os.chdir(self.directory)
+        self.engine = AIEngine(fast_start=True)
+
+    def tearDown(self):
+        self.engine.shutdown()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_offline_fact_check_is_not_replayed(self):
+        with mock.patch.object(fact_checker.requests, "get", side_effect=OSError("offline stub")):
+            offline = self.engine.process_input("witaj")
+        self.assertIn("Błąd API fact-check: offline stub", offline)
+
+        with mock.patch.object(fact_checker.requests, "get", return_value=_Response()):
+            online = self.engine.process_input("Witaj!")
+        self.assertNotIn("offline stub", online)
+        self.assertEqual(self.engine.response_cache.get_metrics()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+utterance.py
+------------
+Jednorazowa analiza wiadomości użytkownika współdzielona przez wszystkie etapy AIEngine.
+Tekst jest normalizowany, dzielony na słowa i filtrowany raz na wiadomość, a etapy
+(baza wiedzy, sieć, wzmocnienia, emocje, osobowość, moduły tematyczne) korzystają z gotowego wyniku.
+Funkcje etapów przyjmują zarówno `Utterance`, jak i zwykły tekst (`as_utterance`).
+"""
+
+import re
+from typing import Union
+
+# Minimalna długość słowa traktowanego jako temat / sygnał (dotychczasowa heurystyka `len(w) > 3`)
+MIN_TOPIC_LENGTH = 4
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class Utterance:
+    """
+    Niezmienny wynik analizy wiadomości.
+
+    Attributes:
+        text: Tekst oryginalny.
+        lower: Tekst małymi literami.
+        normalized: Tekst małymi literami bez skrajnych białych znaków.
+        raw_tokens: Słowa oddzielone białymi znakami, w oryginalnej wielkości liter.
+        tokens: `raw_tokens` małymi literami.
+        token_set: Zbiór `tokens`.
+        signals: Słowa z `raw_tokens` dłuższe niż 3 znaki (sygnały rozbudowy sieci).
+        topics: Słowa z `tokens` dłuższe niż 3 znaki (tematy, wzmocnienia).
+        words: Słowa wyodrębnione wyrażeniem `\\w+` (bez interpunkcji).
+        word_set: Zbiór `words`.
+        ngrams: Bigramy kolejnych słów z `words`.
+    """
+    __slots__ = ("text", "lower", "normalized", "raw_tokens", "tokens", "token_set",
+                 "signals", "topics", "words", "word_set", "ngrams")
+
+    def __init__(self, text: str) -> None:
+        lower = text.lower()
+        raw_tokens = tuple(text.split())
+        tokens = tuple(lower.split())
+        words = tuple(_WORD_RE.findall(lower))
+        values = {
+            "text": text,
+            "lower": lower,
+            "normalized": lower.strip(),
+            "raw_tokens": raw_tokens,
+            "tokens": tokens,
+            "token_set": frozenset(tokens),
+            "signals": tuple(w for w in raw_tokens if len(w) >= MIN_TOPIC_LENGTH),
+            "topics": tuple(w for w in tokens if len(w) >= MIN_TOPIC_LENGTH),
+            "words": words,
+            "word_set": frozenset(words),
+            "ngrams": tuple(f"{a} {b}" for a, b in zip(words, words[1:])),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Utterance jest niezmienny")
+
+    def __delattr__(self, name):
+        raise AttributeError("Utterance jest niezmienny")
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Utterance) and other.text == self.text
+
+    def __hash__(self) -> int:
+        return hash(self.text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Utterance({self.text!r})"
+
+
+def as_utterance(value: Union[str, Utterance]) -> Utterance:
+    """
+    Zwraca analizę wiadomości - istniejący obiekt `Utterance` bez zmian, a dla tekstu nowy obiekt.
+    """
+    return value if isinstance(value, Utterance) else Utterance(value)
@@ -0,0 +1,209 @@
+"""
+write_behind.py
+---------------
+Kolejka zapisów odroczonych (write-behind) dla plików stanu AI.
+Zapisy pamięci rozmów, wzmocnień i mapy sieci trafiają do ograniczonej kolejki,
+a jeden wątek w tle zapisuje je na dysk, łącząc wiele zmian w jeden zapis:
+- dopisywania (np. wymiany w magazynie rozmów) są zbierane i przekazywane do zapisu hurtem,
+- pełne migawki pliku (np. network_map.json) - zapisywana jest tylko najnowsza.
+Odpowiedź dla użytkownika nie czeka na dysk. `flush()` wymusza zapis (zamknięcie aplikacji, pauza Kivy).
+"""
+
+import atexit
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_PENDING = 1024
+# Jak długo wątek zapisujący czeka na kolejne zmiany, zanim zapisze partię (sekundy)
+DEFAULT_COALESCE_DELAY = 0.05
+
+
+class WriteBehindQueue:
+    """
+    Ograniczona kolejka zapisów z jednym wątkiem zapisującym.
+    """
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING,
+                 coalesce_delay: float = DEFAULT_COALESCE_DELAY) -> None:
+        """
+        Args:
+            max_pending (int): Maksymalna liczba oczekujących zmian; pełna kolejka wstrzymuje zgłaszającego.
+            coalesce_delay (float): Czas zbierania zmian przed zapisem partii (sekundy).
+        """
+        self.max_pending = max_pending
+        self.coalesce_delay = coalesce_delay
+        self._cond = threading.Condition()
+        self._appends: Dict[str, Tuple[Callable[[List[Any]], None], List[Any]]] = {}
+        self._snapshots: Dict[str, Tuple[Callable[[Any], None], Any]] = {}
+        self._inflight: Dict[str, Any] = {}
+        self._depth = 0
+        self._writing = False
+        self._closed = False
+        self._stats = {"submitted": 0, "written": 0, "disk_writes": 0, "max_depth": 0,
+                       "blocked": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="nq-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def append(self, key: str, item: Any, writer: Callable[[List[Any]], None]) -> None:
+        """
+        Zgłasza dopisanie elementu. Elementy o tym samym kluczu zapisywane są razem: writer(lista).
+
+        Args:
+            key (str): Identyfikator celu zapisu (np. nazwa pliku).
+            item (Any): Element do dopisania.
+            writer (Callable): Funkcja zapisująca listę elementów jednym zapisem.
+        """
+        with self._cond:
+            self._wait_for_room()
+            _, items = self._appends.setdefault(key, (writer, []))
+            items.append(item)
+            self._added(1)
+
+    def snapshot(self, key: str, data: Any, writer: Callable[[Any], None]) -> None:
+        """
+        Zgłasza pełną migawkę stanu. Starsza, jeszcze niezapisana migawka o tym kluczu jest zastępowana.
+
+        Args:
+            key (str): Identyfikator celu zapisu (np. nazwa pliku).
+            data (Any): Kompletny stan do zapisania.
+            writer (Callable): Funkcja zapisująca stan: writer(data).
+        """
+        # Kopia - zgłaszający może dalej zmieniać swój obiekt, gdy wątek zapisuje migawkę
+        data = copy.deepcopy(data)
+        with self._cond:
+            if key in self._snapshots:
+                self._snapshots[key] = (writer, data)
+                self._stats["submitted"] += 1
+                return
+            self._wait_for_room()
+            self._snapshots[key] = (writer, data)
+            self._added(1)
+
+    def pending(self, key: str) -> Optional[Any]:
+        """
+        Zwraca kopię niezapisanej jeszcze migawki (także zapisywanej w tej chwili) lub None.
+        Czytelnicy stanu korzystają z niej zamiast pliku, by nie gubić odroczonych zmian.
+        """
+        with self._cond:
+            if key in self._snapshots:
+                return copy.deepcopy(self._snapshots[key][1])
+            if key in self._inflight:
+                return copy.deepcopy(self._inflight[key])
+        return None
+
+    def depth(self) -> int:
+        """Zwraca liczbę zmian oczekujących na zapis."""
+        with self._cond:
+            return self._depth
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        Zwraca metryki kolejki: bieżącą i maksymalną głębokość, liczbę zgłoszonych i zapisanych zmian,
+        liczbę faktycznych zapisów na dysk, wstrzymań przy pełnej kolejce oraz błędów zapisu.
+        """
+        with self._cond:
+            metrics = dict(self._stats)
+            metrics["depth"] = self._depth
+        return metrics
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Czeka, aż wszystkie zgłoszone zmiany zostaną zapisane.
+
+        Args:
+            timeout (Optional[float]): Maksymalny czas oczekiwania (None = bez limitu).
+
+        Returns:
+            bool: True, jeśli kolejka została opróżniona.
+        """
+        if not self._thread.is_alive():
+            # Wątek już nie działa (np. po shutdown) - zapis w bieżącym wątku
+            self._write_batch()
+            return self.depth() == 0
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            self._cond.notify_all()
+            while self._depth or self._writing:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """
+        Zapisuje oczekujące zmiany i zatrzymuje wątek zapisujący.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        # Zmiany zgłoszone po zamknięciu zapisywane są od razu
+        self._write_batch()
+
+    def _wait_for_room(self) -> None:
+        """Wstrzymuje zgłaszającego, gdy kolejka jest pełna (wywoływane pod blokadą)."""
+        if self._depth >= self.max_pending and self._thread.is_alive():
+            self._stats["blocked"] += 1
+            while self._depth >= self.max_pending and self._thread.is_alive():
+                self._cond.wait(0.1)
+
+    def _added(self, count: int) -> None:
+        """Aktualizuje liczniki po dodaniu zmian (wywoływane pod blokadą)."""
+        self._depth += count
+        self._stats["submitted"] += count
+        self._stats["max_depth"] = max(self._stats["max_depth"], self._depth)
+        self._cond.notify_all()
+
+    def _run(self) -> None:
+        """Pętla wątku zapisującego."""
+        while True:
+            with self._cond:
+                while not self._depth and not self._closed:
+                    self._cond.wait()
+                if not self._depth and self._closed:
+                    return
+            # Krótka przerwa, by zebrać więcej zmian do jednego zapisu
+            if self.coalesce_delay and not self._closed:
+                time.sleep(self.coalesce_delay)
+            self._write_batch()
+
+    def _write_batch(self) -> None:
+        """Zapisuje wszystkie oczekujące zmiany - jeden zapis na klucz."""
+        with self._cond:
+            if not self._depth:
+                return
+            appends, self._appends = self._appends, {}
+            snapshots, self._snapshots = self._snapshots, {}
+            self._inflight = {key: data for key, (_, data) in snapshots.items()}
+            count, self._depth = self._depth, 0
+            self._writing = True
+
+        written = 0
+        try:
+            for key, (writer, items) in appends.items():
+                written += self._call(key, writer, items)
+            for key, (writer, data) in snapshots.items():
+                written += self._call(key, writer, data)
+        finally:
+            with self._cond:
+                self._inflight = {}
+                self._writing = False
+                self._stats["written"] += count
+                self._stats["disk_writes"] += written
+                self._cond.notify_all()
+
+    def _call(self, key: str, writer: Callable[[Any], None], payload: Any) -> int:
+        """Wywołuje funkcję zapisującą; błąd jest logowany, a kolejka działa dalej."""
+        try:
+            writer(payload)
+            return 1
+        except Exception as e:
+            with self._cond:
+                self._stats["errors"] += 1
+            print(f"[WriteBehind] Błąd zapisu {key}: {e}")
+            return 0